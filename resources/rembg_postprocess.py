@@ -1,20 +1,83 @@
 from typing import List, Any
+from io import BytesIO
 import numpy as np
 import numpy.typing as npt
+from PIL import Image
 
 
 def rembg_postprocess_processing(args: Any, inputs: List[npt.NDArray]):
-    # Get mask
-    mask = inputs[0]
-    mask = mask[:, 0, :, :]
+    # Get mask of each sample. Shape: (batch_size, height, width)
+    mask = inputs[0][:, 0, :, :]
+    batch_size = mask.shape[0]
 
-    # Reverse normalize
-    mask_max = np.max(mask)
-    mask_min = np.min(mask)
-    mask = (mask - mask_min) / (mask_max - mask_min)
+    # Min and max of each sample
+    mask_min = mask.reshape(batch_size, -1).min(axis=1).astype(np.float32)
+    mask_range = mask.reshape(batch_size, -1).max(axis=1) - mask_min
 
-    # Reverse scale
-    mask = np.squeeze(mask) * 255
-    mask = mask.astype("uint8")
+    # Guard against division by zero on constant masks
+    mask_range[mask_range == 0] = 1
 
-    return (mask,)
+    # Reverse normalize and scale. Single float32 buffer, updated in place
+    output = np.subtract(mask, mask_min[:, None, None], dtype=np.float32)
+    output *= (255 / mask_range)[:, None, None]
+
+    return (output.astype(np.uint8),)
+
+
+def rembg_postprocess_encoded_processing(args: Any, inputs: List[npt.NDArray]):
+    # Get masks and original (height, width) of each sample
+    masks, = rembg_postprocess_processing(args, inputs[:1])
+    sizes = inputs[1]
+
+    # Resize each mask to original resolution and encode to PNG
+    encoded_masks = []
+    for mask, (height, width) in zip(masks, sizes):
+        buffer = BytesIO()
+        Image.fromarray(mask).resize(
+            (int(width), int(height)), Image.LANCZOS).save(buffer, format="PNG")
+        encoded_masks.append(buffer.getvalue())
+
+    # Shape: (batch_size, 1)
+    output = np.empty((len(encoded_masks), 1), dtype=np.object_)
+    output[:, 0] = encoded_masks
+    return (output,)
+
+
+def _get_feather_weights(offsets: npt.NDArray, tile_size: int):
+    # Linear ramp over the overlap of neighbor tiles, on both sides
+    offsets = np.unique(offsets)
+    overlap = tile_size - np.min(np.diff(offsets)) if len(offsets) > 1 else 0
+    ramp = np.minimum(1, np.arange(1, tile_size + 1,
+                      dtype=np.float32) / (overlap + 1))
+    return np.minimum(ramp, ramp[::-1])
+
+
+def rembg_postprocess_tiled_processing(args: Any, inputs: List[npt.NDArray]):
+    # Get mask of each tile, offsets of tiles, and image sizes
+    masks = inputs[0][:, 0, :, :]
+    offsets = inputs[1]
+    height, width, processing_height, processing_width = inputs[2]
+    tile_size = masks.shape[-1]
+
+    # Feathered weights of a tile. Shape: (tile_size, tile_size)
+    weights = np.outer(_get_feather_weights(offsets[:, 0], tile_size),
+                       _get_feather_weights(offsets[:, 1], tile_size))
+
+    # Blend tiles with feathered overlap
+    mask = np.zeros((processing_height, processing_width), dtype=np.float32)
+    mask_weights = np.zeros_like(mask)
+    for tile_mask, (y, x) in zip(masks, offsets):
+        mask[y:y+tile_size, x:x+tile_size] += tile_mask * weights
+        mask_weights[y:y+tile_size, x:x+tile_size] += weights
+    mask /= mask_weights
+
+    # Normalize the whole mask, resize to original resolution and encode to PNG
+    mask, = rembg_postprocess_processing(args, [mask[None, None]])
+    buffer = BytesIO()
+    Image.fromarray(mask[0]).resize(
+        (int(width), int(height)), Image.LANCZOS).save(buffer, format="PNG")
+
+    # Shape: (1,)
+    output = np.empty((1,), dtype=np.object_)
+    output[0] = buffer.getvalue()
+    return (output,)
@@ -1,11 +1,13 @@
 from typing import Any, List
+from io import BytesIO
 import numpy as np
 import numpy.typing as npt
+from PIL import Image
 
 
 def rembg_preprocess_initialize(args: Any):
-    mean = (0.485, 0.456, 0.406)
-    std = (0.229, 0.224, 0.225)
+    mean = np.array((0.485, 0.456, 0.406), dtype=np.float32)
+    std = np.array((0.229, 0.224, 0.225), dtype=np.float32)
     return {
         "mean": mean,
         "std": std
@@ -13,19 +15,98 @@ def rembg_preprocess_initialize(args: Any):
 
 
 def rembg_preprocess_processing(args: Any, inputs: List[npt.NDArray]):
-    # Input image
+    # Input images. Shape: (batch_size, height, width, channel)
     img = inputs[0]
+    batch_size, height, width, channel = img.shape
 
-    # Scale Img
-    img = img / np.max(img)
+    # Max of each image, guard against black images
+    img_max = img.reshape(batch_size, -1).max(axis=1).astype(np.float32)
+    img_max[img_max == 0] = 1
 
-    # Normalize Img with formula
-    img[:, :, :, 0] = (img[:, :, :, 0] - args['mean'][0]) / args['std'][0]
-    img[:, :, :, 1] = (img[:, :, :, 1] - args['mean'][1]) / args['std'][1]
-    img[:, :, :, 2] = (img[:, :, :, 2] - args['mean'][2]) / args['std'][2]
+    # Fuse scale and normalize: (img / max - mean) / std = img * scale - bias
+    scale = 1 / (img_max[:, None] * args['std'])
+    bias = args['mean'] / args['std']
 
-    # Transpose Img to (channel, width, height)
-    img = img.transpose((0, 3, 1, 2))
+    # Write straight into (batch_size, channel, height, width) output
+    output = np.empty((batch_size, channel, height, width), dtype=np.float32)
+    for c in range(channel):
+        np.multiply(img[..., c], scale[:, c, None, None], out=output[:, c])
+        output[:, c] -= bias[c]
 
-    # Expand dims for batch_size axis
-    return (img.astype(np.float32),)
+    return (output,)
+
+
+def rembg_preprocess_encoded_processing(args: Any, inputs: List[npt.NDArray]):
+    # Encoded JPEG/PNG images. Shape: (batch_size, 1)
+    encoded_images = inputs[0].reshape(-1)
+
+    # Decode and resize each image. Keep original (height, width)
+    images = []
+    sizes = []
+    for encoded_image in encoded_images:
+        pil_image = Image.open(BytesIO(encoded_image))
+        sizes.append((pil_image.height, pil_image.width))
+
+        # Let JPEG decoder downscale with DCT scaling
+        pil_image.draft("RGB", (320, 320))
+        pil_image = pil_image.convert("RGB").resize((320, 320), Image.LANCZOS)
+        images.append(np.asarray(pil_image))
+
+    img, = rembg_preprocess_processing(args, [np.stack(images)])
+    return (img, np.array(sizes, dtype=np.int32))
+
+
+def rembg_preprocess_tiled_initialize(args: Any):
+    params = rembg_preprocess_initialize(args)
+    params.update({
+        "tile_size": 320,
+        "tile_overlap": 64,
+        "max_tiles_per_side": 4
+    })
+    return params
+
+
+def _get_tile_offsets(length: int, tile_size: int, stride: int):
+    # Evenly spread tiles. Overlap is at least tile_size - stride
+    count = -(-(length - tile_size) // stride) + 1
+    if count == 1:
+        return [0]
+    return [round(i * (length - tile_size) / (count - 1)) for i in range(count)]
+
+
+def rembg_preprocess_tiled_processing(args: Any, inputs: List[npt.NDArray]):
+    # Single encoded JPEG/PNG image. Shape: (1,)
+    pil_image = Image.open(BytesIO(inputs[0].reshape(-1)[0]))
+    height, width = pil_image.height, pil_image.width
+
+    # Processing size. Bounded by max tiles per side, at least one tile
+    tile_size = args['tile_size']
+    stride = tile_size - args['tile_overlap']
+    max_size = tile_size + (args['max_tiles_per_side'] - 1) * stride
+    scale = min(1, max_size / max(height, width))
+    processing_height = max(tile_size, round(height * scale))
+    processing_width = max(tile_size, round(width * scale))
+
+    # Decode and resize image
+    pil_image.draft("RGB", (processing_width, processing_height))
+    pil_image = pil_image.convert("RGB").resize(
+        (processing_width, processing_height), Image.LANCZOS)
+
+    # Normalize the whole image once. Shape: (1, channel, height, width)
+    img, = rembg_preprocess_processing(args, [np.asarray(pil_image)[None]])
+
+    # Cut overlapping tiles. Shape: (tiles, channel, tile_size, tile_size)
+    offsets = [(y, x)
+               for y in _get_tile_offsets(processing_height, tile_size, stride)
+               for x in _get_tile_offsets(processing_width, tile_size, stride)]
+    tiles = np.empty((len(offsets), img.shape[1], tile_size, tile_size),
+                     dtype=np.float32)
+    for i, (y, x) in enumerate(offsets):
+        tiles[i] = img[0, :, y:y+tile_size, x:x+tile_size]
+
+    return (
+        tiles,
+        np.array(offsets, dtype=np.int32),
+        np.array([height, width, processing_height, processing_width],
+                 dtype=np.int32)
+    )
@@ -0,0 +1,125 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from build_utils import build_repository, get_model_path, read_model_config, write_module, load_python_model, execute, get_output, Request, InferenceRequest
+
+
+MODULE = '''
+def execute(params, inputs):
+    return [inputs[0]]
+'''
+
+
+def get_step_model(inputs: int, outputs: int) -> dict:
+    '''
+    Get python step model. Step models are called through mock BLS requests.
+    '''
+    return {
+        "engine": "python",
+        "max_batch_size": 8,
+        "versions": [{"version": 1, "module": {"path": "./steps.py", "execute": "execute"}}],
+        "tensor": {
+            "input": [{"dims": [2], "dtype": "float32"}] * inputs,
+            "output": [{"dims": [2], "dtype": "float32"}] * outputs
+        }
+    }
+
+
+class BlsTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.directory = self.__directory.name
+        write_module(self.directory, "steps", MODULE)
+        InferenceRequest.calls = []
+        InferenceRequest.models = {
+            "add": lambda inputs: {"add_output_1": inputs["add_input_1"] + 1},
+            "scale": lambda inputs: {"scale_output_1": inputs["scale_input_1"] * 10},
+            "combine": lambda inputs: {"combine_output_1": inputs["combine_input_1"] + inputs["combine_input_2"]}
+        }
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def build_pipeline(self, scale_step: dict) -> tuple[dict, str]:
+        '''
+        Build bls pipeline. Scale step depends on add step, combine step is independent.
+        Return configuration and build output.
+        '''
+        config = {
+            "model_repository": "models",
+            "models": {
+                "add": get_step_model(1, 1),
+                "scale": get_step_model(1, 1),
+                "combine": get_step_model(2, 1),
+                "pipeline": {
+                    "engine": "bls",
+                    "max_batch_size": 8,
+                    "tensor": {
+                        "input": [{"dims": [2], "dtype": "float32"}],
+                        "output": [{"dims": [2], "dtype": "float32"}] * 2
+                    },
+                    "steps": [
+                        {"model": "scale", "version": "latest", "input_map": {"scale_input_1": "added"},
+                         "output_map": {"scale_output_1": "pipeline_output_1"}, **scale_step},
+                        {"model": "add", "version": 1, "input_map": {"add_input_1": "pipeline_input_1"},
+                         "output_map": {"add_output_1": "added"}},
+                        {"model": "combine", "version": "latest",
+                         "input_map": {"combine_input_1": "pipeline_input_1", "combine_input_2": "pipeline_input_1"},
+                         "output_map": {"combine_output_1": "pipeline_output_2"}}
+                    ]
+                }
+            }
+        }
+        result = build_repository(self.directory, config)
+        return config, result.stdout + result.stderr
+
+    def load_pipeline(self, scale_step: dict):
+        config, output = self.build_pipeline(scale_step)
+        self.assertIn("Built bls model pipeline.", output)
+        self.assertIn('backend: "python"', read_model_config(
+            self.directory, config, "pipeline"))
+        return load_python_model(os.path.join(get_model_path(self.directory, config, "pipeline"), "1"))
+
+    def test_steps_run_in_dependency_order(self):
+        model = self.load_pipeline({})
+        responses = execute(
+            model, [Request({"pipeline_input_1": np.array([[1, 2]], np.float32)})])
+        np.testing.assert_array_equal(get_output(
+            responses[0], "pipeline_output_1"), [[20, 30]])
+        np.testing.assert_array_equal(get_output(
+            responses[0], "pipeline_output_2"), [[2, 4]])
+        self.assertEqual(InferenceRequest.calls[-1], "scale")
+
+    def test_condition_and_default(self):
+        model = self.load_pipeline({
+            "condition": "np.max(pipeline_input_1) > 0",
+            "default": {"pipeline_output_1": "np.zeros_like(added)"}})
+        responses = execute(model, [
+            Request({"pipeline_input_1": np.array([[1, 1]], np.float32)}),
+            Request({"pipeline_input_1": np.array([[-1, -1]], np.float32)})
+        ])
+        np.testing.assert_array_equal(get_output(
+            responses[0], "pipeline_output_1"), [[20, 20]])
+        np.testing.assert_array_equal(get_output(
+            responses[1], "pipeline_output_1"), [[0, 0]])
+        self.assertEqual(InferenceRequest.calls.count("scale"), 1)
+
+    def test_skipped_step_without_default(self):
+        model = self.load_pipeline(
+            {"condition": "np.max(pipeline_input_1) > 0"})
+        responses = execute(
+            model, [Request({"pipeline_input_1": np.array([[-1, -1]], np.float32)})])
+        self.assertTrue(responses[0].has_error())
+        self.assertIn("Its step was skipped by condition",
+                      responses[0].error().message())
+
+    def test_unknown_tensor(self):
+        _, output = self.build_pipeline({"condition": "missing > 0"})
+        self.assertIn("Failed to build model pipeline.", output)
+        self.assertIn(
+            "Name missing of expression `missing > 0` is not a model input or step output.", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from build_utils import build_repository, read_model_config, write_onnx_model
+
+
+def get_onnx_model(path: str) -> dict:
+    return {
+        "engine": "onnx",
+        "max_batch_size": 8,
+        "dynamic_batching": True,
+        "versions": [{"version": 1, "path": path}, {"version": 2, "path": path}]
+    }
+
+
+class BuildJobsTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.directory = self.__directory.name
+        write_onnx_model(os.path.join(self.directory, "dense.onnx"))
+        with open(os.path.join(self.directory, "broken.onnx"), "wb") as f:
+            f.write(b"\xff" * 16)
+        self.config = {
+            "model_repository": "models",
+            "models": {
+                "a": get_onnx_model("./dense.onnx"),
+                "broken": get_onnx_model("./broken.onnx"),
+                "b": get_onnx_model("./dense.onnx"),
+                "pipeline": {
+                    "engine": "ensemble",
+                    "max_batch_size": 8,
+                    "steps": [
+                        {"model": "a", "version": "latest", "input_map": {"x": "x"}, "output_map": {"y": "y"}},
+                        {"model": "broken", "version": "latest", "input_map": {"x": "y"}, "output_map": {"y": "z"}}
+                    ]
+                }
+            }
+        }
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def test_failures_are_reported_per_model(self):
+        result = build_repository(self.directory, self.config, "--jobs", "4")
+        self.assertEqual(result.returncode, 1)
+        for name in ["a", "b"]:
+            self.assertIn(f"Built model {name} (versions: 2).", result.stdout)
+        self.assertIn("Failed to build model broken. ", result.stdout)
+        self.assertIn("Failed to build model pipeline. ValueError: Step model broken failed to build.", result.stdout)
+        self.assertIn("Build failed for 2 models: broken, pipeline", result.stdout)
+
+        # Models are reported in configuration order
+        positions = [result.stdout.index(message) for message in [
+            "Built model a ", "Failed to build model broken.", "Built model b "]]
+        self.assertEqual(positions, sorted(positions))
+
+    def test_jobs_build_same_configs(self):
+        del self.config["models"]["broken"], self.config["models"]["pipeline"]
+        configs = []
+        for jobs in ["1", "4"]:
+            result = build_repository(self.directory, self.config, "--jobs", jobs, "--rebuild", "True")
+            self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+            configs.append([read_model_config(self.directory, self.config, name) for name in ["a", "b"]])
+        self.assertEqual(configs[0], configs[1])
+
+    def test_invalid_jobs(self):
+        result = build_repository(self.directory, self.config, "--jobs", "0")
+        self.assertIn("Number of jobs must be a positive integer.", result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import shutil
+import tempfile
+import unittest
+import onnx
+from onnx import helper, TensorProto
+from build_utils import build_repository, get_model_path, write_module
+
+
+MODULE = '''
+def execute(params, inputs):
+    return [inputs[0]]
+'''
+
+
+def write_onnx_model(path: str, graph_name: str = "identity"):
+    '''
+    Write ONNX model with a fixed input shape. Its graph is not patched by the build.
+    '''
+    graph = helper.make_graph(
+        [helper.make_node("Identity", ["x"], ["y"])], graph_name,
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, [1, 4])],
+        [helper.make_tensor_value_info("y", TensorProto.FLOAT, [1, 4])])
+    onnx.save(helper.make_model(
+        graph, opset_imports=[helper.make_opsetid("", 17)]), path)
+
+
+class BuildManifestTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.directory = self.__directory.name
+        write_module(self.directory, "steps", MODULE)
+        write_onnx_model(os.path.join(self.directory, "identity.onnx"))
+        self.config = {
+            "model_repository": "models",
+            "models": {
+                "identity": {
+                    "engine": "onnx",
+                    "max_batch_size": 0,
+                    "versions": [{"version": 1, "path": "./identity.onnx"}]
+                },
+                "step": {
+                    "engine": "python",
+                    "max_batch_size": 0,
+                    "versions": [{"version": 1, "module": {"path": "./steps.py", "execute": "execute"}}],
+                    "tensor": {"input": [{"dims": [4], "dtype": "float32"}], "output": [{"dims": [4], "dtype": "float32"}]}
+                }
+            }
+        }
+        self.assert_built(["identity", "step"])
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def assert_built(self, names: list[str], *args: str):
+        '''
+        Build repository. Only models in names are built, the others are up to date.
+        '''
+        result = build_repository(self.directory, self.config, *args)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        for name in self.config["models"]:
+            if name in names:
+                self.assertIn(f"Built model {name} ", result.stdout)
+            else:
+                self.assertIn(f"Model {name} is up to date.", result.stdout)
+
+    def test_unchanged_models_are_skipped(self):
+        self.assert_built([])
+
+    def test_rebuild_ignores_manifest(self):
+        self.assert_built(["identity", "step"], "--rebuild", "True")
+        self.assert_built([])
+
+    def test_deleted_artifact_is_rebuilt(self):
+        os.remove(os.path.join(get_model_path(
+            self.directory, self.config, "identity"), "1", "model.onnx"))
+        self.assert_built(["identity"])
+
+    def test_deleted_version_is_rebuilt(self):
+        shutil.rmtree(os.path.join(get_model_path(
+            self.directory, self.config, "step"), "1"))
+        self.assert_built(["step"])
+        self.assertTrue(os.path.isfile(os.path.join(get_model_path(
+            self.directory, self.config, "step"), "1", "model.py")))
+
+    def test_source_model_is_not_hardlinked(self):
+        source_path = os.path.join(self.directory, "identity.onnx")
+        model_path = os.path.join(get_model_path(
+            self.directory, self.config, "identity"), "1", "model.onnx")
+        self.assertFalse(os.path.samefile(source_path, model_path))
+
+        # Edit source in place. Served model changes only after rebuild
+        with open(model_path, "rb") as f:
+            built = f.read()
+        write_onnx_model(source_path, "identity_edited")
+        with open(model_path, "rb") as f:
+            self.assertEqual(f.read(), built)
+        self.assert_built(["identity"])
+
+
+if __name__ == '__main__':
+    unittest.main()
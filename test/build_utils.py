@@ -0,0 +1,228 @@
+import os
+import sys
+import types
+import asyncio
+import subprocess
+import importlib.util
+import yaml
+import onnx
+import numpy as np
+from onnx import helper, numpy_helper, TensorProto
+
+
+# Directory and build script of `trsp` module. Its modules import each other by name
+TRSP_DIRECTORY = os.path.join(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))), "trsp")
+BUILD_SCRIPT = os.path.join(TRSP_DIRECTORY, "build.py")
+
+
+def build_repository(directory: str, config: dict, *args: str) -> subprocess.CompletedProcess:
+    '''
+    Write configuration to directory and build its model repository.
+    '''
+    config_path = os.path.join(directory, "triton_config.yaml")
+    with open(config_path, "w") as f:
+        yaml.dump(config, f, sort_keys=False)
+    return subprocess.run(
+        [sys.executable, BUILD_SCRIPT, "-f", config_path, *args],
+        cwd=directory, capture_output=True, text=True)
+
+
+def get_model_path(directory: str, config: dict, model: str) -> str:
+    '''
+    Get path of built model.
+    '''
+    return os.path.join(directory, "build", config["model_repository"], model)
+
+
+def read_model_config(directory: str, config: dict, model: str) -> str:
+    '''
+    Read config.pbtxt of built model.
+    '''
+    with open(os.path.join(get_model_path(directory, config, model), "config.pbtxt"), "r") as f:
+        return f.read()
+
+
+def write_module(directory: str, name: str, source: str) -> str:
+    '''
+    Write python module of model steps. Return its path.
+    '''
+    path = os.path.join(directory, f"{name}.py")
+    with open(path, "w") as f:
+        f.write(source)
+    return path
+
+
+def write_onnx_model(path: str, batch_dim: int | str = 1, external_data: bool = False, size: int = 32, seed: int = 0):
+    '''
+    Write ONNX model `y = relu(x @ w + b)`, with input x of shape [batch_dim, size].
+    Weights are saved to `<name>.data` next to the model if external_data.
+    '''
+    rng = np.random.default_rng(seed)
+    weights = [
+        numpy_helper.from_array(rng.standard_normal((size, size)).astype(np.float32), "w"),
+        numpy_helper.from_array(rng.standard_normal(size).astype(np.float32), "b")
+    ]
+    graph = helper.make_graph(
+        [helper.make_node("MatMul", ["x", "w"], ["xw"]),
+         helper.make_node("Add", ["xw", "b"], ["z"]),
+         helper.make_node("Relu", ["z"], ["y"])], "dense",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, [batch_dim, size])],
+        [helper.make_tensor_value_info("y", TensorProto.FLOAT, [batch_dim, size])],
+        weights)
+    model = helper.make_model(
+        graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=8)
+    onnx.save(model, path, save_as_external_data=external_data,
+              location=f"{os.path.splitext(os.path.basename(path))[0]}.data", size_threshold=0)
+
+
+# Mock of `triton_python_backend_utils`. Generated models run outside Triton server
+class Tensor:
+    def __init__(self, name, data):
+        self.__name = name
+        self.__data = np.asarray(data)
+
+    def name(self):
+        return self.__name
+
+    def as_numpy(self):
+        return self.__data
+
+
+class TritonError:
+    def __init__(self, message, code=0):
+        self.__message = message
+
+    def message(self):
+        return self.__message
+
+
+class TritonModelException(Exception):
+    pass
+
+
+class InferenceResponse:
+    def __init__(self, output_tensors=None, error=None):
+        self.__output_tensors = output_tensors or []
+        self.__error = error
+
+    def output_tensors(self):
+        return self.__output_tensors
+
+    def has_error(self):
+        return self.__error is not None
+
+    def error(self):
+        return self.__error
+
+
+class Request:
+    '''
+    Inference request from client. Responses of decoupled models are recorded.
+    '''
+
+    def __init__(self, inputs: dict, correlation_id=0):
+        self.inputs = {name: Tensor(name, value)
+                       for name, value in inputs.items()}
+        self.sent = []
+        self.__correlation_id = correlation_id
+
+    def correlation_id(self):
+        return self.__correlation_id
+
+    def get_response_sender(self):
+        request = self
+
+        class ResponseSender:
+            def send(self, response=None, flags=0):
+                request.sent.append((response, flags))
+        return ResponseSender()
+
+
+class InferenceRequest:
+    '''
+    BLS request. Called models are functions in `models`, from inputs to outputs dictionary.
+    '''
+    models = {}
+    calls = []
+
+    def __init__(self, model_name, inputs, requested_output_names, model_version=-1):
+        self.model_name = model_name
+        self.inputs = {tensor.name(): tensor.as_numpy() for tensor in inputs}
+        self.requested_output_names = requested_output_names
+
+    async def async_exec(self):
+        InferenceRequest.calls.append(self.model_name)
+        outputs = InferenceRequest.models[self.model_name](self.inputs)
+        return InferenceResponse([Tensor(name, outputs[name]) for name in self.requested_output_names])
+
+
+class Logger:
+    messages = []
+
+    @staticmethod
+    def log_info(message):
+        Logger.messages.append(message)
+
+
+def get_input_tensor_by_name(request, name):
+    return request.inputs.get(name)
+
+
+def get_output_tensor_by_name(response, name):
+    for tensor in response.output_tensors():
+        if tensor.name() == name:
+            return tensor
+    return None
+
+
+def get_pb_utils() -> types.ModuleType:
+    '''
+    Get mock module of `triton_python_backend_utils`.
+    '''
+    module = types.ModuleType("triton_python_backend_utils")
+    for value in [Tensor, TritonError, TritonModelException, InferenceResponse, InferenceRequest, Logger,
+                  get_input_tensor_by_name, get_output_tensor_by_name]:
+        setattr(module, value.__name__, value)
+    module.TRITONSERVER_RESPONSE_COMPLETE_FINAL = 1
+    return module
+
+
+def load_python_model(version_path: str):
+    '''
+    Load generated model.py of version directory with mock `pb_utils`.
+    Return initialized TritonPythonModel.
+    '''
+    sys.modules["triton_python_backend_utils"] = get_pb_utils()
+
+    # Model is a package module, so it can import copied modules relatively
+    package = f"_trsp_model_{abs(hash(version_path))}"
+    spec = importlib.util.spec_from_file_location(
+        package, os.path.join(version_path, "model.py"),
+        submodule_search_locations=[version_path])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[package] = module
+    spec.loader.exec_module(module)
+
+    model = module.TritonPythonModel()
+    model.initialize({})
+    return model
+
+
+def execute(model, requests: list[Request]) -> list:
+    '''
+    Execute model on requests. Async execute is run to completion.
+    '''
+    responses = model.execute(requests)
+    if asyncio.iscoroutine(responses):
+        responses = asyncio.run(responses)
+    return responses
+
+
+def get_output(response, name: str) -> np.ndarray:
+    '''
+    Get output of response. Fail with the error message if response has error.
+    '''
+    if response.has_error():
+        raise AssertionError(response.error().message())
+    return get_output_tensor_by_name(response, name).as_numpy()
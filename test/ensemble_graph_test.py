@@ -0,0 +1,119 @@
+import tempfile
+import unittest
+from build_utils import build_repository, read_model_config, write_module
+
+
+MODULE = '''
+def execute(params, inputs):
+    return [inputs[0]]
+'''
+
+
+def get_step_model() -> dict:
+    '''
+    Get python step model with one input and one output.
+    '''
+    return {
+        "engine": "python",
+        "max_batch_size": 8,
+        "versions": [{"version": 1, "module": {"path": "./steps.py", "execute": "execute"}}],
+        "tensor": {"input": [{"dims": [4], "dtype": "float32"}], "output": [{"dims": [4], "dtype": "float32"}]}
+    }
+
+
+def get_step(model: str, inputs: dict, outputs: dict) -> dict:
+    '''
+    Get ensemble step of step model. Maps are keyed by tensor index.
+    '''
+    return {
+        "model": model,
+        "version": "latest",
+        "input_map": {f"{model}_input_{i}": value for i, value in inputs.items()},
+        "output_map": {f"{model}_output_{i}": value for i, value in outputs.items()}
+    }
+
+
+class EnsembleGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.directory = self.__directory.name
+        write_module(self.directory, "steps", MODULE)
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def build_ensemble(self, steps: list[dict], **ensemble) -> tuple[dict, str]:
+        '''
+        Build ensemble of steps. Return configuration and build output.
+        '''
+        config = {
+            "model_repository": "models",
+            "models": {
+                **{name: get_step_model() for name in ["a", "b", "c"]},
+                "graph": {"engine": "ensemble", "max_batch_size": 8, "steps": steps, **ensemble}
+            }
+        }
+        result = build_repository(self.directory, config)
+        return config, result.stdout + result.stderr
+
+    def assert_error(self, steps: list[dict], message: str, **ensemble):
+        _, output = self.build_ensemble(steps, **ensemble)
+        self.assertIn("Failed to build model graph.", output)
+        self.assertIn(message, output)
+
+    def test_fan_out_fan_in(self):
+        config, output = self.build_ensemble([
+            get_step("c", {1: "a_out"}, {1: "result"}),
+            get_step("a", {1: "image"}, {1: "a_out"}),
+            get_step("b", {1: "image"}, {1: "mask"})
+        ])
+        self.assertIn("Built ensemble model graph.", output)
+        pbtxt = read_model_config(self.directory, config, "graph")
+
+        # Ensemble input is shared by two steps. Outputs are unconsumed tensors
+        self.assertEqual(pbtxt.count('name: "image"'), 1)
+        self.assertIn('name: "result"', pbtxt)
+        self.assertIn('name: "mask"', pbtxt)
+        self.assertNotIn('name: "a_out"', pbtxt)
+
+        # Steps are ordered after the steps they depend on
+        self.assertLess(pbtxt.index('model_name: "a"'),
+                        pbtxt.index('model_name: "c"'))
+
+    def test_cycle(self):
+        self.assert_error([
+            get_step("a", {1: "t2"}, {1: "t1"}),
+            get_step("b", {1: "t1"}, {1: "t2"})
+        ], "Steps form a cycle: a, b.")
+
+    def test_unknown_step_model(self):
+        self.assert_error([
+            get_step("a", {1: "image"}, {1: "t1"}),
+            get_step("missing", {1: "t1"}, {1: "t2"})
+        ], "Step model missing not found in configuration models.")
+
+    def test_unknown_tensor(self):
+        self.assert_error([
+            get_step("a", {1: "image", 2: "other"}, {1: "t1"})
+        ], "Step a `input_map` has unknown tensors: a_input_2.")
+
+    def test_duplicate_tensor(self):
+        self.assert_error([
+            get_step("a", {1: "image"}, {1: "t1"}),
+            get_step("b", {1: "image"}, {1: "t1"})
+        ], "Tensor t1 is produced by steps a and b.")
+
+    def test_unused_step(self):
+        self.assert_error([
+            get_step("a", {1: "image"}, {1: "t1"}),
+            get_step("b", {1: "image"}, {1: "t2"})
+        ], "Outputs of step b are not used by any step or ensemble output.", outputs=["t1"])
+
+    def test_dangling_output(self):
+        self.assert_error([
+            get_step("a", {1: "image"}, {1: "t1"})
+        ], "Ensemble output missing is not produced by any step.", outputs=["missing"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,236 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from build_utils import build_repository, get_model_path, read_model_config, write_module, write_onnx_model, load_python_model
+
+
+MODULE = '''
+def initialize(args):
+    return {"shapes": []}
+
+
+def execute(params, inputs):
+    params["shapes"].append((inputs[0].shape, inputs[0].dtype.name, float(inputs[0].sum())))
+    return [inputs[0]]
+'''
+
+
+class ModelConfigTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.directory = self.__directory.name
+        write_onnx_model(os.path.join(self.directory, "dense.onnx"),
+                         batch_dim="batch")
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def build_model(self, **model) -> tuple[int, str]:
+        '''
+        Build onnx model with 8 CPU cores. Return build return code, and config.pbtxt or build output.
+        '''
+        config = {
+            "model_repository": "models",
+            "models": {
+                "dense": {
+                    "engine": "onnx",
+                    "max_batch_size": 8,
+                    "versions": [{"version": 1, "path": "./dense.onnx"}],
+                    **model
+                }
+            }
+        }
+        with mock.patch.dict(os.environ, {"TRSP_CPU_COUNT": "8"}):
+            result = build_repository(self.directory, config)
+        if result.returncode != 0:
+            return result.returncode, result.stdout + result.stderr
+        return result.returncode, read_model_config(self.directory, config, "dense")
+
+    def assert_rendered(self, expected: str, **model):
+        returncode, output = self.build_model(**model)
+        self.assertEqual(returncode, 0, output)
+        self.assertIn(expected, output)
+
+    def assert_error(self, message: str, **model):
+        returncode, output = self.build_model(**model)
+        self.assertNotEqual(returncode, 0)
+        self.assertIn(message, output)
+
+    def test_onnxruntime_options(self):
+        self.assert_rendered('''parameters [
+  {
+    key: "intra_op_thread_count"
+    value {
+      string_value: "2"
+    }
+  },
+  {
+    key: "inter_op_thread_count"
+    value {
+      string_value: "1"
+    }
+  },
+  {
+    key: "execution_mode"
+    value {
+      string_value: "0"
+    }
+  },
+  {
+    key: "enable_mem_arena"
+    value {
+      string_value: "0"
+    }
+  }
+]
+optimization {
+  graph {
+    level: -1
+  }
+}''', onnxruntime={"intra_op_thread_count": 2, "inter_op_thread_count": "auto", "execution_mode": "sequential",
+                   "graph_optimization_level": "basic", "enable_mem_arena": False})
+
+        # Thread count `auto` divides CPU cores across CPU instances
+        self.assert_rendered('''    key: "intra_op_thread_count"
+    value {
+      string_value: "4"
+    }''', onnxruntime={"intra_op_thread_count": "auto"}, instance_group=[{"kind": "cpu", "count": 2}])
+
+        self.assert_error("Model `onnxruntime` graph_optimization_level must be one of: basic, extended, all: dense.",
+                          onnxruntime={"graph_optimization_level": "none"})
+
+    def test_instance_groups(self):
+        self.assert_rendered('''instance_group [
+  {
+    kind: KIND_CPU
+    count: 4
+  },
+  {
+    kind: KIND_GPU
+    count: 2
+    gpus: [0, 1]
+  }
+]''', onnxruntime={"intra_op_thread_count": 2},
+            instance_group=[{"kind": "cpu", "count": "auto"}, {"kind": "gpu", "count": 2, "gpus": [0, 1]}])
+
+        self.assert_error("Model instance_group count `auto` is only supported by cpu kind: dense.",
+                          instance_group=[{"kind": "gpu", "count": "auto"}])
+        self.assert_error("Model instance_group count `auto` can be used by one group only: dense.",
+                          instance_group=[{"kind": "cpu", "count": "auto"}, {"kind": "cpu", "count": "auto"}])
+
+    def test_dynamic_batching(self):
+        self.assert_rendered('''dynamic_batching {
+  preferred_batch_size: [4, 8]
+  max_queue_delay_microseconds: 100
+  priority_levels: 2
+  default_priority_level: 2
+  default_queue_policy {
+    timeout_action: DELAY
+    default_timeout_microseconds: 1000
+  }
+  priority_queue_policy [
+    {
+      key: 1
+      value {
+        max_queue_size: 16
+      }
+    }
+  ]
+}''', dynamic_batching={
+            "preferred_batch_size": [4, 8], "max_queue_delay_microseconds": 100,
+            "priority_levels": 2, "default_priority_level": 2,
+            "default_queue_policy": {"timeout_action": "delay", "default_timeout_microseconds": 1000},
+            "priority_queue_policy": {1: {"max_queue_size": 16}}})
+
+        self.assert_error("Model dynamic_batching `priority_levels` requires `default_priority_level`: dense.",
+                          dynamic_batching={"priority_levels": 2})
+
+    def test_batch_input_output(self):
+        self.assert_rendered('''batch_input [
+  {
+    kind: BATCH_ACCUMULATED_ELEMENT_COUNT
+    target_name: ["INDEX"]
+    data_type: TYPE_INT32
+    source_input: ["x"]
+  }
+]
+batch_output [
+  {
+    target_name: ["y"]
+    kind: BATCH_SCATTER_WITH_INPUT_SHAPE
+    source_input: ["x"]
+  }
+]''', dynamic_batching=True,
+            batch_input=[{"kind": "batch_accumulated_element_count", "target_name": "INDEX",
+                          "data_type": "int32", "source_input": "x"}],
+            batch_output=[{"target_name": "y", "source_input": "x"}])
+
+        self.assert_error("Model batch_input kind `batch_max_element_count_as_shape` requires `source_input`: dense.",
+                          batch_input=[{"kind": "batch_max_element_count_as_shape", "target_name": "MAX", "data_type": "int32"}])
+
+    def test_model_warmup(self):
+        self.assert_rendered('''model_warmup [
+  {
+    name: "zero_batch_1"
+    batch_size: 1
+    inputs [
+      {
+        key: "x"
+        value {
+          data_type: TYPE_FP32
+          dims: [32]
+          zero_data: true
+        }
+      }
+    ]
+    count: 2
+  },
+  {
+    name: "zero_batch_8"
+    batch_size: 8
+    inputs [
+      {
+        key: "x"
+        value {
+          data_type: TYPE_FP32
+          dims: [32]
+          zero_data: true
+        }
+      }
+    ]
+    count: 2
+  }
+]''', dynamic_batching=True, warmup={"batch_sizes": [1, 8], "data": "zero", "count": 2})
+
+        self.assert_error("Model `warmup` batch_sizes must be a list of positive integers not greater than `max_batch_size`: dense.",
+                          warmup={"batch_sizes": [16]})
+
+    def test_python_warmup_execute(self):
+        write_module(self.directory, "steps", MODULE)
+        config = {
+            "model_repository": "models",
+            "models": {
+                "step": {
+                    "engine": "python",
+                    "max_batch_size": 4,
+                    "versions": [{"version": 1, "module": {"path": "./steps.py", "initialize": "initialize", "execute": "execute"}}],
+                    "tensor": {"input": [{"dims": [2], "dtype": "float32"}], "output": [{"dims": [2], "dtype": "float32"}]},
+                    "warmup": {"batch_sizes": [1, 4], "data": "zero", "count": 2, "execute": True}
+                }
+            }
+        }
+        result = build_repository(self.directory, config)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn("model_warmup [", read_model_config(self.directory, config, "step"))
+
+        # Execute runs on each sample in initialize
+        model = load_python_model(os.path.join(
+            get_model_path(self.directory, config, "step"), "1"))
+        self.assertEqual(model.params["shapes"], [
+            ((1, 2), "float32", 0.0), ((1, 2), "float32", 0.0),
+            ((4, 2), "float32", 0.0), ((4, 2), "float32", 0.0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+import onnx
+import numpy as np
+import onnxruntime as ort
+from onnx import helper, TensorProto
+from build_utils import build_repository, get_model_path, read_model_config
+from rembg_benchmark import legacy_preprocess_processing
+from rembg_preprocess import rembg_preprocess_initialize
+from rembg_postprocess import rembg_postprocess_processing
+
+
+def write_nchw_model(path: str):
+    '''
+    Write ONNX model with an NCHW image input, an identity output and an extra output.
+    '''
+    graph = helper.make_graph(
+        [helper.make_node("Identity", ["x"], ["y"]),
+         helper.make_node("Neg", ["x"], ["z"])], "nchw",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["batch", 3, 16, 16])],
+        [helper.make_tensor_value_info("y", TensorProto.FLOAT, ["batch", 3, 16, 16]),
+         helper.make_tensor_value_info("z", TensorProto.FLOAT, ["batch", 3, 16, 16])])
+    onnx.save(helper.make_model(
+        graph, opset_imports=[helper.make_opsetid("", 17)], ir_version=8), path)
+
+
+class OnnxFuseTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.directory = self.__directory.name
+        write_nchw_model(os.path.join(self.directory, "nchw.onnx"))
+        self.config = {
+            "model_repository": "models",
+            "models": {
+                "fused": {
+                    "engine": "onnx",
+                    "max_batch_size": 8,
+                    "dynamic_batching": True,
+                    "fuse": {
+                        "pre": {"dtype": "uint8", "layout": "nhwc", "scale": "max",
+                                "mean": [0.485, 0.456, 0.406], "std": [0.229, 0.224, 0.225]},
+                        "post": {"output": 0, "channel": 0, "normalize": "minmax", "scale": 255, "dtype": "uint8"}
+                    },
+                    "versions": [{"version": 1, "path": "./nchw.onnx"}]
+                }
+            }
+        }
+        result = build_repository(self.directory, self.config)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def test_fused_config(self):
+        config = read_model_config(self.directory, self.config, "fused")
+        self.assertIn('''input [
+  {
+    name: "x"
+    data_type: TYPE_UINT8
+    dims: [16, 16, 3]
+  }
+]
+output [
+  {
+    name: "y"
+    data_type: TYPE_UINT8
+    dims: [16, 16]
+  }
+]''', config)
+
+    def test_fused_model_matches_python_steps(self):
+        session = ort.InferenceSession(os.path.join(get_model_path(
+            self.directory, self.config, "fused"), "1", "model.onnx"), providers=["CPUExecutionProvider"])
+        params = rembg_preprocess_initialize(None)
+        images = np.random.default_rng(0).integers(0, 256, (3, 16, 16, 3), dtype=np.uint8)
+        images[1] //= 2
+        mask, = session.run(None, {"x": images})
+
+        # Python steps, each image preprocessed by the per-image implementation
+        expected, = rembg_postprocess_processing(params, [np.concatenate(
+            [legacy_preprocess_processing(params, [image[None]])[0] for image in images])])
+        self.assertEqual(mask.dtype, np.uint8)
+        self.assertLessEqual(np.abs(mask.astype(np.int16) - expected).max(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
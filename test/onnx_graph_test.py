@@ -0,0 +1,172 @@
+import os
+import sys
+import filecmp
+import tempfile
+import unittest
+import onnx
+import numpy as np
+from onnx import helper, numpy_helper, TensorProto
+from build_utils import TRSP_DIRECTORY, build_repository, get_model_path, read_model_config, write_onnx_model
+
+sys.path.append(TRSP_DIRECTORY)
+from _onnx_graph import OnnxModelFile  # noqa: E402
+
+
+def get_tensor_types(model: onnx.ModelProto, key: str) -> list[tuple]:
+    '''
+    Get name, data type and dims of graph inputs or outputs.
+    '''
+    return [
+        (layer.name, layer.type.tensor_type.elem_type,
+         [dim.dim_param or dim.dim_value for dim in layer.type.tensor_type.shape.dim])
+        for layer in getattr(model.graph, key)
+    ]
+
+
+class OnnxGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.directory = self.__directory.name
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def write_model(self, external_data: bool) -> str:
+        '''
+        Write model with a large and a small initializer. Return its path.
+        '''
+        path = os.path.join(self.directory, "dense.onnx")
+        write_onnx_model(path, external_data=external_data, size=64)
+        return path
+
+    def assert_scanned(self, path: str):
+        '''
+        Scanned graph matches the fully loaded model, except initializers.
+        '''
+        onnx_file = OnnxModelFile(path)
+        model = onnx.load(path, load_external_data=False)
+        self.assertEqual(get_tensor_types(onnx_file.model, "input"),
+                         get_tensor_types(model, "input"))
+        self.assertEqual(get_tensor_types(onnx_file.model, "output"),
+                         get_tensor_types(model, "output"))
+        self.assertEqual(list(onnx_file.model.graph.node),
+                         list(model.graph.node))
+        self.assertEqual(onnx_file.get_initializer_names(), {"w", "b"})
+
+        # Output types are inferred from initializer metadata
+        inferred = onnx.shape_inference.infer_shapes(model)
+        self.assertEqual(get_tensor_types(onnx_file.infer_shapes(), "output"),
+                         get_tensor_types(inferred, "output"))
+        return onnx_file
+
+    def assert_saved(self, onnx_file: OnnxModelFile, path: str):
+        '''
+        Saved model equals the source model, with the same initializer bytes.
+        '''
+        saved_path = os.path.join(os.path.dirname(path), "saved.onnx")
+        onnx_file.save(saved_path)
+        saved, model = onnx.load(saved_path), onnx.load(path)
+        self.assertEqual(saved, model)
+        for saved_tensor, tensor in zip(saved.graph.initializer, model.graph.initializer):
+            self.assertEqual(saved_tensor.SerializeToString(),
+                             tensor.SerializeToString())
+
+    def test_inline_model(self):
+        path = self.write_model(external_data=False)
+        onnx_file = self.assert_scanned(path)
+        self.assertEqual(onnx_file.get_external_data_locations(), [])
+        self.assert_saved(onnx_file, path)
+
+    def test_external_data_model(self):
+        path = self.write_model(external_data=True)
+        onnx_file = self.assert_scanned(path)
+        self.assertEqual(onnx_file.get_external_data_locations(), ["dense.data"])
+        self.assert_saved(onnx_file, path)
+
+    def test_patched_batch_dims(self):
+        for external_data in [False, True]:
+            with self.subTest(external_data=external_data):
+                path = self.write_model(external_data)
+                config = {
+                    "model_repository": "models",
+                    "models": {
+                        "dense": {
+                            "engine": "onnx",
+                            "max_batch_size": 8,
+                            "dynamic_batching": True,
+                            "versions": [{"version": 1, "path": "./dense.onnx"}]
+                        }
+                    }
+                }
+                result = build_repository(
+                    self.directory, config, "--rebuild", "True")
+                self.assertEqual(result.returncode, 0,
+                                 result.stdout + result.stderr)
+                version_path = os.path.join(
+                    get_model_path(self.directory, config, "dense"), "1")
+                built_path = os.path.join(version_path, "model.onnx")
+
+                # Only batch dims are patched
+                built, model = onnx.load(built_path), onnx.load(path)
+                self.assertEqual(get_tensor_types(built, "input"),
+                                 [("x", onnx.TensorProto.FLOAT, ["x_dynamic_axes_1", 64])])
+                self.assertEqual(get_tensor_types(built, "output"),
+                                 [("y", onnx.TensorProto.FLOAT, ["y_dynamic_axes_1", 64])])
+                self.assertEqual(list(built.graph.node), list(model.graph.node))
+                self.assertEqual(list(built.graph.initializer),
+                                 list(model.graph.initializer))
+
+                # External data is copied byte for byte
+                if external_data:
+                    self.assertTrue(filecmp.cmp(
+                        os.path.join(self.directory, "dense.data"),
+                        os.path.join(version_path, "dense.data"), shallow=False))
+
+    def test_tensor_dtypes_and_dims(self):
+        # Token ids to embeddings. Output types and shapes are not declared
+        graph = helper.make_graph(
+            [helper.make_node("Gather", ["table", "ids"], ["embeddings"]),
+             helper.make_node("Shape", ["ids"], ["shape"])], "embedding",
+            [helper.make_tensor_value_info("ids", TensorProto.INT64, ["batch", "sequence"])],
+            [helper.make_empty_tensor_value_info("embeddings"),
+             helper.make_empty_tensor_value_info("shape")],
+            [numpy_helper.from_array(np.zeros((10, 4), np.float32), "table")])
+        onnx.save(helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)]),
+                  os.path.join(self.directory, "embedding.onnx"))
+        config = {
+            "model_repository": "models",
+            "models": {
+                "embedding": {
+                    "engine": "onnx",
+                    "max_batch_size": 0,
+                    "versions": [{"version": 1, "path": "./embedding.onnx"}]
+                }
+            }
+        }
+        result = build_repository(self.directory, config)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn('''input [
+  {
+    name: "ids"
+    data_type: TYPE_INT64
+    dims: [-1, -1]
+  }
+]
+output [
+  {
+    name: "embeddings"
+    data_type: TYPE_FP32
+    dims: [-1, -1, 4]
+  }
+]
+output [
+  {
+    name: "shape"
+    data_type: TYPE_INT64
+    dims: [2]
+  }
+]''', read_model_config(self.directory, config, "embedding"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import onnx
+import numpy as np
+from build_utils import TRSP_DIRECTORY, build_repository, get_model_path, write_onnx_model
+
+sys.path.append(TRSP_DIRECTORY)
+import _onnx_runtime  # noqa: E402
+
+
+class OnnxOptimizeTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.directory = self.__directory.name
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def build_model(self, external_data: bool, **optimize) -> tuple[dict, str]:
+        '''
+        Build optimized model. Return configuration and build output.
+        '''
+        write_onnx_model(os.path.join(self.directory, "dense.onnx"),
+                         batch_dim="batch", external_data=external_data)
+        config = {
+            "model_repository": "models",
+            "models": {
+                "dense": {
+                    "engine": "onnx",
+                    "max_batch_size": 0,
+                    "versions": [{"version": 1, "path": "./dense.onnx"}],
+                    "optimize": {"level": "all", **optimize}
+                }
+            }
+        }
+        result = build_repository(self.directory, config)
+        return config, result.stdout + result.stderr
+
+    def assert_optimized(self, external_data: bool, files: list[str]):
+        '''
+        Optimized graph replaces the version model. Outputs match the source model.
+        '''
+        config, output = self.build_model(external_data)
+        self.assertIn("Built model dense ", output)
+        version_path = os.path.join(
+            get_model_path(self.directory, config, "dense"), "1")
+        self.assertEqual(sorted(os.listdir(version_path)), sorted(files))
+
+        # MatMul and Add are fused
+        path = os.path.join(version_path, "model.onnx")
+        op_types = [node.op_type for node in onnx.load(path).graph.node]
+        self.assertNotIn("MatMul", op_types)
+
+        _onnx_runtime.check_model_outputs(
+            os.path.join(self.directory, "dense.onnx"), path, 1e-5)
+
+    def test_inline_model(self):
+        self.assert_optimized(False, ["model.onnx"])
+
+    def test_external_data_model(self):
+        self.assert_optimized(True, ["model.onnx", "model.optimized.data"])
+
+    def test_drift_fails_build(self):
+        source_path = os.path.join(self.directory, "dense.onnx")
+        path = os.path.join(self.directory, "other.onnx")
+        write_onnx_model(source_path)
+        write_onnx_model(path, seed=1)
+        with self.assertRaisesRegex(ValueError, "Output y drifts past tolerance"):
+            _onnx_runtime.check_model_outputs(source_path, path, 1e-3)
+
+        # Build fails on drift. Source model is left unchanged
+        def check_model_outputs(*args):
+            raise ValueError("Output y drifts past tolerance 0.")
+
+        version_path = os.path.join(self.directory, "1")
+        os.makedirs(version_path)
+        shutil.copyfile(source_path, os.path.join(version_path, "model.onnx"))
+        with mock.patch.object(_onnx_runtime, "check_model_outputs", check_model_outputs):
+            with self.assertRaisesRegex(ValueError, "drifts past tolerance"):
+                _onnx_runtime.optimize_model(os.path.join(
+                    version_path, "model.onnx"), {"level": "basic"})
+        self.assertEqual(os.listdir(version_path), ["model.onnx"])
+        self.assertEqual(onnx.load(os.path.join(version_path, "model.onnx")),
+                         onnx.load(source_path))
+
+    def test_invalid_tolerance(self):
+        _, output = self.build_model(False, tolerance=-1)
+        self.assertIn("Model `optimize` tolerance must be a non-negative number", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+import onnx
+from build_utils import build_repository, get_model_path, write_onnx_model
+
+
+class OnnxQuantizeTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.directory = self.__directory.name
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def build_model(self, mode: str, external_data: bool) -> dict:
+        '''
+        Build quantized version 2 of model version 1. Return configuration.
+        '''
+        write_onnx_model(os.path.join(self.directory, "dense.onnx"),
+                         external_data=external_data)
+        config = {
+            "model_repository": "models",
+            "models": {
+                "dense": {
+                    "engine": "onnx",
+                    "max_batch_size": 0,
+                    "versions": [{"version": 1, "path": "./dense.onnx"}],
+                    "quantize": {"mode": mode}
+                }
+            }
+        }
+        result = build_repository(self.directory, config, "--rebuild", "True")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn("Quantized model", result.stdout)
+        return config
+
+    def assert_version_files(self, config: dict, files: list[str]):
+        '''
+        Quantized version directory contains only files, and its model loads with its weights.
+        '''
+        version_path = os.path.join(get_model_path(
+            self.directory, config, "dense"), "2")
+        self.assertEqual(sorted(os.listdir(version_path)), sorted(files))
+        onnx.load(os.path.join(version_path, "model.onnx"))
+
+    def test_external_data_is_renamed(self):
+        for mode in ["dynamic", "fp16"]:
+            with self.subTest(mode=mode):
+                for _ in range(2):
+                    config = self.build_model(mode, external_data=True)
+                    self.assert_version_files(
+                        config, ["model.onnx", "model.quantized.data"])
+
+    def test_stale_external_data_is_removed(self):
+        self.build_model("dynamic", external_data=True)
+        config = self.build_model("dynamic", external_data=False)
+        self.assert_version_files(config, ["model.onnx"])
+
+
+if __name__ == '__main__':
+    unittest.main()
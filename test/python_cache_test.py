@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from build_utils import build_repository, get_model_path, write_module, load_python_model, execute, get_output, Request, Logger
+
+
+MODULE = '''
+def execute(params, inputs):
+    return [inputs[0] + 1]
+
+
+async def execute_async(params, inputs):
+    return [inputs[0] + 1]
+'''
+
+
+class PythonCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.directory = self.__directory.name
+        write_module(self.directory, "steps", MODULE)
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def build_model(self, module: dict):
+        '''
+        Build model of module with `cache: {}` and load it.
+        '''
+        config = {
+            "model_repository": "models",
+            "models": {
+                "cached": {
+                    "engine": "python",
+                    "max_batch_size": 0,
+                    "versions": [{"version": 1, "module": {"path": "./steps.py", "cache": {}, **module}}],
+                    "tensor": {"input": [{"dims": [2], "dtype": "float32"}], "output": [{"dims": [2], "dtype": "float32"}]}
+                }
+            }
+        }
+        result = build_repository(self.directory, config)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        return load_python_model(os.path.join(get_model_path(self.directory, config, "cached"), "1"))
+
+    def assert_cache_hit(self, model):
+        '''
+        Repeated input is a hit. Counters are logged on finalize.
+        '''
+        for _ in range(2):
+            responses = execute(
+                model, [Request({"cached_input_1": np.ones(2, np.float32)})])
+            np.testing.assert_array_equal(
+                get_output(responses[0], "cached_output_1"), [2, 2])
+        self.assertEqual((model.cache.hits, model.cache.misses), (1, 1))
+
+        Logger.messages.clear()
+        model.finalize()
+        self.assertIn("Cache hits: 1, misses: 1", Logger.messages)
+
+    def test_empty_cache_uses_defaults(self):
+        model = self.build_model({"execute": "execute"})
+        self.assertEqual(model.cache.max_entries, 1024)
+        self.assert_cache_hit(model)
+
+    def test_empty_cache_async(self):
+        self.assert_cache_hit(self.build_model({"execute": "execute_async"}))
+
+    def test_empty_cache_processes(self):
+        self.assert_cache_hit(self.build_model(
+            {"execute": "execute", "parallelism": {"processes": 2}}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from build_utils import build_repository, get_model_path, read_model_config, write_module, load_python_model, execute, get_output, Request
+
+
+MODULE = '''
+def initialize(args):
+    return 10
+
+
+def add(params, inputs):
+    return [inputs[0] + 1, inputs[0] * 0]
+
+
+def multiply(params, inputs):
+    return [inputs[0] * params]
+
+
+def combine(params, inputs):
+    return [inputs[0] + inputs[1]]
+'''
+
+
+def get_step_model(execute: str, inputs: int, outputs: int, **module) -> dict:
+    '''
+    Get python step model of module function.
+    '''
+    return {
+        "engine": "python",
+        "max_batch_size": 8,
+        "versions": [{"version": 1, "module": {"path": "./steps.py", "execute": execute, **module}}],
+        "tensor": {
+            "input": [{"dims": [2], "dtype": "float32"}] * inputs,
+            "output": [{"dims": [2], "dtype": "float32"}] * outputs
+        }
+    }
+
+
+class PythonFuseTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.directory = self.__directory.name
+        write_module(self.directory, "steps", MODULE)
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def build_ensemble(self, multiply_module: dict = None) -> dict:
+        '''
+        Build ensemble of add, multiply and combine steps with fused python steps.
+        '''
+        config = {
+            "model_repository": "models",
+            "models": {
+                "add": get_step_model("add", 1, 2),
+                "multiply": get_step_model("multiply", 1, 1, initialize="initialize", **(multiply_module or {})),
+                "combine": get_step_model("combine", 2, 1),
+                "pipeline": {
+                    "engine": "ensemble",
+                    "max_batch_size": 8,
+                    "fuse_python_steps": True,
+                    "steps": [
+                        {"model": "add", "version": "latest"},
+                        {"model": "multiply", "version": "latest"},
+                        {"model": "combine", "version": "latest",
+                         "input_map": {"combine_input_2": "add_output_map_1"}}
+                    ]
+                }
+            }
+        }
+        result = build_repository(self.directory, config)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        return config
+
+    def test_adjacent_steps_are_fused(self):
+        config = self.build_ensemble()
+        pbtxt = read_model_config(self.directory, config, "pipeline")
+        self.assertEqual(pbtxt.count("model_name:"), 1)
+        self.assertIn('model_name: "pipeline_fused_1"', pbtxt)
+
+        # Fused model chains execute functions in process: 10 * (x + 1) + (x + 1)
+        model = load_python_model(os.path.join(
+            get_model_path(self.directory, config, "pipeline_fused_1"), "1"))
+        responses = execute(model, [
+            Request({"pipeline_fused_1_input_1": np.array([[1, 2]], np.float32)}),
+            Request({"pipeline_fused_1_input_1": np.array([[0, 0], [3, 3]], np.float32)})
+        ])
+        np.testing.assert_array_equal(get_output(
+            responses[0], "pipeline_fused_1_output_1"), [[22, 33]])
+        np.testing.assert_array_equal(get_output(
+            responses[1], "pipeline_fused_1_output_1"), [[11, 11], [44, 44]])
+
+    def test_step_with_parallelism_is_not_fused(self):
+        config = self.build_ensemble({"parallelism": {"threads": 2}})
+        pbtxt = read_model_config(self.directory, config, "pipeline")
+        self.assertIn('model_name: "multiply"', pbtxt)
+        self.assertNotIn('model_name: "pipeline_fused_', pbtxt)
+        self.assertFalse(os.path.exists(get_model_path(
+            self.directory, config, "pipeline_fused_1")))
+
+
+if __name__ == '__main__':
+    unittest.main()
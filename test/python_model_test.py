@@ -0,0 +1,166 @@
+import os
+import time
+import inspect
+import tempfile
+import unittest
+import numpy as np
+from build_utils import build_repository, get_model_path, read_model_config, write_module, load_python_model, execute, get_output, Request
+
+
+MODULE = '''
+import time
+import asyncio
+
+
+def execute_batch(params, inputs):
+    # Add size of the whole batch
+    return [inputs[0] + inputs[0].shape[0]]
+
+
+def execute_slow(params, inputs):
+    time.sleep(0.2)
+    return [inputs[0] * 2]
+
+
+async def execute_async(params, inputs):
+    await asyncio.sleep(0.2)
+    return [inputs[0] * 2]
+
+
+def execute_stream(params, inputs):
+    for i in range(2):
+        yield [inputs[0] + i]
+
+
+async def execute_stream_async(params, inputs):
+    for i in range(2):
+        await asyncio.sleep(0)
+        yield [inputs[0] + i]
+
+
+def execute_error(params, inputs):
+    raise ValueError("Invalid input.")
+    yield
+'''
+
+
+class PythonModelTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.directory = self.__directory.name
+        write_module(self.directory, "steps", MODULE)
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def build_model(self, module: dict, **model) -> tuple[dict, object]:
+        '''
+        Build python model of module and load it. Return configuration and model.
+        '''
+        config = {
+            "model_repository": "models",
+            "models": {
+                "step": {
+                    "engine": "python",
+                    "max_batch_size": 0,
+                    **model,
+                    "versions": [{"version": 1, "module": {"path": "./steps.py", **module}}],
+                    "tensor": {"input": [{"dims": [2], "dtype": "float32"}], "output": [{"dims": [2], "dtype": "float32"}]}
+                }
+            }
+        }
+        result = build_repository(self.directory, config)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        return config, load_python_model(os.path.join(get_model_path(self.directory, config, "step"), "1"))
+
+    def requests(self, count: int) -> list[Request]:
+        return [Request({"step_input_1": np.full(2, i, np.float32)}) for i in range(count)]
+
+    def assert_concurrent(self, model, count: int = 4):
+        '''
+        Requests of slow execute run concurrently. Responses keep the order of requests.
+        '''
+        start = time.perf_counter()
+        responses = execute(model, self.requests(count))
+        self.assertLess(time.perf_counter() - start, 0.2 * count / 2)
+        for i, response in enumerate(responses):
+            np.testing.assert_array_equal(
+                get_output(response, "step_output_1"), [i * 2, i * 2])
+
+    def test_batched_execute(self):
+        _, model = self.build_model(
+            {"execute": "execute_batch", "batched": True}, max_batch_size=8, dynamic_batching=True)
+        requests = [
+            Request({"step_input_1": np.zeros((1, 2), np.float32)}),
+            Request({"step_input_1": np.ones((3, 2), np.float32)})
+        ]
+        responses = execute(model, requests)
+
+        # Execute is called once with 4 samples. Outputs are split by batch size
+        np.testing.assert_array_equal(
+            get_output(responses[0], "step_output_1"), np.full((1, 2), 4))
+        np.testing.assert_array_equal(
+            get_output(responses[1], "step_output_1"), np.full((3, 2), 5))
+
+    def test_batched_requires_max_batch_size(self):
+        config = {
+            "model_repository": "models",
+            "models": {
+                "step": {
+                    "engine": "python",
+                    "max_batch_size": 0,
+                    "versions": [{"version": 1, "module": {"path": "./steps.py", "execute": "execute_batch", "batched": True}}],
+                    "tensor": {"input": [{"dims": [2], "dtype": "float32"}], "output": [{"dims": [2], "dtype": "float32"}]}
+                }
+            }
+        }
+        result = build_repository(self.directory, config)
+        self.assertIn("Model `batched` module requires `max_batch_size` greater than 0: step.",
+                      result.stdout + result.stderr)
+
+    def test_threads(self):
+        _, model = self.build_model(
+            {"execute": "execute_slow", "parallelism": {"threads": 4}})
+        self.assert_concurrent(model)
+
+        # Thread pool is shut down on finalize
+        model.finalize()
+        with self.assertRaises(RuntimeError):
+            model.executor.submit(print)
+
+    def test_async(self):
+        _, model = self.build_model({"execute": "execute_async"})
+        self.assertTrue(inspect.iscoroutinefunction(model.execute))
+        self.assert_concurrent(model)
+
+    def test_decoupled(self):
+        for name in ["execute_stream", "execute_stream_async"]:
+            with self.subTest(execute=name):
+                config, model = self.build_model(
+                    {"execute": name}, decoupled=True)
+                self.assertIn("model_transaction_policy {\n  decoupled: true\n}",
+                              read_model_config(self.directory, config, "step"))
+
+                # Each yielded outputs is a partial response, then the final flag
+                requests = self.requests(2)
+                self.assertIsNone(execute(model, requests))
+                for i, request in enumerate(requests):
+                    self.assertEqual([flags for _, flags in request.sent], [0, 0, 1])
+                    for j, (response, _) in enumerate(request.sent[:2]):
+                        np.testing.assert_array_equal(
+                            get_output(response, "step_output_1"), [i + j, i + j])
+                    self.assertIsNone(request.sent[2][0])
+
+    def test_decoupled_error(self):
+        _, model = self.build_model(
+            {"execute": "execute_error"}, decoupled=True)
+        request = self.requests(1)[0]
+        execute(model, [request])
+        response, flags = request.sent[0]
+        self.assertEqual(flags, 1)
+        self.assertEqual(response.error().message(),
+                         "ValueError: Invalid input.")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import os
+import sys
+import tempfile
+import unittest
+import numpy as np
+from multiprocessing.shared_memory import SharedMemory
+from build_utils import build_repository, get_model_path, write_module, load_python_model, execute, get_output, Request
+
+
+MODULE = '''
+def execute(params, inputs):
+    return [inputs[0] * 2]
+'''
+
+
+class PythonProcessesTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.directory = self.__directory.name
+        write_module(self.directory, "steps", MODULE)
+        self.config = {
+            "model_repository": "models",
+            "models": {
+                "double": {
+                    "engine": "python",
+                    "max_batch_size": 0,
+                    "versions": [{"version": 1, "module": {
+                        "path": "./steps.py", "execute": "execute", "parallelism": {"processes": 2}}}],
+                    "tensor": {"input": [{"dims": [2], "dtype": "float32"}], "output": [{"dims": [2], "dtype": "float32"}]}
+                }
+            }
+        }
+        result = build_repository(self.directory, self.config)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.model = load_python_model(os.path.join(
+            get_model_path(self.directory, self.config, "double"), "1"))
+
+    def tearDown(self):
+        self.model.finalize()
+        self.__directory.cleanup()
+
+    def requests(self, count: int) -> list[Request]:
+        return [Request({"double_input_1": np.full(2, i, np.float32)}) for i in range(count)]
+
+    def test_more_requests_than_workers(self):
+        responses = execute(self.model, self.requests(9))
+        for i, response in enumerate(responses):
+            np.testing.assert_array_equal(
+                get_output(response, "double_output_1"), [i * 2, i * 2])
+
+    def test_dead_worker_is_respawned(self):
+        process, _ = self.model.workers[0]
+        process.kill()
+        process.join()
+
+        # Only the request of the dead worker fails
+        responses = execute(self.model, self.requests(2))
+        self.assertTrue(responses[0].has_error())
+        self.assertIn("Worker process died", responses[0].error().message())
+        np.testing.assert_array_equal(
+            get_output(responses[1], "double_output_1"), [2, 2])
+
+        # Respawned worker serves later requests
+        self.assertTrue(self.model.workers[0][0].is_alive())
+        responses = execute(self.model, self.requests(2))
+        for i, response in enumerate(responses):
+            np.testing.assert_array_equal(
+                get_output(response, "double_output_1"), [i * 2, i * 2])
+
+    def test_outputs_are_unlinked_on_error(self):
+        module = sys.modules[type(self.model).__module__]
+        first, first_metadata = module._to_shared_memory(np.ones(2))
+        last, last_metadata = module._to_shared_memory(np.ones(2))
+        first.close()
+        last.close()
+
+        missing_metadata = ("shared_memory", "trsp_missing_block", (2,), "<f8")
+        with self.assertRaises(FileNotFoundError):
+            module._collect_shared_memory_outputs(
+                [first_metadata, missing_metadata, last_metadata])
+        for metadata in [first_metadata, last_metadata]:
+            with self.assertRaises(FileNotFoundError):
+                SharedMemory(name=metadata[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
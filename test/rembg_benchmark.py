@@ -0,0 +1,100 @@
+import os
+import sys
+import timeit
+import argparse
+import numpy as np
+
+# Import processing modules from resources
+sys.path.append(os.path.join(os.path.dirname(
+    os.path.abspath(__file__)), "..", "resources"))
+from rembg_preprocess import rembg_preprocess_initialize, rembg_preprocess_processing  # noqa: E402
+from rembg_postprocess import rembg_postprocess_processing  # noqa: E402
+
+
+parser = argparse.ArgumentParser(
+    description='Rembg Pre/Post-processing Micro-benchmark')
+
+
+def legacy_preprocess_processing(args, inputs):
+    # Previous implementation. Float64 temporaries for each step.
+    img = inputs[0]
+    img = img / np.max(img)
+    img[:, :, :, 0] = (img[:, :, :, 0] - args['mean'][0]) / args['std'][0]
+    img[:, :, :, 1] = (img[:, :, :, 1] - args['mean'][1]) / args['std'][1]
+    img[:, :, :, 2] = (img[:, :, :, 2] - args['mean'][2]) / args['std'][2]
+    img = img.transpose((0, 3, 1, 2))
+    return (img.astype(np.float32),)
+
+
+def legacy_postprocess_processing(args, inputs):
+    # Previous implementation. Global min/max across the whole batch.
+    mask = inputs[0]
+    mask = mask[:, 0, :, :]
+    mask_max = np.max(mask)
+    mask_min = np.min(mask)
+    mask = (mask - mask_min) / (mask_max - mask_min)
+    mask = np.squeeze(mask) * 255
+    mask = mask.astype("uint8")
+    return (mask,)
+
+
+def benchmark(name, func, args, inputs, number):
+    seconds = timeit.timeit(lambda: func(args, inputs), number=number)
+    milliseconds = seconds / number * 1000
+    print(f"{name:<32} {milliseconds:8.3f} ms")
+    return milliseconds
+
+
+def main():
+    # Add arguments
+    parser.add_argument('--number', type=int, default=50,
+                        help='Number of runs of each function')
+    parser.add_argument('--size', type=int, default=320,
+                        help='Height and width of images')
+
+    # Parse arguments
+    args = parser.parse_args()
+
+    params = rembg_preprocess_initialize(None)
+    rng = np.random.default_rng(0)
+
+    for batch_size in [1, 8]:
+        print(f"Preprocess. Batch size: {batch_size}")
+        inputs = [rng.integers(
+            0, 256, (batch_size, args.size, args.size, 3), dtype=np.uint8)]
+
+        # Results of both implementation must be equal
+        # Legacy implementation normalize by max of the whole batch
+        if batch_size == 1:
+            np.testing.assert_allclose(
+                rembg_preprocess_processing(params, inputs)[0],
+                legacy_preprocess_processing(params, inputs)[0],
+                rtol=1e-5, atol=1e-5)
+
+        legacy = benchmark("legacy", legacy_preprocess_processing,
+                           params, inputs, args.number)
+        fused = benchmark("rembg_preprocess_processing", rembg_preprocess_processing,
+                          params, inputs, args.number)
+        print(f"Speedup: {legacy / fused:.2f}x\n")
+
+    for batch_size in [1, 8]:
+        print(f"Postprocess. Batch size: {batch_size}")
+        inputs = [rng.random(
+            (batch_size, 1, args.size, args.size), dtype=np.float32)]
+
+        # Legacy implementation squeeze the batch axis
+        if batch_size == 1:
+            np.testing.assert_allclose(
+                rembg_postprocess_processing(params, inputs)[0][0],
+                legacy_postprocess_processing(params, inputs)[0],
+                atol=1)
+
+        legacy = benchmark("legacy", legacy_postprocess_processing,
+                           params, inputs, args.number)
+        vectorized = benchmark("rembg_postprocess_processing", rembg_postprocess_processing,
+                               params, inputs, args.number)
+        print(f"Speedup: {legacy / vectorized:.2f}x\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,166 @@
+import os
+import tempfile
+import unittest
+from io import BytesIO
+import numpy as np
+from PIL import Image
+from build_utils import build_repository, get_model_path, read_model_config, load_python_model, execute, get_output, Request
+from rembg_benchmark import legacy_preprocess_processing, legacy_postprocess_processing
+from rembg_preprocess import rembg_preprocess_initialize, rembg_preprocess_processing, rembg_preprocess_tiled_initialize, rembg_preprocess_tiled_processing
+from rembg_postprocess import rembg_postprocess_processing, rembg_postprocess_tiled_processing
+
+
+# Resources directory of rembg processing modules
+RESOURCES_DIRECTORY = os.path.join(os.path.dirname(
+    os.path.dirname(os.path.abspath(__file__))), "resources")
+
+
+def encode_image(image: np.ndarray, format: str = "PNG") -> bytes:
+    buffer = BytesIO()
+    Image.fromarray(image).save(buffer, format=format)
+    return buffer.getvalue()
+
+
+class RembgProcessingTest(unittest.TestCase):
+    def setUp(self):
+        self.params = rembg_preprocess_initialize(None)
+        self.rng = np.random.default_rng(0)
+
+    def test_preprocess_matches_legacy(self):
+        images = self.rng.integers(0, 256, (4, 32, 24, 3), dtype=np.uint8)
+        # Each image has its own max
+        images[1] //= 2
+        inputs = [images.copy()]
+        output, = rembg_preprocess_processing(self.params, inputs)
+        self.assertEqual(output.dtype, np.float32)
+        self.assertEqual(output.shape, (4, 3, 32, 24))
+        np.testing.assert_array_equal(inputs[0], images)
+
+        # Legacy implementation normalizes by max of the whole batch. Compare each image
+        for i in range(len(images)):
+            np.testing.assert_allclose(
+                output[i:i+1], legacy_preprocess_processing(self.params, [images[i:i+1]])[0],
+                rtol=1e-5, atol=1e-5)
+
+    def test_preprocess_black_image(self):
+        images = np.zeros((2, 8, 8, 3), dtype=np.uint8)
+        output, = rembg_preprocess_processing(self.params, [images])
+        expected = -self.params["mean"] / self.params["std"]
+        np.testing.assert_allclose(output, np.broadcast_to(
+            expected[None, :, None, None], output.shape), rtol=1e-6)
+
+    def test_postprocess_matches_legacy(self):
+        masks = self.rng.random((4, 1, 32, 24), dtype=np.float32)
+        # Each mask has its own range
+        masks[1] = masks[1] * 0.5 + 0.25
+        output, = rembg_postprocess_processing(self.params, [masks])
+        self.assertEqual(output.dtype, np.uint8)
+        self.assertEqual(output.shape, (4, 32, 24))
+
+        # Legacy implementation normalizes by range of the whole batch. Compare each mask
+        for i in range(len(masks)):
+            expected = legacy_postprocess_processing(self.params, [masks[i:i+1]])[0]
+            self.assertLessEqual(
+                np.abs(output[i].astype(np.int16) - expected).max(), 1)
+            self.assertEqual((output[i].min(), output[i].max()), (0, 255))
+
+    def test_postprocess_constant_mask(self):
+        masks = np.full((2, 1, 8, 8), 0.5, dtype=np.float32)
+        with np.errstate(all="raise"):
+            output, = rembg_postprocess_processing(self.params, [masks])
+        np.testing.assert_array_equal(output, np.zeros((2, 8, 8), np.uint8))
+
+    def test_encoded_models(self):
+        config = {
+            "model_repository": "models",
+            "models": {
+                "pre": {
+                    "engine": "python",
+                    "max_batch_size": 8,
+                    "dynamic_batching": True,
+                    "versions": [{"version": 1, "module": {
+                        "path": os.path.join(RESOURCES_DIRECTORY, "rembg_preprocess.py"),
+                        "execute": "rembg_preprocess_encoded_processing",
+                        "initialize": "rembg_preprocess_initialize", "batched": True}}],
+                    "tensor": {"input": [{"dims": [1], "dtype": "string"}],
+                               "output": [{"dims": [3, 320, 320], "dtype": "float32"}, {"dims": [2], "dtype": "int32"}]}
+                },
+                "post": {
+                    "engine": "python",
+                    "max_batch_size": 8,
+                    "dynamic_batching": True,
+                    "versions": [{"version": 1, "module": {
+                        "path": os.path.join(RESOURCES_DIRECTORY, "rembg_postprocess.py"),
+                        "execute": "rembg_postprocess_encoded_processing", "batched": True}}],
+                    "tensor": {"input": [{"dims": [1, 320, 320], "dtype": "float32"}, {"dims": [2], "dtype": "int32"}],
+                               "output": [{"dims": [1], "dtype": "string"}]}
+                }
+            }
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            result = build_repository(directory, config)
+            self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+            self.assertIn("data_type: TYPE_STRING", read_model_config(directory, config, "pre"))
+            self.assertIn("data_type: TYPE_STRING", read_model_config(directory, config, "post"))
+            pre, post = [load_python_model(os.path.join(get_model_path(directory, config, name), "1"))
+                         for name in ["pre", "post"]]
+
+            # Requests of JPEG and PNG images with different sizes, in one batch
+            images = [self.rng.integers(0, 256, (240, 400, 3), dtype=np.uint8),
+                      self.rng.integers(0, 256, (500, 300, 3), dtype=np.uint8)]
+            requests = [Request({"pre_input_1": np.array([[encode_image(image, format)]], dtype=np.object_)})
+                        for image, format in zip(images, ["JPEG", "PNG"])]
+            responses = execute(pre, requests)
+            for image, response in zip(images, responses):
+                self.assertEqual(get_output(response, "pre_output_1").shape, (1, 3, 320, 320))
+                np.testing.assert_array_equal(get_output(response, "pre_output_2"), [image.shape[:2]])
+
+            # Masks are PNG images at original resolution
+            requests = [Request({"post_input_1": get_output(response, "pre_output_1")[:, :1],
+                                 "post_input_2": get_output(response, "pre_output_2")})
+                        for response in responses]
+            for image, response in zip(images, execute(post, requests)):
+                encoded_mask = get_output(response, "post_output_1")
+                self.assertEqual(encoded_mask.shape, (1, 1))
+                mask = Image.open(BytesIO(encoded_mask[0, 0]))
+                self.assertEqual((mask.format, mask.mode, mask.height, mask.width),
+                                 ("PNG", "L", *image.shape[:2]))
+
+    def test_tiled_processing(self):
+        params = rembg_preprocess_tiled_initialize(None)
+        image = self.rng.integers(0, 256, (600, 800, 3), dtype=np.uint8)
+        inputs = [np.array([encode_image(image)], dtype=np.object_)]
+        tiles, offsets, sizes = rembg_preprocess_tiled_processing(params, inputs)
+
+        # Overlapping tiles cover the image, which is small enough to keep its size
+        np.testing.assert_array_equal(sizes, [600, 800, 600, 800])
+        self.assertEqual(tiles.shape, (9, 3, 320, 320))
+        self.assertEqual(sorted({y for y, _ in offsets}), [0, 140, 280])
+        self.assertEqual(sorted({x for _, x in offsets}), [0, 240, 480])
+        img, = rembg_preprocess_processing(params, [image[None]])
+        for tile, (y, x) in zip(tiles, offsets):
+            np.testing.assert_array_equal(tile, img[0, :, y:y+320, x:x+320])
+
+        # Blended masks of tiles equal the mask of the whole image
+        output, = rembg_postprocess_tiled_processing(params, [tiles[:, :1], offsets, sizes])
+        mask = np.asarray(Image.open(BytesIO(output[0])))
+        expected, = rembg_postprocess_processing(params, [img[:, :1]])
+        self.assertLessEqual(np.abs(mask.astype(np.int16) - expected[0]).max(), 1)
+
+    def test_tiled_large_image(self):
+        params = rembg_preprocess_tiled_initialize(None)
+        image = self.rng.integers(0, 256, (1000, 2000, 3), dtype=np.uint8)
+        tiles, offsets, sizes = rembg_preprocess_tiled_processing(
+            params, [np.array([encode_image(image)], dtype=np.object_)])
+
+        # Downscaled to at most 4 tiles per side
+        np.testing.assert_array_equal(sizes, [1000, 2000, 544, 1088])
+        self.assertEqual(len(tiles), 2 * 4)
+
+        # Mask is resized to original resolution
+        output, = rembg_postprocess_tiled_processing(params, [tiles[:, :1], offsets, sizes])
+        self.assertEqual(Image.open(BytesIO(output[0])).size, (2000, 1000))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -41,7 +41,7 @@ class RembgModuleTest(unittest.TestCase):
         )
         # Get response image
         response_mask = query_response.as_numpy('rembg_output_1')
-        response_img = Image.fromarray(response_mask).resize(pil_image.size)
+        response_img = Image.fromarray(response_mask[0]).resize(pil_image.size)
 
         # Cutout image
         empty_img = Image.new("RGBA", (pil_image.size), 0)
@@ -53,7 +53,73 @@ class RembgModuleTest(unittest.TestCase):
         # Implement test
         self.assertEqual(
             response_mask.shape,
-            (320, 320),
-            "Response image shape is not correct. Expected: (320, 320), Got: " + str(
+            (1, 320, 320),
+            "Response image shape is not correct. Expected: (1, 320, 320), Got: " + str(
                 response_mask.shape)
         )
+
+    def test_remove_background_encoded(self):
+        # Get encoded image from url
+        image_url = "https://img.freepik.com/photos-gratuite/bouchent-portrait-beau-jeune-homme-confiant-t-shirt-blanc-nature-exterieure-floue_176420-6301.jpg?size=626&ext=jpg&ga=GA1.1.1788068356.1706486400&semt=ais"
+        encoded_image = requests.get(image_url).content
+        pil_image = Image.open(BytesIO(encoded_image))
+
+        # Encoded bytes with batch_size axis
+        np_image = np.array([[encoded_image]], dtype=np.object_)
+
+        # Inputs data
+        inputs = [
+            httpclient.InferInput(
+                'rembg_encoded_input_1', np_image.shape, "BYTES"),
+        ]
+        inputs[0].set_data_from_numpy(np_image)
+
+        # Request to triton server
+        query_response = self.__triton_client.infer(
+            model_name="rembg_encoded",
+            inputs=inputs
+        )
+        # Get response PNG mask
+        response_mask = query_response.as_numpy('rembg_encoded_output_1')
+        response_img = Image.open(BytesIO(response_mask[0][0]))
+
+        # Implement test
+        self.assertEqual(
+            response_img.size,
+            pil_image.size,
+            "Response mask size is not correct. Expected: " + str(
+                pil_image.size) + ", Got: " + str(response_img.size)
+        )
+
+    def test_remove_background_tiled(self):
+        # Get encoded image from url
+        image_url = "https://img.freepik.com/photos-gratuite/bouchent-portrait-beau-jeune-homme-confiant-t-shirt-blanc-nature-exterieure-floue_176420-6301.jpg?size=626&ext=jpg&ga=GA1.1.1788068356.1706486400&semt=ais"
+        encoded_image = requests.get(image_url).content
+        pil_image = Image.open(BytesIO(encoded_image))
+
+        # Single encoded image. Tiled ensemble has no batch_size axis
+        np_image = np.array([encoded_image], dtype=np.object_)
+
+        # Inputs data
+        inputs = [
+            httpclient.InferInput(
+                'rembg_tiled_input_1', np_image.shape, "BYTES"),
+        ]
+        inputs[0].set_data_from_numpy(np_image)
+
+        # Request to triton server
+        query_response = self.__triton_client.infer(
+            model_name="rembg_tiled",
+            inputs=inputs
+        )
+        # Get response PNG mask
+        response_mask = query_response.as_numpy('rembg_tiled_output_1')
+        response_img = Image.open(BytesIO(response_mask[0]))
+
+        # Implement test
+        self.assertEqual(
+            response_img.size,
+            pil_image.size,
+            "Response mask size is not correct. Expected: " + str(
+                pil_image.size) + ", Got: " + str(response_img.size)
+        )
@@ -3,6 +3,22 @@ import unittest
 
 # Import test modules
 from rembg_test import RembgModuleTest
+from python_processes_test import PythonProcessesTest
+from python_cache_test import PythonCacheTest
+from build_manifest_test import BuildManifestTest
+from ensemble_graph_test import EnsembleGraphTest
+from python_fuse_test import PythonFuseTest
+from bls_test import BlsTest
+from sequence_batching_test import SequenceBatchingTest
+from onnx_quantize_test import OnnxQuantizeTest
+from onnx_graph_test import OnnxGraphTest
+from onnx_optimize_test import OnnxOptimizeTest
+from tune_test import TuneTest
+from python_model_test import PythonModelTest
+from model_config_test import ModelConfigTest
+from build_jobs_test import BuildJobsTest
+from rembg_processing_test import RembgProcessingTest
+from onnx_fuse_test import OnnxFuseTest
 
 
 parser = argparse.ArgumentParser(description='Triton Server Deployment Test')
@@ -18,10 +34,33 @@ def main():
     # Parse arguments
     args = parser.parse_args()
 
-    # Assign arguments to test modules
+    # Build tests run generated models without Triton server
+    loader = unittest.TestLoader()
     suite = unittest.TestSuite()
+    suite.addTests(loader.loadTestsFromTestCase(PythonProcessesTest))
+    suite.addTests(loader.loadTestsFromTestCase(PythonCacheTest))
+    suite.addTests(loader.loadTestsFromTestCase(BuildManifestTest))
+    suite.addTests(loader.loadTestsFromTestCase(EnsembleGraphTest))
+    suite.addTests(loader.loadTestsFromTestCase(PythonFuseTest))
+    suite.addTests(loader.loadTestsFromTestCase(BlsTest))
+    suite.addTests(loader.loadTestsFromTestCase(SequenceBatchingTest))
+    suite.addTests(loader.loadTestsFromTestCase(OnnxQuantizeTest))
+    suite.addTests(loader.loadTestsFromTestCase(OnnxGraphTest))
+    suite.addTests(loader.loadTestsFromTestCase(OnnxOptimizeTest))
+    suite.addTests(loader.loadTestsFromTestCase(TuneTest))
+    suite.addTests(loader.loadTestsFromTestCase(PythonModelTest))
+    suite.addTests(loader.loadTestsFromTestCase(ModelConfigTest))
+    suite.addTests(loader.loadTestsFromTestCase(BuildJobsTest))
+    suite.addTests(loader.loadTestsFromTestCase(RembgProcessingTest))
+    suite.addTests(loader.loadTestsFromTestCase(OnnxFuseTest))
+
+    # Assign arguments to test modules
     suite.addTest(RembgModuleTest('test_remove_background',
                   host=args.host, port=args.port))
+    suite.addTest(RembgModuleTest('test_remove_background_encoded',
+                  host=args.host, port=args.port))
+    suite.addTest(RembgModuleTest('test_remove_background_tiled',
+                  host=args.host, port=args.port))
 
     # Run tests
     unittest.TextTestRunner().run(suite)
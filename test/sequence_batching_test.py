@@ -0,0 +1,161 @@
+import os
+import time
+import tempfile
+import unittest
+import numpy as np
+import onnx
+from onnx import helper, TensorProto
+from build_utils import build_repository, get_model_path, read_model_config, write_module, load_python_model, execute, get_output, Request
+
+
+MODULE = '''
+def execute(params, inputs, state):
+    # Encode once per sequence, count turns
+    if "features" not in state:
+        state["features"] = inputs[0] * 2
+        state["turns"] = 0
+    state["turns"] += 1
+    return [state["features"] + state["turns"]]
+'''
+
+
+def write_accumulator_model(path: str):
+    '''
+    Write ONNX model which adds input to its state.
+    '''
+    graph = helper.make_graph(
+        [helper.make_node("Add", ["x", "state_in"], ["state_out"]),
+         helper.make_node("Identity", ["state_out"], ["y"])], "accumulator",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, ["batch", 4]),
+         helper.make_tensor_value_info("state_in", TensorProto.FLOAT, ["batch", 4])],
+        [helper.make_tensor_value_info("y", TensorProto.FLOAT, ["batch", 4]),
+         helper.make_tensor_value_info("state_out", TensorProto.FLOAT, ["batch", 4])])
+    onnx.save(helper.make_model(
+        graph, opset_imports=[helper.make_opsetid("", 17)]), path)
+
+
+class SequenceBatchingTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.directory = self.__directory.name
+        write_module(self.directory, "steps", MODULE)
+        write_accumulator_model(os.path.join(
+            self.directory, "accumulator.onnx"))
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def build(self, models: dict) -> tuple[dict, str]:
+        config = {"model_repository": "models", "models": models}
+        result = build_repository(self.directory, config)
+        return config, result.stdout + result.stderr
+
+    def build_python_model(self, **module) -> tuple[dict, str]:
+        return self.build({
+            "vqa": {
+                "engine": "python",
+                "max_batch_size": 0,
+                "sequence_batching": {
+                    "max_sequence_idle_microseconds": 60000000,
+                    "control_input": [
+                        {"name": "START", "kind": "start"},
+                        {"name": "END", "kind": "end", "data_type": "bool"},
+                        {"name": "CORRID", "kind": "corrid", "data_type": "string"}
+                    ]
+                },
+                "versions": [{"version": 1, "module": {"path": "./steps.py", "execute": "execute", **module}}],
+                "tensor": {"input": [{"dims": [-1], "dtype": "float32"}], "output": [{"dims": [-1], "dtype": "float32"}]}
+            }
+        })
+
+    def test_onnx_state_and_oldest_strategy(self):
+        config, output = self.build({
+            "accumulator": {
+                "engine": "onnx",
+                "max_batch_size": 8,
+                "sequence_batching": {
+                    "strategy": "oldest",
+                    "max_candidate_sequences": 4,
+                    "preferred_batch_size": [4],
+                    "control_input": [{"name": "READY", "kind": "ready", "data_type": "float32"}],
+                    "state": [{"input_name": "state_in", "output_name": "state_out", "data_type": "float32",
+                               "dims": [4], "initial_state": {"dims": [4]}}]
+                },
+                "versions": [{"version": 1, "path": "./accumulator.onnx"}]
+            }
+        })
+        self.assertIn("Built model accumulator ", output)
+        pbtxt = read_model_config(self.directory, config, "accumulator")
+
+        # State tensors are not model inputs and outputs. Batch dimension is removed
+        self.assertNotRegex(pbtxt, r'(?m)^\s+name: "state_(in|out)"')
+        self.assertIn('input_name: "state_in"', pbtxt)
+        self.assertIn('output_name: "state_out"', pbtxt)
+        self.assertIn("dims: [4]", pbtxt)
+        self.assertNotIn("dims: [-1, 4]", pbtxt)
+        self.assertIn("zero_data: true", pbtxt)
+        self.assertIn("kind: CONTROL_SEQUENCE_READY", pbtxt)
+        self.assertIn("fp32_false_true: [0, 1]", pbtxt)
+        self.assertIn("oldest {", pbtxt)
+        self.assertIn("max_candidate_sequences: 4", pbtxt)
+
+    def test_python_control_inputs(self):
+        config, output = self.build_python_model()
+        self.assertIn("Built model vqa ", output)
+        pbtxt = read_model_config(self.directory, config, "vqa")
+        self.assertIn("max_sequence_idle_microseconds: 60000000", pbtxt)
+        self.assertIn("int32_false_true: [0, 1]", pbtxt)
+        self.assertIn("bool_false_true: [false, true]", pbtxt)
+        self.assertIn("data_type: TYPE_STRING", pbtxt)
+        self.assertIn("direct {", pbtxt)
+
+    def test_python_state_of_sequences(self):
+        config, _ = self.build_python_model()
+        model = load_python_model(os.path.join(
+            get_model_path(self.directory, config, "vqa"), "1"))
+
+        def request(correlation_id: int, start: bool = False, end: bool = False) -> Request:
+            return Request({
+                "vqa_input_1": np.ones(2, np.float32),
+                "START": np.array([int(start)], np.int32),
+                "END": np.array([end])
+            }, correlation_id)
+
+        def run(requests: list[Request]) -> list[float]:
+            return [float(get_output(response, "vqa_output_1")[0]) for response in execute(model, requests)]
+
+        # State is kept per correlation id
+        self.assertEqual(run([request(1, start=True), request(2, start=True)]), [3, 3])
+        self.assertEqual(run([request(1)]), [4])
+
+        # State is removed after sequence end, and reset on sequence start
+        self.assertEqual(run([request(1, end=True), request(2, start=True)]), [5, 3])
+        self.assertEqual(list(model.sequences.states), [2])
+
+        # Idle sequences are evicted
+        model.sequences.max_idle_seconds = 0
+        time.sleep(0.01)
+        run([request(3, start=True)])
+        self.assertEqual(list(model.sequences.states), [3])
+
+    def test_python_cache_is_rejected(self):
+        _, output = self.build_python_model(cache={})
+        self.assertIn(
+            "Model `sequence_batching` can not be used with `cache` module: vqa.", output)
+
+    def test_dynamic_batching_is_rejected(self):
+        _, output = self.build({
+            "accumulator": {
+                "engine": "onnx",
+                "max_batch_size": 8,
+                "dynamic_batching": True,
+                "sequence_batching": True,
+                "versions": [{"version": 1, "path": "./accumulator.onnx"}]
+            }
+        })
+        self.assertIn(
+            "Model `sequence_batching` can not be used with `dynamic_batching`: accumulator.", output)
+
+
+if __name__ == '__main__':
+    unittest.main()
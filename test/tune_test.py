@@ -0,0 +1,132 @@
+import os
+import sys
+import subprocess
+import tempfile
+import unittest
+import yaml
+from build_utils import TRSP_DIRECTORY, build_repository, get_model_path, write_onnx_model
+
+sys.path.append(TRSP_DIRECTORY)
+from _tune import get_recommendation, apply_recommendation  # noqa: E402
+
+
+# Tune script of `trsp` module
+TUNE_SCRIPT = os.path.join(TRSP_DIRECTORY, "tune.py")
+
+
+def get_measurement(threads: int, batch_size: int, p99: float, throughput: float) -> dict:
+    return {"threads": threads, "instances": 4 // threads, "batch_size": batch_size,
+            "mean": p99 / 2, "p99": p99, "throughput": throughput}
+
+
+class TuneTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.directory = self.__directory.name
+        # Batch dimension is fixed in the source model, as in u2net
+        write_onnx_model(os.path.join(self.directory, "dense.onnx"))
+        self.config = {
+            "model_repository": "models",
+            "models": {
+                "dense": {
+                    "engine": "onnx",
+                    "max_batch_size": 4,
+                    "versions": [{"version": 1, "path": "./dense.onnx"}],
+                    "tune": {"latency_budget_ms": 1000, "batch_sizes": [1, 2, 4],
+                             "thread_counts": [1], "iterations": 2}
+                }
+            }
+        }
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def tune(self, *args: str) -> subprocess.CompletedProcess:
+        '''
+        Run tune script on configuration.
+        '''
+        return subprocess.run(
+            [sys.executable, TUNE_SCRIPT, "-f", "triton_config.yaml", *args],
+            cwd=self.directory, capture_output=True, text=True)
+
+    def build(self):
+        result = build_repository(self.directory, self.config)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+
+    def test_model_must_be_built(self):
+        with open(os.path.join(self.directory, "triton_config.yaml"), "w") as f:
+            yaml.dump(self.config, f, sort_keys=False)
+        result = self.tune()
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("Model dense is not built", result.stdout)
+
+    def test_fixed_batch_dim_is_swept(self):
+        self.build()
+        version_path = os.path.join(get_model_path(
+            self.directory, self.config, "dense"), "1")
+        files = sorted(os.listdir(version_path))
+
+        result = self.tune("-o", "triton_config.tuned.yaml")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        rows = [line.split() for line in result.stdout.splitlines()
+                if line.startswith("  ") and line.split()[0] == "1"]
+        self.assertEqual([row[2] for row in rows], ["1", "2", "4"])
+
+        # Patched copy is removed. Tuned configuration is written to output only
+        self.assertEqual(sorted(os.listdir(version_path)), files)
+        with open(os.path.join(self.directory, "triton_config.tuned.yaml"), "r") as f:
+            tuned = yaml.safe_load(f)["models"]["dense"]
+        self.assertIn(tuned["max_batch_size"], [1, 2, 4])
+        self.assertIn("max_queue_delay_microseconds", tuned["dynamic_batching"])
+        self.assertEqual(tuned["onnxruntime"]["intra_op_thread_count"], 1)
+
+    def test_output_overwrites_configuration(self):
+        self.build()
+        result = self.tune("-o", "triton_config.yaml")
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        self.assertIn("Comments and formatting of triton_config.yaml are not kept.", result.stdout)
+
+    def test_recommendation(self):
+        model_config = {"max_batch_size": 8, "tune": {"latency_budget_ms": 10}}
+        measurements = [
+            get_measurement(1, 1, 2, 100), get_measurement(1, 4, 6, 300),
+            get_measurement(1, 8, 12, 400), get_measurement(2, 4, 4, 300)
+        ]
+        recommendation = get_recommendation(model_config, measurements)
+
+        # Best throughput within budget. Fewer threads on equal throughput
+        self.assertEqual(recommendation["onnxruntime"]["intra_op_thread_count"], 1)
+        self.assertEqual(recommendation["instance_group"], [{"kind": "cpu", "count": 4}])
+        # Largest batch within budget. Queue delay is the rest of the budget
+        self.assertEqual(recommendation["max_batch_size"], 4)
+        self.assertEqual(recommendation["dynamic_batching"], {
+            "max_queue_delay_microseconds": 4000, "preferred_batch_size": [4]})
+
+        with self.assertRaisesRegex(ValueError, "No configuration meets latency budget 1 ms"):
+            get_recommendation({**model_config, "tune": {"latency_budget_ms": 1}}, measurements)
+
+    def test_apply_recommendation(self):
+        recommendation = {
+            "instance_group": [{"kind": "cpu", "count": 2}],
+            "onnxruntime": {"intra_op_thread_count": 2, "inter_op_thread_count": 1},
+            "max_batch_size": 4,
+            "dynamic_batching": {"max_queue_delay_microseconds": 100}
+        }
+        model_config = {
+            "max_batch_size": 1,
+            "max_queue_delay_microseconds": 50,
+            "dynamic_batching": {"preferred_batch_size": [1], "default_priority_level": 1},
+            "instance_group": [{"kind": "gpu", "count": 1}],
+            "onnxruntime": {"graph_optimization_level": 99}
+        }
+        self.assertEqual(apply_recommendation(model_config, recommendation), ["instance_group"])
+        self.assertEqual(model_config, {
+            "max_batch_size": 4,
+            "dynamic_batching": {"default_priority_level": 1, "max_queue_delay_microseconds": 100},
+            "instance_group": [{"kind": "gpu", "count": 1}],
+            "onnxruntime": {"graph_optimization_level": 99, "intra_op_thread_count": 2, "inter_op_thread_count": 1}
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -174,11 +174,25 @@ class InferenceRequest:
     represented as a list of Tensor objects.
     """
 
+    @abstractmethod
+    def __init__(
+        self, model_name: str, inputs: list[Tensor], requested_output_names: list[str],
+        model_version: int = -1) -> None:
+        """Create a Business Logic Scripting (BLS) request to another model
+        in the model repository. Version -1 is the latest version.
+        """
+
     @abstractmethod
     def inputs(self) -> list[Tensor]:
         """Get the input tensors for the request.
         """
 
+    @abstractmethod
+    def correlation_id(self) -> int | str:
+        """Get the correlation id of the sequence of the request. Requests
+        of the same sequence have the same correlation id.
+        """
+
     @abstractmethod
     def set_release_flags(self, release_flags: list[bool]) -> None:
         """Set the release flags for the input tensors. If the release flag
@@ -195,6 +209,13 @@ class InferenceRequest:
         """Execute the request and get the response.
         """
 
+    @abstractmethod
+    async def async_exec(self) -> 'InferenceResponse':
+        """Execute the request asynchronously and get the response. Can only
+        be awaited in an async `execute` function. Several requests can be
+        awaited concurrently, eg: with `asyncio.gather`.
+        """
+
 
 class InferenceResponse:
     """InferenceResponse class represents an inference response in Triton. It
@@ -216,6 +237,32 @@ class InferenceResponse:
         """Get the error for the response.
         """
 
+    @abstractmethod
+    def has_error(self) -> bool:
+        """Check if the response has an error.
+        """
+
+
+class Logger:
+    """Logger class writes messages to the Triton server log. Standard
+    output of the model is not the server log.
+    """
+
+    @staticmethod
+    def log_info(message: str) -> None:
+        """Log message with INFO level.
+        """
+
+    @staticmethod
+    def log_warn(message: str) -> None:
+        """Log message with WARNING level.
+        """
+
+    @staticmethod
+    def log_error(message: str) -> None:
+        """Log message with ERROR level.
+        """
+
 
 class TritonModel:
     """Your Python model must use the same class name. Every Python model
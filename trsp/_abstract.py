@@ -37,6 +37,15 @@ class TritonEnum:
             return f"[{', '.join(self.__get_value(str(value)) for value in self.__value)}]"
         return self.__value
 
+    def __eq__(self, other: Any) -> bool:
+        '''
+        Compare rendered values.
+        '''
+        return isinstance(other, TritonEnum) and str(self) == str(other)
+
+    def __hash__(self) -> int:
+        return hash(str(self))
+
 
 class TensorShapeConfig(TypedDict):
     '''
@@ -60,19 +69,49 @@ class TensorConfig(TypedDict):
     output: List[TensorShapeConfig]
 
 
+class PythonParallelismConfig(TypedDict):
+    '''
+    {
+        "threads": int,
+        "processes": int
+    }
+    '''
+    threads: Optional[int]
+    processes: Optional[int]
+
+
+class PythonCacheConfig(TypedDict):
+    '''
+    {
+        "max_entries": int,
+        "max_bytes": int,
+        "ttl": float
+    }
+    '''
+    max_entries: Optional[int]
+    max_bytes: Optional[int]
+    ttl: Optional[float]
+
+
 class PythonModuleConfig(TypedDict):
     '''
     {
         "path": str,
         "execute": str,
         "initialize": Optional[str],
-        "finalize": Optional[str]
+        "finalize": Optional[str],
+        "batched": Optional[bool],
+        "parallelism": Optional[PythonParallelismConfig],
+        "cache": Optional[PythonCacheConfig]
     }
     '''
     path: str
     execute: str
     initialize: Optional[str]
     finalize: Optional[str]
+    batched: Optional[bool]
+    parallelism: Optional[PythonParallelismConfig]
+    cache: Optional[PythonCacheConfig]
 
 
 class VersionConfig(TypedDict):
@@ -94,13 +133,15 @@ class VersionConfig(TypedDict):
 class InstanceGroupConfig(TypedDict):
     '''
     {
+        "name": str,
         "kind": str,
-        "count": int,
+        "count": Union[int, str],
         "gpus": List[int]
     }
     '''
+    name: Optional[str]
     kind: str
-    count: Optional[int]
+    count: Optional[Union[int, str]]
     gpus: Optional[List[int]]
 
 
@@ -115,6 +156,290 @@ class EnsembleStepConfig(TypedDict):
     '''
     model: str
     version: Union[int, str]
+    input_map: Optional[Dict[str, str]]
+    output_map: Optional[Dict[str, str]]
+
+
+class BlsStepConfig(TypedDict):
+    '''
+    {
+        "model": str,
+        "version": Union[int, str],
+        "input_map": Dict[str, str],
+        "output_map": Dict[str, str],
+        "condition": str,
+        "default": Dict[str, Union[str, int, float]]
+    }
+    '''
+    model: str
+    version: Union[int, str]
+    input_map: Dict[str, str]
+    output_map: Optional[Dict[str, str]]
+    condition: Optional[str]
+    default: Optional[Dict[str, Union[str, int, float]]]
+
+
+class ResponseCacheConfig(TypedDict):
+    '''
+    {
+        "enable": bool
+    }
+    '''
+    enable: bool
+
+
+class FusePreprocessConfig(TypedDict):
+    '''
+    {
+        "dtype": str,
+        "layout": str,
+        "scale": Union[str, float],
+        "mean": List[float],
+        "std": List[float]
+    }
+    '''
+    dtype: Optional[str]
+    layout: Optional[str]
+    scale: Optional[Union[str, float]]
+    mean: Optional[List[float]]
+    std: Optional[List[float]]
+
+
+class FusePostprocessConfig(TypedDict):
+    '''
+    {
+        "output": int,
+        "channel": int,
+        "normalize": str,
+        "scale": float,
+        "dtype": str
+    }
+    '''
+    output: Optional[int]
+    channel: Optional[int]
+    normalize: Optional[str]
+    scale: Optional[float]
+    dtype: Optional[str]
+
+
+class FuseConfig(TypedDict):
+    '''
+    {
+        "pre": FusePreprocessConfig,
+        "post": FusePostprocessConfig
+    }
+    '''
+    pre: Optional[FusePreprocessConfig]
+    post: Optional[FusePostprocessConfig]
+
+
+class OptimizeConfig(TypedDict):
+    '''
+    {
+        "level": str,
+        "tolerance": float
+    }
+    '''
+    level: str
+    tolerance: Optional[float]
+
+
+class QuantizeConfig(TypedDict):
+    '''
+    {
+        "mode": str,
+        "version": int,
+        "source_version": int,
+        "calibration": str
+    }
+    '''
+    mode: str
+    version: Optional[int]
+    source_version: Optional[int]
+    calibration: Optional[str]
+
+
+class OnnxRuntimeConfig(TypedDict):
+    '''
+    {
+        "intra_op_thread_count": Union[int, str],
+        "inter_op_thread_count": int,
+        "execution_mode": str,
+        "graph_optimization_level": str,
+        "enable_mem_arena": bool,
+        "enable_mem_pattern": bool,
+        "memory_arena_shrinkage": bool
+    }
+    '''
+    intra_op_thread_count: Optional[Union[int, str]]
+    inter_op_thread_count: Optional[int]
+    execution_mode: Optional[str]
+    graph_optimization_level: Optional[str]
+    enable_mem_arena: Optional[bool]
+    enable_mem_pattern: Optional[bool]
+    memory_arena_shrinkage: Optional[bool]
+
+
+class TuneConfig(TypedDict):
+    '''
+    {
+        "latency_budget_ms": float,
+        "batch_sizes": List[int],
+        "thread_counts": List[int],
+        "iterations": int,
+        "dims": Dict[str, List[int]]
+    }
+    '''
+    latency_budget_ms: float
+    batch_sizes: Optional[List[int]]
+    thread_counts: Optional[List[int]]
+    iterations: Optional[int]
+    dims: Optional[Dict[str, List[int]]]
+
+
+class WarmupConfig(TypedDict):
+    '''
+    {
+        "batch_sizes": List[int],
+        "data": str,
+        "count": int,
+        "dims": Dict[str, List[int]],
+        "execute": bool
+    }
+    '''
+    batch_sizes: Optional[List[int]]
+    data: Optional[str]
+    count: Optional[int]
+    dims: Optional[Dict[str, List[int]]]
+    execute: Optional[bool]
+
+
+class QueuePolicyConfig(TypedDict):
+    '''
+    {
+        "timeout_action": str,
+        "default_timeout_microseconds": int,
+        "allow_timeout_override": bool,
+        "max_queue_size": int
+    }
+    '''
+    timeout_action: Optional[str]
+    default_timeout_microseconds: Optional[int]
+    allow_timeout_override: Optional[bool]
+    max_queue_size: Optional[int]
+
+
+class DynamicBatchingConfig(TypedDict):
+    '''
+    {
+        "preferred_batch_size": List[int],
+        "max_queue_delay_microseconds": int,
+        "preserve_ordering": bool,
+        "priority_levels": int,
+        "default_priority_level": int,
+        "default_queue_policy": QueuePolicyConfig,
+        "priority_queue_policy": Dict[int, QueuePolicyConfig]
+    }
+    '''
+    preferred_batch_size: Optional[List[int]]
+    max_queue_delay_microseconds: Optional[int]
+    preserve_ordering: Optional[bool]
+    priority_levels: Optional[int]
+    default_priority_level: Optional[int]
+    default_queue_policy: Optional[QueuePolicyConfig]
+    priority_queue_policy: Optional[Dict[int, QueuePolicyConfig]]
+
+
+class SequenceControlInputConfig(TypedDict):
+    '''
+    {
+        "name": str,
+        "kind": str,
+        "data_type": str
+    }
+    '''
+    name: str
+    kind: str
+    data_type: Optional[str]
+
+
+class SequenceInitialStateConfig(TypedDict):
+    '''
+    {
+        "dims": List[int]
+    }
+    '''
+    dims: List[int]
+
+
+class SequenceStateConfig(TypedDict):
+    '''
+    {
+        "input_name": str,
+        "output_name": str,
+        "data_type": str,
+        "dims": List[int],
+        "initial_state": SequenceInitialStateConfig
+    }
+    '''
+    input_name: str
+    output_name: str
+    data_type: str
+    dims: List[int]
+    initial_state: Optional[SequenceInitialStateConfig]
+
+
+class SequenceBatchingConfig(TypedDict):
+    '''
+    {
+        "strategy": str,
+        "max_sequence_idle_microseconds": int,
+        "max_queue_delay_microseconds": int,
+        "minimum_slot_utilization": float,
+        "max_candidate_sequences": int,
+        "preferred_batch_size": List[int],
+        "preserve_ordering": bool,
+        "control_input": List[SequenceControlInputConfig],
+        "state": List[SequenceStateConfig]
+    }
+    '''
+    strategy: Optional[str]
+    max_sequence_idle_microseconds: Optional[int]
+    max_queue_delay_microseconds: Optional[int]
+    minimum_slot_utilization: Optional[float]
+    max_candidate_sequences: Optional[int]
+    preferred_batch_size: Optional[List[int]]
+    preserve_ordering: Optional[bool]
+    control_input: Optional[List[SequenceControlInputConfig]]
+    state: Optional[List[SequenceStateConfig]]
+
+
+class BatchInputConfig(TypedDict):
+    '''
+    {
+        "kind": str,
+        "target_name": Union[str, List[str]],
+        "data_type": str,
+        "source_input": Union[str, List[str]]
+    }
+    '''
+    kind: str
+    target_name: Union[str, List[str]]
+    data_type: str
+    source_input: Optional[Union[str, List[str]]]
+
+
+class BatchOutputConfig(TypedDict):
+    '''
+    {
+        "kind": str,
+        "target_name": Union[str, List[str]],
+        "source_input": Union[str, List[str]]
+    }
+    '''
+    kind: Optional[str]
+    target_name: Union[str, List[str]]
+    source_input: Union[str, List[str]]
 
 
 class ModelConfig(TypedDict):
@@ -123,24 +448,50 @@ class ModelConfig(TypedDict):
         "engine": str,
         "max_batch_size": int,
         "versions": List[VersionConfig],
-        "dynamic_batching": bool,
+        "dynamic_batching": Union[bool, DynamicBatchingConfig],
         "max_queue_delay_microseconds": int,
+        "sequence_batching": Union[bool, SequenceBatchingConfig],
+        "batch_input": List[BatchInputConfig],
+        "batch_output": List[BatchOutputConfig],
+        "decoupled": bool,
+        "response_cache": ResponseCacheConfig,
+        "fuse": FuseConfig,
+        "optimize": OptimizeConfig,
+        "quantize": QuantizeConfig,
+        "onnxruntime": OnnxRuntimeConfig,
+        "tune": TuneConfig,
+        "warmup": WarmupConfig,
         "instance_group": InstanceGroupConfig,
         "requirements": List[str],
         "tensor": TensorConfig,
-        "steps": List[EnsembleStepConfig]
+        "steps": List[Union[EnsembleStepConfig, BlsStepConfig]],
+        "outputs": List[str],
+        "fuse_python_steps": bool
     }
     '''
     engine: str
     max_batch_size: int
     versions: List[VersionConfig]
-    dynamic_batching: Optional[bool]
+    dynamic_batching: Optional[Union[bool, DynamicBatchingConfig]]
     dtype: Optional[str]
     max_queue_delay_microseconds: Optional[int]
+    sequence_batching: Optional[Union[bool, SequenceBatchingConfig]]
+    batch_input: Optional[List[BatchInputConfig]]
+    batch_output: Optional[List[BatchOutputConfig]]
+    decoupled: Optional[bool]
+    response_cache: Optional[ResponseCacheConfig]
+    fuse: Optional[FuseConfig]
+    optimize: Optional[OptimizeConfig]
+    quantize: Optional[QuantizeConfig]
+    onnxruntime: Optional[OnnxRuntimeConfig]
+    tune: Optional[TuneConfig]
+    warmup: Optional[WarmupConfig]
     instance_group: Optional[List[InstanceGroupConfig]]
     requirements: Optional[List[str]]
     tensor: Optional[TensorConfig]
-    steps: Optional[List[EnsembleStepConfig]]
+    steps: Optional[List[Union[EnsembleStepConfig, BlsStepConfig]]]
+    outputs: Optional[List[str]]
+    fuse_python_steps: Optional[bool]
 
 
 class TritonConfig(TypedDict):
@@ -189,6 +540,13 @@ class FormatedTritonConfig(TypedDict):
         "input": List[FormatedTensors],
         "output": List[FormatedTensors],
         "dynamic_batching": Dict,
+        "batch_input": List[Dict],
+        "batch_output": List[Dict],
+        "response_cache": Dict,
+        "model_transaction_policy": Dict,
+        "version_policy": Dict,
+        "parameters": List[Dict],
+        "optimization": Dict,
         "instance_group": Dict
     }
     '''
@@ -198,6 +556,13 @@ class FormatedTritonConfig(TypedDict):
     input: List[FormatedTensors]
     output: List[FormatedTensors]
     dynamic_batching: Dict
+    batch_input: List[Dict]
+    batch_output: List[Dict]
+    response_cache: Dict
+    model_transaction_policy: Dict
+    version_policy: Dict
+    parameters: List[Dict]
+    optimization: Dict
     instance_group: Dict
 
 
@@ -10,12 +10,14 @@ and its configuration files.
 
 import os
 import copy
-import shutil
+import glob
 import onnx
+from concurrent.futures import Future, ProcessPoolExecutor
 from _abstract import (
     TritonEnum,
     TritonConfig,
     ModelConfig,
+    VersionConfig,
     FormatedInputOutputTensors,
     FormatedTensors,
     FormatedTritonConfig,
@@ -24,15 +26,42 @@ from _abstract import (
 )
 from _utils import (
     get_absolute_path,
+    get_temporary_path,
+    get_quantize_versions,
+    get_instance_count,
+    get_onnxruntime_parameters,
+    is_dynamic_batching,
+    get_dynamic_batching,
+    is_sequence_batching,
+    get_sequence_batching,
+    get_sequence_state_names,
+    get_batch_inputs,
+    get_batch_outputs,
+    get_model_warmup,
+    get_step_version,
+    get_topological_order,
+    get_python_fuse_error,
+    get_bls_expression,
+    get_tensor_inputs_name,
+    get_tensor_outputs_name,
+    get_tensor_outputs_dtype,
+    write_file,
+    link_or_copy_file,
     dictionary_to_string,
     get_backend_string,
     get_dtype_string,
     get_kind_instance,
     get_file_instruction_string,
-    get_triton_python_model_config_string
+    get_triton_python_model_config_string,
+    get_triton_python_fused_model_config_string,
+    get_triton_python_bls_model_config_string
 )
+from _onnx_graph import OnnxModelFile, get_tensor_dtype_string, set_dynamic_batch_dims, fuse_preprocess, fuse_postprocess
+from _onnx_runtime import OPTIMIZED_EXTERNAL_DATA_FILE, optimize_model, quantize_model
+from _manifest import BuildManifest
 from _constants import (
     INFO_PREFIX,
+    ERROR_PREFIX,
     SUCCESS_PREFIX,
     BUILD_DIR
 )
@@ -44,8 +73,10 @@ class BuildProtoBufTxt:
     Use to build Triton Server model repository and its configuration files.
     '''
 
-    def __init__(self, data: TritonConfig):
+    def __init__(self, data: TritonConfig, jobs: int = 1, rebuild: bool = False):
         self.__data = data
+        self.__jobs = jobs
+        self.__rebuild = rebuild
         self.__file_name = "config"
         self.__model_repository = get_absolute_path(
             f"{BUILD_DIR}/{self.__data['model_repository']}")
@@ -59,13 +90,18 @@ class BuildProtoBufTxt:
             self.__model_repository, name)
         os.makedirs(model_path, exist_ok=True)
 
-        # Create version directories. Ignore if engine is ensemble
-        if model_config["engine"] != "ensemble":
+        # Create version directories. Ignore if engine is ensemble or bls
+        if model_config["engine"] not in ["ensemble", "bls"]:
             for version in model_config["versions"]:
                 version_path = os.path.join(
                     model_path, str(version["version"]))
                 os.makedirs(version_path, exist_ok=True)
-        # Create at least ensemble version directory
+            # Create quantized version directory
+            if "quantize" in model_config:
+                version_path = os.path.join(
+                    model_path, str(get_quantize_versions(model_config)[1]))
+                os.makedirs(version_path, exist_ok=True)
+        # Create at least ensemble or bls version directory
         else:
             version_path = os.path.join(model_path, "1")
             os.makedirs(version_path, exist_ok=True)
@@ -102,111 +138,220 @@ class BuildProtoBufTxt:
             config["ensemble_scheduling"] = model_config[f"{name}_ensemble_scheduling"]
 
         # Add dynamic batching if enabled
-        if "dynamic_batching" in model_config:
-            if model_config["dynamic_batching"]:
-                config["dynamic_batching"] = {}
-                if "max_queue_delay_microseconds" in model_config:
-                    config["dynamic_batching"]["max_queue_delay_microseconds"] = model_config["max_queue_delay_microseconds"]
+        if is_dynamic_batching(model_config):
+            config["dynamic_batching"] = get_dynamic_batching(model_config)
+
+        # Add sequence batching if enabled
+        if is_sequence_batching(model_config):
+            config["sequence_batching"] = get_sequence_batching(model_config)
+
+        # Add batch inputs and outputs
+        if "batch_input" in model_config:
+            config["batch_input"] = get_batch_inputs(model_config)
+        if "batch_output" in model_config:
+            config["batch_output"] = get_batch_outputs(model_config)
+
+        # Add response cache if enabled
+        if "response_cache" in model_config:
+            if model_config["response_cache"].get("enable", False):
+                config["response_cache"] = {
+                    "enable": TritonEnum("true")
+                }
+
+        # Add model transaction policy if decoupled
+        if "decoupled" in model_config:
+            if model_config["decoupled"]:
+                config["model_transaction_policy"] = {
+                    "decoupled": TritonEnum("true")
+                }
+
+        # Serve all versions if quantized version is added
+        if "quantize" in model_config:
+            config["version_policy"] = {
+                "all": {}
+            }
+
+        # Add ONNX Runtime session parameters and optimization
+        if "onnxruntime" in model_config:
+            parameters, optimization = get_onnxruntime_parameters(
+                model_config)
+            if parameters:
+                config["parameters"] = parameters
+            if optimization:
+                config["optimization"] = optimization
 
         # Add instance_group if enabled
         if "instance_group" in model_config:
             config["instance_group"] = []
             for group in model_config["instance_group"]:
-                instance_group = {
-                    "kind": get_kind_instance(group["kind"])
-                }
-                if group["kind"] == "gpu":
-                    if "count" in group:
-                        instance_group["count"] = group["count"]
+                instance_group = {}
+                if "name" in group:
+                    instance_group["name"] = group["name"]
+                instance_group["kind"] = get_kind_instance(group["kind"])
+                if "count" in group:
+                    instance_group["count"] = get_instance_count(
+                        model_config, group)
                 if "gpus" in group:
                     instance_group["gpus"] = TritonEnum(group["gpus"])
                 config["instance_group"].append(instance_group)
 
+        # Add model warmup. Model is ready only after warmup samples are run
+        if "warmup" in model_config and model_config["engine"] != "ensemble":
+            config["model_warmup"] = get_model_warmup(
+                model_config, model_config[f"{name}_input"])
+
         return config
 
-    def __format_onnx(self, path: str, model_config: ModelConfig) -> FormatedInputOutputTensors:
+    def __format_onnx(self, path: str, model_config: ModelConfig, version: VersionConfig) -> tuple[FormatedInputOutputTensors, list[str]]:
         '''
-        Process ONNX model and generate input and output configs.
+        Process ONNX model version and generate input and output configs.
+        Also return source files of the version.
         '''
-        def __get_onnx_shape(input_layer) -> list[int]:
+        def __get_onnx_shape(layer) -> list[int]:
             '''
-            Get ONNX input shape.
-            If dynamic batching is enabled, remove batch dimension.
+            Get ONNX tensor shape. Symbolic and unknown dimensions are -1.
+            If dynamic batching or batched sequence batching is enabled, remove batch dimension.
             '''
             # Get tensor shape
             tensor_shape: list[int] = [
-                dim.dim_value for dim in input_layer.type.tensor_type.shape.dim]
+                dim.dim_value if dim.HasField("dim_value") else -1
+                for dim in layer.type.tensor_type.shape.dim]
 
-            # Remove batch dimension if dynamic batching is enabled
-            if "dynamic_batching" in model_config:
-                if model_config["dynamic_batching"]:
-                    return tensor_shape[1:]
+            # Remove batch dimension if batching is enabled
+            if batching:
+                return tensor_shape[1:]
 
             return tensor_shape
 
+        def __get_onnx_dtype(layer) -> str:
+            '''
+            Get ONNX tensor data type.
+            Fall back to model dtype if graph does not declare it.
+            '''
+            elem_type = layer.type.tensor_type.elem_type
+            if elem_type == onnx.TensorProto.UNDEFINED:
+                return model_config["dtype"] if "dtype" in model_config else "float32"
+            return get_tensor_dtype_string(elem_type)
+
+        # Sequence batcher batches requests of different sequences
+        batching = is_dynamic_batching(model_config) or (
+            is_sequence_batching(model_config) and model_config["max_batch_size"] > 0)
+
+        # Implicit state tensors are managed by Triton, not model inputs and outputs
+        state_names = get_sequence_state_names(model_config)
+
         # Initialize configs ---------------------------------------------------
         configs: FormatedInputOutputTensors = {
             "input": [],
             "output": []
         }
 
-        # Process each version -------------------------------------------------
-        for version in model_config["versions"]:
-            # Load ONNX model
-            model_path = get_absolute_path(version["path"])
-            onnx_model = onnx.load(model_path)
-
-            # Modify input shape and output if dynamic batching is enabled
-            if "dynamic_batching" in model_config:
-                if model_config["dynamic_batching"]:
-                    # Modify input dimensions param of ONNX model
-                    for i, input_layer in enumerate(onnx_model.graph.input):
-                        input_layer.type.tensor_type.shape.dim[
-                            0].dim_param = f"{input_layer.name}_dynamic_axes_{i+1}"
-
-                    # Modify output dimensions param of ONNX model
-                    for i, output_layer in enumerate(onnx_model.graph.output):
-                        output_layer.type.tensor_type.shape.dim[
-                            0].dim_param = f"{output_layer.name}_dynamic_axes_{i+1}"
-
-            # Get model data type
-            model_data_type = model_config["dtype"] if "dtype" in model_config else "float32"
-
-            # Define mapping values for TritonEnum
-            # If input or output of the model is a string, replace 0 with -1
-            mapping_values = {
-                "0": "-1"
-            }
-
-            # Add input configs
-            for input_layer in onnx_model.graph.input:
-                input_config: FormatedTensors = {
-                    "name": input_layer.name,
-                    "data_type": get_dtype_string(model_data_type),
-                    "dims": TritonEnum(__get_onnx_shape(input_layer), mapping_values=mapping_values)
-                }
-                configs["input"].append(input_config)
-            # Add output configs
-            for output_layer in onnx_model.graph.output:
-                output_config: FormatedTensors = {
-                    "name": output_layer.name,
-                    "data_type": get_dtype_string(model_data_type),
-                    "dims": TritonEnum(__get_onnx_shape(output_layer), mapping_values=mapping_values)
-                }
-                configs["output"].append(output_config)
-
-            # Save ONNX model
-            model_save_path = os.path.join(
-                path, str(version["version"]), "model.onnx"
-            )
-            onnx.save(onnx_model, model_save_path)
+        # Process version ------------------------------------------------------
+        # Load ONNX model graph. Weights are not loaded
+        model_path = get_absolute_path(version["path"])
+        onnx_file = OnnxModelFile(model_path)
+        onnx_model = onnx_file.model
+
+        # Fuse pre/post-processing into the graph if provided
+        if "fuse" in model_config:
+            if "pre" in model_config["fuse"]:
+                fuse_preprocess(onnx_model, model_config["fuse"]["pre"])
+            if "post" in model_config["fuse"]:
+                fuse_postprocess(onnx_model, model_config["fuse"]["post"])
+            onnx_file.patched = True
+
+        # Graph inputs may list initializers in old IR versions. They are not model inputs
+        initializer_names = onnx_file.get_initializer_names()
+        graph_inputs = [
+            layer for layer in onnx_model.graph.input if layer.name not in initializer_names]
+
+        # Modify fixed batch dimension param of inputs and outputs if batching is enabled
+        if batching:
+            set_dynamic_batch_dims(onnx_file)
+
+        # Infer data types and shapes of inputs and outputs
+        inferred_model = onnx_file.infer_shapes()
+        inferred_inputs = {
+            layer.name: layer for layer in inferred_model.graph.input}
 
-        # Return input and output configs
-        return configs
+        # Add input configs
+        for input_layer in graph_inputs:
+            if input_layer.name in state_names:
+                continue
+            input_layer = inferred_inputs.get(input_layer.name, input_layer)
+            input_config: FormatedTensors = {
+                "name": input_layer.name,
+                "data_type": get_dtype_string(__get_onnx_dtype(input_layer)),
+                "dims": TritonEnum(__get_onnx_shape(input_layer))
+            }
+            configs["input"].append(input_config)
+        # Add output configs
+        for output_layer in inferred_model.graph.output:
+            if output_layer.name in state_names:
+                continue
+            output_config: FormatedTensors = {
+                "name": output_layer.name,
+                "data_type": get_dtype_string(__get_onnx_dtype(output_layer)),
+                "dims": TritonEnum(__get_onnx_shape(output_layer))
+            }
+            configs["output"].append(output_config)
 
-    def __format_python(self, path: str, model_name: str, model_config: ModelConfig) -> FormatedInputOutputTensors:
+        # Copy external data files next to the model, before the model itself.
+        # ONNX rejects hardlinked external data, only reflink is allowed
+        version_path = os.path.join(path, str(version["version"]))
+        source_files = [model_path]
+        for location in onnx_file.get_external_data_locations():
+            source_files.append(os.path.join(
+                os.path.dirname(model_path), location))
+            link_or_copy_file(
+                source_files[-1],
+                os.path.join(version_path, location), hardlink=False)
+
+        # Save ONNX model. Reflink source file if graph is not patched.
+        # Hardlink would share edits of the source file with the served model
+        model_save_path = os.path.join(version_path, "model.onnx")
+        if onnx_file.patched:
+            temporary_path = get_temporary_path(model_save_path)
+            onnx_file.save(temporary_path)
+            os.replace(temporary_path, model_save_path)
+        else:
+            link_or_copy_file(model_path, model_save_path, hardlink=False)
+
+        # Quantize source version as an extra version, before it is optimized
+        if "quantize" in model_config:
+            source_version, quantized_version = get_quantize_versions(
+                model_config)
+            if version["version"] == source_version:
+                quantize_config = copy.deepcopy(model_config["quantize"])
+                if "calibration" in quantize_config:
+                    quantize_config["calibration"] = get_absolute_path(
+                        quantize_config["calibration"])
+                    source_files += sorted(glob.glob(os.path.join(
+                        quantize_config["calibration"], "*.npy")))
+                report = quantize_model(
+                    model_save_path,
+                    os.path.join(path, str(quantized_version), "model.onnx"),
+                    quantize_config,
+                    external_data=len(onnx_file.get_external_data_locations()) > 0)
+                print(INFO_PREFIX + f"{os.path.basename(path)}: {report}")
+
+        # Optimize ONNX model with ONNX Runtime offline graph optimizer.
+        # Initializers are moved to a single external data file
+        if "optimize" in model_config:
+            external_data_locations = onnx_file.get_external_data_locations()
+            optimize_model(model_save_path, model_config["optimize"],
+                           external_data=len(external_data_locations) > 0)
+            for location in external_data_locations:
+                if location != OPTIMIZED_EXTERNAL_DATA_FILE:
+                    os.remove(os.path.join(version_path, location))
+
+        # Return input and output configs, and source files
+        return configs, source_files
+
+    def __format_python(self, path: str, model_name: str, model_config: ModelConfig, version: VersionConfig) -> tuple[FormatedInputOutputTensors, list[str]]:
         '''
-        Process Python model and generate input and output configs.
+        Process Python model version and generate input and output configs.
+        Also return source files of the version.
         '''
         # Initialize configs ---------------------------------------------------
         configs: FormatedInputOutputTensors = {
@@ -233,29 +378,27 @@ class BuildProtoBufTxt:
 
         # Write python model file ----------------------------------------------
 
-        # Process each version
-        for version in model_config["versions"]:
-            # Get absolute path
-            model_path = get_absolute_path(version["module"]["path"])
-            model_directory = os.path.join(
-                path, str(version["version"])
-            )
+        # Get absolute path
+        model_path = get_absolute_path(version["module"]["path"])
+        model_directory = os.path.join(
+            path, str(version["version"])
+        )
 
-            # Copy python model file to model directory
-            shutil.copy(model_path, model_directory)
+        # Copy python model file to model directory
+        link_or_copy_file(model_path, os.path.join(
+            model_directory, os.path.basename(model_path)), hardlink=False)
 
-            # Create model.py file
-            model_save_path = os.path.join(
-                model_directory, "model.py"
-            )
+        # Create model.py file
+        model_save_path = os.path.join(
+            model_directory, "model.py"
+        )
 
-            # Write model.py file
-            with open(model_save_path, "w") as f:
-                f.write(get_triton_python_model_config_string(
-                    model_name, version["module"], configs))
+        # Write model.py file
+        write_file(model_save_path, get_triton_python_model_config_string(
+            model_name, version["module"], configs, model_config))
 
-        # Return input and output configs
-        return configs
+        # Return input and output configs, and source files
+        return configs, [model_path]
 
     def __format_ensemble(self, model_name: str, triton_config: TritonConfig) -> tuple[FormatedInputOutputTensors, EnsembleSchedulingConfig]:
         '''
@@ -263,6 +406,10 @@ class BuildProtoBufTxt:
         '''
         models = triton_config["models"]
 
+        # Steps with named output tensors form a graph
+        if any("output_map" in step for step in models[model_name]["steps"]):
+            return self.__format_ensemble_graph(model_name, triton_config)
+
         # Initialize configs ---------------------------------------------------
         configs: FormatedInputOutputTensors = {
             "input": [],
@@ -304,28 +451,21 @@ class BuildProtoBufTxt:
             # Append new step name list
             steps_names.append([])
 
-            # Get step version
-            step_version = step["version"]
-            if step_version == "latest":
-                step_version = -1
-            elif isinstance(step_version, int):
-                step_version = step_version
-            else:
-                raise ValueError(
-                    f"Model version {step_version} is not valid. Must be an integer or 'latest'.")
-
             # Initialize step config
             step_config: EnsembleSchedulingStep = {
                 "model_name": step["model"],
-                "model_version": step_version,
+                "model_version": get_step_version(step),
             }
 
             # Add input map
             for i, inp in enumerate(models[f"{step['model']}"][f"{step['model']}_input"]):
                 # Get value.
+                # If input is mapped explicitly, value is the mapped tensor name.
                 # If i is 0, value is input name of the ensemble model.
                 # Else, value is output_map of previous step model.
-                if step_idx == 0:
+                if inp["name"] in step.get("input_map", {}):
+                    value = step["input_map"][inp["name"]]
+                elif step_idx == 0:
                     value = f"{model_name}_input_{i+1}"
                 else:
                     try:
@@ -383,6 +523,435 @@ class BuildProtoBufTxt:
 
         return configs, schedule_configs
 
+    def __format_ensemble_graph(self, model_name: str, triton_config: TritonConfig) -> tuple[FormatedInputOutputTensors, EnsembleSchedulingConfig]:
+        '''
+        Process Ensemble model with named tensors and generate input and output configs.
+        Triton runs each step once its input tensors are ready, so independent branches run concurrently.
+        '''
+        models = triton_config["models"]
+        steps = models[model_name]["steps"]
+
+        # Resolve tensor names of each step ------------------------------------
+        # Step input and output configs, with the ensemble tensor names
+        steps_inputs: list[list[tuple[dict, str]]] = []
+        steps_outputs: list[list[tuple[dict, str]]] = []
+        # Step index of each produced tensor
+        producers: dict[str, int] = {}
+        for step_idx, step in enumerate(steps):
+            if step["model"] not in models or step["model"] == model_name:
+                raise ValueError(
+                    f"Step model {step['model']} not found in configuration models.")
+            # Raise error if step model is placed after the ensemble model
+            if f"{step['model']}_input" not in models[step["model"]]:
+                raise ValueError(
+                    f"Model {step['model']} input not found. Ensemble model {model_name} must be placed after the {step['model']} model.")
+            inputs = models[step["model"]][f"{step['model']}_input"]
+            outputs = models[step["model"]][f"{step['model']}_output"]
+            input_map = step.get("input_map", {})
+            output_map = step.get("output_map", {})
+
+            # Mapped names must be inputs and outputs of step model
+            for key, tensors in [("input_map", inputs), ("output_map", outputs)]:
+                unknown = set(step.get(key, {})) - \
+                    {tensor["name"] for tensor in tensors}
+                if unknown:
+                    raise ValueError(
+                        f"Step {step['model']} `{key}` has unknown tensors: {', '.join(sorted(unknown))}.")
+
+            # Every input must be mapped. Unmapped tensors would be dangling
+            missing = [inp["name"]
+                       for inp in inputs if inp["name"] not in input_map]
+            if missing:
+                raise ValueError(
+                    f"Step {step['model']} inputs are not mapped: {', '.join(missing)}. Steps with `output_map` require `input_map` of every input.")
+            steps_inputs.append([(inp, input_map[inp["name"]])
+                                for inp in inputs])
+
+            # Unmapped outputs are named as in chained steps
+            steps_outputs.append([])
+            for i, out in enumerate(outputs):
+                value = output_map.get(
+                    out["name"], f"{step['model']}_output_map_{i+1}")
+                if value in producers:
+                    raise ValueError(
+                        f"Tensor {value} is produced by steps {steps[producers[value]]['model']} and {step['model']}.")
+                producers[value] = step_idx
+                steps_outputs[step_idx].append((out, value))
+
+        # Order steps after the steps they depend on ---------------------------
+        order = get_topological_order([
+            {producers[value] for _, value in inputs if value in producers}
+            for inputs in steps_inputs
+        ])
+        if len(order) != len(steps):
+            raise ValueError(
+                f"Steps form a cycle: {', '.join(step['model'] for i, step in enumerate(steps) if i not in order)}.")
+
+        # Ensemble inputs are consumed tensors which no step produces. Eg: fan-out
+        configs: FormatedInputOutputTensors = {
+            "input": [],
+            "output": []
+        }
+        consumed_names = set()
+        for step_idx in order:
+            for inp, value in steps_inputs[step_idx]:
+                consumed_names.add(value)
+                if value in producers:
+                    continue
+                tensor = copy.deepcopy(inp)
+                tensor["name"] = value
+                existing = next(
+                    (t for t in configs["input"] if t["name"] == value), None)
+                if existing is None:
+                    configs["input"].append(tensor)
+                elif existing != tensor:
+                    raise ValueError(
+                        f"Ensemble input {value} is mapped to step inputs with different data types or dims.")
+
+        # Ensemble outputs. Default is named tensors which no step consumes. Eg: fan-in
+        if "outputs" in models[model_name]:
+            output_names = models[model_name]["outputs"]
+        else:
+            output_names = [
+                value for step_idx in order for out, value in steps_outputs[step_idx]
+                if value not in consumed_names and out["name"] in steps[step_idx].get("output_map", {})]
+        if not output_names:
+            raise ValueError(
+                "Ensemble has no outputs. Name outputs in `output_map` or `outputs`.")
+        for value in output_names:
+            if value not in producers:
+                raise ValueError(
+                    f"Ensemble output {value} is not produced by any step.")
+            out = next(out for out, name in steps_outputs[producers[value]]
+                       if name == value)
+            tensor = copy.deepcopy(out)
+            tensor["name"] = value
+            configs["output"].append(tensor)
+
+        # Add scheduling -------------------------------------------------------
+        schedule_configs: EnsembleSchedulingConfig = {
+            "step": []
+        }
+        used_names = consumed_names | set(output_names)
+        for step_idx in order:
+            step = steps[step_idx]
+            used_outputs = [(out, value) for out, value in steps_outputs[step_idx]
+                            if value in used_names]
+            # Raise error if no output of step is used
+            if not used_outputs:
+                raise ValueError(
+                    f"Outputs of step {step['model']} are not used by any step or ensemble output.")
+
+            step_config: EnsembleSchedulingStep = {
+                "model_name": step["model"],
+                "model_version": get_step_version(step),
+            }
+            for i, (inp, value) in enumerate(steps_inputs[step_idx]):
+                step_config[f"input_map_{i+1}"] = {
+                    "key": inp["name"],
+                    "value": value
+                }
+            for i, (out, value) in enumerate(used_outputs):
+                step_config[f"output_map_{i+1}"] = {
+                    "key": out["name"],
+                    "value": value
+                }
+            schedule_configs["step"].append(step_config)
+
+        return configs, schedule_configs
+
+    def __format_bls(self, model_name: str) -> FormatedInputOutputTensors:
+        '''
+        Process BLS model and generate input and output configs.
+        Steps compile into a python model, which calls step models with BLS requests.
+        Steps run when their input tensors are ready. Steps with a condition run only if it is true.
+        '''
+        models = self.__data["models"]
+        model_config = models[model_name]
+        steps = model_config["steps"]
+
+        # Initialize configs, as python models ---------------------------------
+        configs: FormatedInputOutputTensors = {
+            "input": [],
+            "output": []
+        }
+        for i, inp in enumerate(model_config["tensor"]["input"]):
+            configs["input"].append({
+                "name": f"{model_name}_input_{i+1}",
+                "data_type": get_dtype_string(inp["dtype"]),
+                "dims": TritonEnum(inp["dims"])
+            })
+        for i, out in enumerate(model_config["tensor"]["output"]):
+            configs["output"].append({
+                "name": f"{model_name}_output_{i+1}",
+                "data_type": get_dtype_string(out["dtype"]),
+                "dims": TritonEnum(out["dims"])
+            })
+        input_names = get_tensor_inputs_name(configs)
+
+        # Resolve tensors of each step -----------------------------------------
+        # Step index of each produced tensor
+        producers: dict[str, int] = {}
+        for step_idx, step in enumerate(steps):
+            if step["model"] not in models or step["model"] == model_name:
+                raise ValueError(
+                    f"Step model {step['model']} not found in configuration models.")
+            if f"{step['model']}_input" not in models[step["model"]]:
+                raise ValueError(
+                    f"Model {step['model']} input not found. Bls model {model_name} must be placed after the {step['model']} model.")
+            inputs = models[step["model"]][f"{step['model']}_input"]
+            outputs = models[step["model"]][f"{step['model']}_output"]
+
+            # Mapped names must be inputs and outputs of step model
+            for key, tensors in [("input_map", inputs), ("output_map", outputs)]:
+                unknown = set(step.get(key, {})) - \
+                    {tensor["name"] for tensor in tensors}
+                if unknown:
+                    raise ValueError(
+                        f"Step {step['model']} `{key}` has unknown tensors: {', '.join(sorted(unknown))}.")
+            missing = [inp["name"] for inp in inputs
+                       if inp["name"] not in step["input_map"]]
+            if missing:
+                raise ValueError(
+                    f"Step {step['model']} inputs are not mapped: {', '.join(missing)}.")
+
+            for value in step.get("output_map", {}).values():
+                if value in producers or value in input_names:
+                    raise ValueError(
+                        f"Tensor {value} of step {step['model']} is already a model input or step output.")
+                producers[value] = step_idx
+
+        # Compile conditions and defaults, and find step dependencies ----------
+        tensor_names = input_names + list(producers)
+        consumed_names = set()
+        steps_data = []
+        dependencies: list[set[int]] = []
+        for step in steps:
+            used_names = set(step["input_map"].values())
+            condition = None
+            if "condition" in step:
+                condition, names = get_bls_expression(
+                    step["condition"], tensor_names)
+                used_names |= names
+            default = {}
+            for name, value in step.get("default", {}).items():
+                if name not in step.get("output_map", {}).values():
+                    raise ValueError(
+                        f"Default {name} of step {step['model']} is not a step output.")
+                default[name], names = get_bls_expression(value, tensor_names)
+                used_names |= names
+
+            # Raise error if a tensor is not a model input or step output
+            for name in used_names:
+                if name not in tensor_names:
+                    raise ValueError(
+                        f"Tensor {name} of step {step['model']} is not a model input or step output.")
+            consumed_names |= used_names
+            dependencies.append(
+                {producers[name] for name in used_names if name in producers})
+            steps_data.append({
+                "model": step["model"],
+                "version": get_step_version(step),
+                "condition": condition,
+                "default": default,
+                "input_map": step["input_map"],
+                "output_map": step.get("output_map", {})
+            })
+
+        # Model outputs must be produced, and step outputs used
+        output_names = get_tensor_outputs_name(configs)
+        for name in output_names:
+            if name not in producers:
+                raise ValueError(
+                    f"Model output {name} is not produced by any step.")
+        for step_idx, step in enumerate(steps):
+            if not any(value in consumed_names or value in output_names
+                       for value in step.get("output_map", {}).values()):
+                raise ValueError(
+                    f"Outputs of step {step['model']} are not used by any step or model output.")
+
+        # Group steps by level. Steps of a level only depend on previous levels
+        order = get_topological_order(dependencies)
+        if len(order) != len(steps):
+            raise ValueError(
+                f"Steps form a cycle: {', '.join(step['model'] for i, step in enumerate(steps) if i not in order)}.")
+        step_levels = [0] * len(steps)
+        for step_idx in order:
+            step_levels[step_idx] = max(
+                (step_levels[i] + 1 for i in dependencies[step_idx]), default=0)
+        levels = [[steps_data[i] for i in order if step_levels[i] == level]
+                  for level in range(max(step_levels) + 1)]
+
+        # Write model.py file
+        write_file(os.path.join(self.__model_repository, model_name, "1", "model.py"),
+                   get_triton_python_bls_model_config_string(model_name, levels, configs))
+
+        return configs
+
+    def __get_fusable_python_version(self, model_name: str, step: EnsembleSchedulingStep) -> VersionConfig:
+        '''
+        Get version of python step model which can be fused with other steps.
+        Return None if step can not be fused.
+        '''
+        model_config = self.__data["models"][step["model_name"]]
+        if model_config["engine"] != "python":
+            return None
+
+        # Version -1 is the latest version
+        versions = model_config["versions"]
+        if step["model_version"] == -1:
+            version = max(versions, key=lambda v: v["version"])
+        else:
+            version = next(
+                (v for v in versions if v["version"] == step["model_version"]), None)
+        if version is None:
+            return None
+
+        reason = get_python_fuse_error(model_config, version)
+        if reason:
+            print(INFO_PREFIX +
+                  f"Step {step['model_name']} of ensemble {model_name} is not fused: {reason}.")
+            return None
+        return version
+
+    def __fuse_python_steps(self, model_name: str, input_output_configs: FormatedInputOutputTensors, schedule_configs: EnsembleSchedulingConfig) -> tuple[EnsembleSchedulingConfig, list[str]]:
+        '''
+        Fuse adjacent python steps of ensemble into one python model, which chains
+        their execute functions in process. Return scheduling config of the ensemble
+        with fused steps, and source files of fused models.
+        '''
+        models = self.__data["models"]
+        steps = schedule_configs["step"]
+
+        def get_maps(step: EnsembleSchedulingStep, prefix: str) -> list[dict]:
+            return [value for key, value in step.items() if key.startswith(prefix)]
+
+        # Group adjacent steps. A step joins the previous step group if it
+        # consumes an output of the group and has the same max_batch_size
+        groups: list[list[tuple[EnsembleSchedulingStep, VersionConfig]]] = []
+        group = []
+        for step in steps:
+            version = self.__get_fusable_python_version(model_name, step)
+            if version is None:
+                group = []
+                groups.append([(step, None)])
+                continue
+            produced_names = {output_map["value"] for group_step, _ in group
+                              for output_map in get_maps(group_step, "output_map")}
+            if group and \
+                    any(input_map["value"] in produced_names for input_map in get_maps(step, "input_map")) and \
+                    models[group[0][0]["model_name"]]["max_batch_size"] == models[step["model_name"]]["max_batch_size"]:
+                group.append((step, version))
+                continue
+            group = [(step, version)]
+            groups.append(group)
+
+        # Replace groups of several steps by a fused model ----------------------
+        fused_steps: list[EnsembleSchedulingStep] = []
+        source_files: list[str] = []
+        for group_idx, group in enumerate(groups):
+            if len(group) == 1:
+                fused_steps.append(group[0][0])
+                continue
+
+            group_steps = [step for step, _ in group]
+            fused_name = f"{model_name}_fused_{len([g for g in groups[:group_idx] if len(g) > 1]) + 1}"
+
+            # Tensors used after the group: inputs of other steps and ensemble outputs
+            used_names = {out["name"] for out in input_output_configs["output"]}
+            for step in steps:
+                if not any(step is group_step for group_step in group_steps):
+                    used_names.update(input_map["value"]
+                                      for input_map in get_maps(step, "input_map"))
+            produced_names = {output_map["value"] for step in group_steps
+                              for output_map in get_maps(step, "output_map")}
+
+            # Resolve tensors of each fused step, in order of the step model inputs and outputs
+            configs: FormatedInputOutputTensors = {
+                "input": [],
+                "output": []
+            }
+            inputs_tensor_name: list[str] = []
+            outputs_tensor_name: list[str] = []
+            fused_steps_data = []
+            for step, version in group:
+                step_config = models[step["model_name"]]
+                input_maps = {input_map["key"]: input_map["value"]
+                              for input_map in get_maps(step, "input_map")}
+                output_maps = {output_map["key"]: output_map["value"]
+                               for output_map in get_maps(step, "output_map")}
+
+                for inp in step_config[f"{step['model_name']}_input"]:
+                    value = input_maps[inp["name"]]
+                    if value not in produced_names and value not in inputs_tensor_name:
+                        tensor = copy.deepcopy(inp)
+                        tensor["name"] = f"{fused_name}_input_{len(inputs_tensor_name)+1}"
+                        configs["input"].append(tensor)
+                        inputs_tensor_name.append(value)
+                for out in step_config[f"{step['model_name']}_output"]:
+                    value = output_maps.get(out["name"])
+                    if value in used_names:
+                        tensor = copy.deepcopy(out)
+                        tensor["name"] = f"{fused_name}_output_{len(outputs_tensor_name)+1}"
+                        configs["output"].append(tensor)
+                        outputs_tensor_name.append(value)
+
+                fused_steps_data.append({
+                    "model": step["model_name"],
+                    "module": version["module"],
+                    "inputs": [input_maps[inp["name"]] for inp in step_config[f"{step['model_name']}_input"]],
+                    "outputs": [output_maps.get(out["name"]) for out in step_config[f"{step['model_name']}_output"]],
+                    "outputs_dtype": get_tensor_outputs_dtype({"input": [], "output": step_config[f"{step['model_name']}_output"]})
+                })
+
+            # Create fused model. Scheduling and instances of the first step are used
+            fused_config: ModelConfig = copy.deepcopy(
+                models[group_steps[0]["model_name"]])
+            fused_config["versions"] = [{"version": 1}]
+            self.__create_folders(fused_name, fused_config)
+            version_path = os.path.join(
+                self.__model_repository, fused_name, "1")
+
+            # Copy python modules of every step
+            module_paths: dict[str, str] = {}
+            for data in fused_steps_data:
+                module_path = get_absolute_path(data["module"]["path"])
+                filename = os.path.basename(module_path)
+                if module_paths.get(filename, module_path) != module_path:
+                    raise ValueError(
+                        f"Fused steps use different python modules with the same filename: {filename}.")
+                module_paths[filename] = module_path
+            for filename, module_path in module_paths.items():
+                link_or_copy_file(module_path, os.path.join(
+                    version_path, filename), hardlink=False)
+                source_files.append(module_path)
+
+            # Write model.py and config.pbtxt files
+            write_file(os.path.join(version_path, "model.py"), get_triton_python_fused_model_config_string(
+                fused_name, fused_steps_data, configs, inputs_tensor_name, outputs_tensor_name))
+            self.__write_model_config(fused_name, fused_config, configs)
+            print(INFO_PREFIX +
+                  f"Fused steps {', '.join(step['model_name'] for step in group_steps)} of ensemble {model_name} into {fused_name}.")
+
+            # Wire fused model into the ensemble
+            fused_step: EnsembleSchedulingStep = {
+                "model_name": fused_name,
+                "model_version": -1,
+            }
+            for i, (inp, value) in enumerate(zip(configs["input"], inputs_tensor_name)):
+                fused_step[f"input_map_{i+1}"] = {
+                    "key": inp["name"],
+                    "value": value
+                }
+            for i, (out, value) in enumerate(zip(configs["output"], outputs_tensor_name)):
+                fused_step[f"output_map_{i+1}"] = {
+                    "key": out["name"],
+                    "value": value
+                }
+            fused_steps.append(fused_step)
+
+        return {"step": fused_steps}, source_files
+
     def __generate_pbtxt_string(self, data: FormatedTritonConfig) -> str:
         '''
         Generate config.pbtxt data to string.
@@ -395,12 +964,64 @@ class BuildProtoBufTxt:
         Write config.pbtxt file to model directory.
         '''
         file_path = os.path.join(path, f"{self.__file_name}.pbtxt")
-        with open(file_path, "w") as f:
-            f.write(file_string)
+        write_file(file_path, file_string)
+
+    def build_version(self, name: str, version_index: int) -> tuple[FormatedInputOutputTensors, list[str]]:
+        '''
+        Build a version of a non-ensemble model and generate its input and output configs.
+        Also return source files of the version.
+        Public, so it can be submitted to worker processes.
+        '''
+        model_config = self.__data["models"][name]
+        version = model_config["versions"][version_index]
+        model_path = os.path.join(self.__model_repository, name)
 
-    def build(self):
+        # Create ONNX model file, if engine is onnx
+        if model_config["engine"] == "onnx":
+            return self.__format_onnx(model_path, model_config, version)
+
+        # Create Python model file, if engine is python
+        if model_config["engine"] == "python":
+            return self.__format_python(model_path, name, model_config, version)
+
+        # Raise error if engine is not supported
+        raise ValueError(
+            f"Engine {model_config['engine']} is not supported.")
+
+    def __submit_version(self, executor: ProcessPoolExecutor, name: str, version_index: int) -> Future:
+        '''
+        Submit a model version build. Run in place if there is no executor.
+        '''
+        if executor is not None:
+            return executor.submit(self.build_version, name, version_index)
+
+        future = Future()
+        try:
+            future.set_result(self.build_version(name, version_index))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def __write_model_config(self, name: str, model_config: ModelConfig, input_output_configs: FormatedInputOutputTensors):
+        '''
+        Add input and output configs to model config and write config.pbtxt file.
+        '''
+        # Add input and output configs to model config
+        model_config[f"{name}_input"] = input_output_configs["input"]
+        model_config[f"{name}_output"] = input_output_configs["output"]
+
+        # Create main config data
+        config = self.__format_config(name, model_config)
+
+        # Generate and write config.pbtxt file
+        proto_string = self.__generate_pbtxt_string(config)
+        self.__write_pbtxt(os.path.join(
+            self.__model_repository, name), proto_string)
+
+    def build(self) -> bool:
         '''
         Build model repository and its configuration files.
+        Return False if any model failed to build.
         '''
         # Print info -----------------------------------------------------------
         print(INFO_PREFIX + "Building model repository...")
@@ -408,46 +1029,123 @@ class BuildProtoBufTxt:
         # Create model_repository directory if not exists
         os.makedirs(self.__model_repository, exist_ok=True)
 
-        # Process each model ---------------------------------------------------
-        for name, model_config in self.__data["models"].items():
-            # Create model directory
-            model_path = self.__create_folders(name, model_config)
+        models = self.__data["models"]
+        failed_models: list[str] = []
+        built_models: list[str] = []
 
-            # Create ONNX model file, if engine is onnx
-            if model_config["engine"] == "onnx":
-                input_output_configs = self.__format_onnx(
-                    model_path, model_config)
-
-            # Create Python model file, if engine is python
-            elif model_config["engine"] == "python":
-                input_output_configs = self.__format_python(
-                    model_path, name, model_config)
+        # Load build manifest. Hash configs before they are modified by the build
+        manifest = BuildManifest(self.__model_repository)
+        config_hashes = {
+            name: manifest.get_config_hash(model_config)
+            for name, model_config in models.items()
+        }
 
-            # Create Ensemble model file, if engine is ensemble
-            elif model_config["engine"] == "ensemble":
+        # Process non-ensemble models. Versions are built by worker processes --
+        executor = ProcessPoolExecutor(
+            self.__jobs) if self.__jobs > 1 else None
+        try:
+            # Create model directories and submit each version.
+            # Skip models which are up to date
+            futures: dict[str, list[Future]] = {}
+            for name, model_config in models.items():
+                if model_config["engine"] in ["ensemble", "bls"]:
+                    continue
+                if not self.__rebuild and manifest.is_up_to_date(name, config_hashes[name]):
+                    tensors = manifest.get_tensors(name)
+                    model_config[f"{name}_input"] = tensors["input"]
+                    model_config[f"{name}_output"] = tensors["output"]
+                    print(INFO_PREFIX + f"Model {name} is up to date.")
+                    continue
+                self.__create_folders(name, model_config)
+                futures[name] = [
+                    self.__submit_version(executor, name, i)
+                    for i in range(len(model_config["versions"]))
+                ]
+
+            # Collect results in configuration order
+            for name, version_futures in futures.items():
+                try:
+                    # All versions share the same config.pbtxt file.
+                    # Use input and output configs of the first version
+                    results = [future.result() for future in version_futures]
+                    self.__write_model_config(name, models[name], results[0][0])
+                    manifest.update(name, config_hashes[name], results[0][0], [
+                        path for _, source_files in results for path in source_files])
+                    built_models.append(name)
+                    print(INFO_PREFIX +
+                          f"Built model {name} (versions: {len(results)}).")
+                except Exception as e:
+                    failed_models.append(name)
+                    manifest.remove(name)
+                    print(ERROR_PREFIX +
+                          f"Failed to build model {name}. {type(e).__name__}: {e}")
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        # Process ensemble and bls models, after their step models -----------
+        for name, model_config in models.items():
+            if model_config["engine"] not in ["ensemble", "bls"]:
+                continue
+            try:
+                # Skip if any step model failed to build
+                for step in model_config["steps"]:
+                    if step["model"] in failed_models:
+                        raise ValueError(
+                            f"Step model {step['model']} failed to build.")
+
+                # Skip if up to date and no step model was rebuilt
+                if not self.__rebuild and manifest.is_up_to_date(name, config_hashes[name]) and \
+                        not any(step["model"] in built_models for step in model_config["steps"]):
+                    tensors = manifest.get_tensors(name)
+                    model_config[f"{name}_input"] = tensors["input"]
+                    model_config[f"{name}_output"] = tensors["output"]
+                    print(INFO_PREFIX + f"Model {name} is up to date.")
+                    continue
+
+                # Create model directory and generated bls model
+                self.__create_folders(name, model_config)
+                if model_config["engine"] == "bls":
+                    input_output_configs = self.__format_bls(name)
+                    self.__write_model_config(
+                        name, model_config, input_output_configs)
+                    manifest.update(
+                        name, config_hashes[name], input_output_configs, [])
+                    built_models.append(name)
+                    print(INFO_PREFIX + f"Built bls model {name}.")
+                    continue
+
+                # Create scheduling config
                 input_output_configs, scheduling_configs = self.__format_ensemble(
                     name, self.__data)
-
-            # Raise error if engine is not supported
-            else:
-                raise ValueError(
-                    f"Engine {model_config['engine']} is not supported.")
-
-            # Add input and output configs to model config
-            model_config[f"{name}_input"] = input_output_configs["input"]
-            model_config[f"{name}_output"] = input_output_configs["output"]
-
-            # If model is ensemble, add scheduling config
-            if model_config["engine"] == "ensemble":
+                source_files = []
+                if model_config.get("fuse_python_steps", False):
+                    scheduling_configs, source_files = self.__fuse_python_steps(
+                        name, input_output_configs, scheduling_configs)
                 model_config[f"{name}_ensemble_scheduling"] = scheduling_configs
+                self.__write_model_config(
+                    name, model_config, input_output_configs)
+                fused_models = [step["model_name"] for step in scheduling_configs["step"]
+                                if step["model_name"].startswith(f"{name}_fused_")]
+                manifest.update(
+                    name, config_hashes[name], input_output_configs, source_files, fused_models)
+                built_models.append(name)
+                print(INFO_PREFIX + f"Built ensemble model {name}.")
+            except Exception as e:
+                failed_models.append(name)
+                manifest.remove(name)
+                print(ERROR_PREFIX +
+                      f"Failed to build model {name}. {type(e).__name__}: {e}")
+
+        # Save build manifest
+        manifest.save()
+
+        # Print result ---------------------------------------------------------
+        if failed_models:
+            print(ERROR_PREFIX +
+                  f"Build failed for {len(failed_models)} models: {', '.join(failed_models)}")
+            return False
 
-            # Create main config data
-            config = self.__format_config(name, model_config)
-
-            # Generate and write config.pbtxt file
-            proto_string = self.__generate_pbtxt_string(config)
-            self.__write_pbtxt(model_path, proto_string)
-
-        # Print success --------------------------------------------------------
         print(SUCCESS_PREFIX +
               f"Build completed. Model repository: {self.__model_repository}")
+        return True
@@ -19,3 +19,8 @@ INFO_PREFIX = "\033[94mINFO: \033[0m"
 TRITON_PRESEVED_KEYWORDS = [
     "model", "config", "triton_python_backend_utils", "pb_utils", "TritonPythonModel"]
 BUILD_DIR = "build"
+BATCH_INPUT_KINDS = [
+    "batch_element_count", "batch_accumulated_element_count", "batch_accumulated_element_count_with_zero",
+    "batch_max_element_count_as_shape", "batch_item_shape", "batch_item_shape_flatten"]
+SEQUENCE_CONTROL_KINDS = ["start", "end", "ready", "corrid"]
+MANIFEST_FILE = ".trsp_manifest.json"
@@ -9,7 +9,8 @@ and its configuration files.
 '''
 
 import yaml
-from _abstract import TritonConfig
+from _abstract import TritonConfig, ModelConfig, DynamicBatchingConfig, SequenceBatchingConfig, QueuePolicyConfig
+from _constants import BATCH_INPUT_KINDS, SEQUENCE_CONTROL_KINDS
 
 
 class FileConfig:
@@ -42,12 +43,12 @@ class FileConfig:
             assert "engine" in model_config, f"Model `engine` not found in configuration models: {model}."
             assert "max_batch_size" in model_config, f"Model `max_batch_size` not found in configuration models: {model}."
 
-            # Check if versions field is present, except for ensemble
-            if model_config["engine"] != "ensemble":
+            # Check if versions field is present, except for ensemble and bls
+            if model_config["engine"] not in ["ensemble", "bls"]:
                 assert "versions" in model_config, f"Model `versions` not found in configuration models: {model}."
 
-            # Check if versions field is valid, except for ensemble
-            if model_config["engine"] != "ensemble":
+            # Check if versions field is valid, except for ensemble and bls
+            if model_config["engine"] not in ["ensemble", "bls"]:
                 for version in model_config["versions"]:
                     assert "version" in version, f"Model `version` not found in configuration versions: {model}."
 
@@ -63,6 +64,33 @@ class FileConfig:
                         assert "execute" in version[
                             "module"], f"Model `execute` not found in configuration module: {model}."
 
+                        # Batched module stack requests along the batch axis
+                        if version["module"].get("batched", False):
+                            assert model_config["max_batch_size"] > 0, f"Model `batched` module requires `max_batch_size` greater than 0: {model}."
+
+                        # Parallelism dispatch each request to a workers pool
+                        if "parallelism" in version["module"]:
+                            parallelism = version["module"]["parallelism"]
+                            assert not version["module"].get(
+                                "batched", False), f"Model `parallelism` can not be used with `batched` module: {model}."
+                            assert isinstance(parallelism, dict) and len(
+                                parallelism) == 1, f"Model `parallelism` must have exactly one of `threads`, `processes`: {model}."
+                            for kind, workers in parallelism.items():
+                                assert kind in [
+                                    "threads", "processes"], f"Model `parallelism` kind `{kind}` is not supported: {model}."
+                                assert isinstance(workers, int) and workers > 0, f"Model `parallelism` {kind} must be a positive integer: {model}."
+
+                        # In-process cache of execute outputs
+                        if "cache" in version["module"]:
+                            cache = version["module"]["cache"]
+                            assert isinstance(
+                                cache, dict), f"Model `cache` must be a dictionary: {model}."
+                            for field in ["max_entries", "max_bytes"]:
+                                if field in cache:
+                                    assert isinstance(cache[field], int) and cache[field] > 0, f"Model `cache` {field} must be a positive integer: {model}."
+                            if "ttl" in cache:
+                                assert isinstance(cache["ttl"], (int, float)) and cache["ttl"] >= 0, f"Model `cache` ttl must be a non-negative number: {model}."
+
             # If engine is ensemble, check if ensemble field is valid
             if model_config["engine"] == "ensemble":
                 assert "steps" in model_config, f"Model `steps` not found in configuration models: {model}."
@@ -71,13 +99,231 @@ class FileConfig:
                     assert "model" in step, f"Model `model` not found in configuration steps: {model}."
                     assert "version" in step, f"Model `version` not found in configuration steps: {model}."
 
+                    # Explicit input map. Key is step model input name, value is ensemble tensor name
+                    if "input_map" in step:
+                        assert isinstance(
+                            step["input_map"], dict), f"Model `input_map` must be a dictionary: {model}."
+
+                    # Explicit output map. Key is step model output name, value is ensemble tensor name
+                    if "output_map" in step:
+                        assert isinstance(
+                            step["output_map"], dict), f"Model `output_map` must be a dictionary: {model}."
+
+                # Fuse adjacent python steps into one python model
+                if "fuse_python_steps" in model_config:
+                    assert isinstance(model_config["fuse_python_steps"],
+                                      bool), f"Model `fuse_python_steps` must be a boolean: {model}."
+
+                # Ensemble output names of steps with named tensors
+                if "outputs" in model_config:
+                    assert any("output_map" in step for step in model_config[
+                        "steps"]), f"Model `outputs` requires `output_map` in steps: {model}."
+                    assert isinstance(model_config["outputs"], list) and len(model_config["outputs"]) == len(set(
+                        model_config["outputs"])) > 0, f"Model `outputs` must be a list of unique tensor names: {model}."
+
+            # If engine is bls, check if steps are valid
+            if model_config["engine"] == "bls":
+                assert "steps" in model_config, f"Model `steps` not found in configuration models: {model}."
+
+                for step in model_config["steps"]:
+                    assert "model" in step, f"Model `model` not found in configuration steps: {model}."
+                    assert "version" in step, f"Model `version` not found in configuration steps: {model}."
+
+                    # Key is step model input name, value is pipeline tensor name
+                    assert isinstance(step.get("input_map"), dict), f"Model `input_map` must be a dictionary: {model}."
+                    if "output_map" in step:
+                        assert isinstance(
+                            step["output_map"], dict), f"Model `output_map` must be a dictionary: {model}."
+
+                    # Default outputs are set when condition is false
+                    if "default" in step:
+                        assert "condition" in step, f"Model `default` requires `condition` in steps: {model}."
+                        assert isinstance(
+                            step["default"], dict), f"Model `default` must be a dictionary: {model}."
+
+            # Tuning needs a latency budget
+            if "tune" in model_config:
+                assert model_config["engine"] == "onnx", f"Model `tune` is only supported by onnx engine: {model}."
+                tune = model_config["tune"]
+                assert isinstance(tune, dict) and isinstance(tune.get("latency_budget_ms"), (int, float)) and tune[
+                    "latency_budget_ms"] > 0, f"Model `tune` latency_budget_ms must be a positive number: {model}."
+                for field in ["batch_sizes", "thread_counts"]:
+                    if field in tune:
+                        assert isinstance(tune[field], list) and len(tune[field]) > 0 and all(isinstance(
+                            value, int) and value > 0 for value in tune[field]), f"Model `tune` {field} must be a list of positive integers: {model}."
+                if "iterations" in tune:
+                    assert isinstance(tune["iterations"], int) and tune["iterations"] > 0, f"Model `tune` iterations must be a positive integer: {model}."
+                if "dims" in tune:
+                    assert isinstance(tune["dims"], dict) and all(isinstance(dims, list) for dims in tune["dims"].values(
+                    )), f"Model `tune` dims must be a dictionary of input names and dimensions: {model}."
+
+            # Warmup samples run before model is ready
+            if "warmup" in model_config:
+                assert model_config["engine"] != "ensemble", f"Model `warmup` is not supported by ensemble engine: {model}."
+                warmup = model_config["warmup"]
+                assert isinstance(
+                    warmup, dict), f"Model `warmup` must be a dictionary: {model}."
+                if "batch_sizes" in warmup:
+                    assert isinstance(warmup["batch_sizes"], list) and len(warmup["batch_sizes"]) > 0 and all(isinstance(
+                        value, int) and 0 < value <= max(model_config["max_batch_size"], 1) for value in warmup["batch_sizes"]), f"Model `warmup` batch_sizes must be a list of positive integers not greater than `max_batch_size`: {model}."
+                assert warmup.get("data", "random") in [
+                    "random", "zero"], f"Model `warmup` data must be one of: random, zero: {model}."
+                if "count" in warmup:
+                    assert isinstance(warmup["count"], int) and warmup["count"] > 0, f"Model `warmup` count must be a positive integer: {model}."
+                if "dims" in warmup:
+                    assert isinstance(warmup["dims"], dict) and all(isinstance(dims, list) for dims in warmup["dims"].values(
+                    )), f"Model `warmup` dims must be a dictionary of input names and dimensions: {model}."
+                if "execute" in warmup:
+                    assert isinstance(
+                        warmup["execute"], bool), f"Model `warmup` execute must be a boolean: {model}."
+                    if warmup["execute"]:
+                        assert model_config["engine"] == "python", f"Model `warmup` execute is only supported by python engine: {model}."
+
+            # Dynamic batching is a boolean or a scheduler dictionary
+            if "dynamic_batching" in model_config:
+                dynamic_batching = model_config["dynamic_batching"]
+                assert isinstance(dynamic_batching, (bool, dict)), f"Model `dynamic_batching` must be a boolean or a dictionary: {model}."
+                if isinstance(dynamic_batching, dict):
+                    self.__validate_dynamic_batching(
+                        model, model_config, dynamic_batching)
+            if "max_queue_delay_microseconds" in model_config:
+                assert isinstance(model_config["max_queue_delay_microseconds"], int) and model_config[
+                    "max_queue_delay_microseconds"] >= 0, f"Model `max_queue_delay_microseconds` must be a non-negative integer: {model}."
+
+            # Sequence batching is a boolean or a scheduler dictionary
+            if "sequence_batching" in model_config:
+                sequence_batching = model_config["sequence_batching"]
+                assert isinstance(sequence_batching, (bool, dict)), f"Model `sequence_batching` must be a boolean or a dictionary: {model}."
+                if sequence_batching:
+                    self.__validate_sequence_batching(
+                        model, model_config, sequence_batching if isinstance(sequence_batching, dict) else {})
+
+            # Batch inputs and outputs require batching
+            for field in ["batch_input", "batch_output"]:
+                if field in model_config:
+                    assert model_config["max_batch_size"] > 0, f"Model `{field}` requires `max_batch_size` greater than 0: {model}."
+                    assert isinstance(
+                        model_config[field], list), f"Model `{field}` must be a list: {model}."
+                    for batch_tensor in model_config[field]:
+                        assert "target_name" in batch_tensor, f"Model `target_name` not found in configuration {field}: {model}."
+            for batch_input in model_config.get("batch_input", []):
+                assert batch_input.get("kind") in BATCH_INPUT_KINDS, f"Model batch_input `kind` must be one of: {', '.join(BATCH_INPUT_KINDS)}: {model}."
+                assert batch_input.get("data_type") in [
+                    "int32", "float32"], f"Model batch_input `data_type` must be one of: int32, float32: {model}."
+                if batch_input["kind"] != "batch_element_count":
+                    assert "source_input" in batch_input, f"Model batch_input kind `{batch_input['kind']}` requires `source_input`: {model}."
+            for batch_output in model_config.get("batch_output", []):
+                assert batch_output.get("kind", "batch_scatter_with_input_shape") == "batch_scatter_with_input_shape", f"Model batch_output `kind` must be `batch_scatter_with_input_shape`: {model}."
+                assert "source_input" in batch_output, f"Model `source_input` not found in configuration batch_output: {model}."
+
+            # Decoupled transaction policy is only supported by python backend
+            if "decoupled" in model_config:
+                assert isinstance(
+                    model_config["decoupled"], bool), f"Model `decoupled` must be a boolean: {model}."
+                if model_config["decoupled"]:
+                    assert model_config["engine"] == "python", f"Model `decoupled` is only supported by python engine: {model}."
+
+            # Fuse pre/post-processing into ONNX graph
+            if "fuse" in model_config:
+                assert model_config["engine"] == "onnx", f"Model `fuse` is only supported by onnx engine: {model}."
+                fuse = model_config["fuse"]
+                if "pre" in fuse:
+                    assert fuse["pre"].get("layout", "nchw") in [
+                        "nchw", "nhwc"], f"Model `fuse` pre layout must be one of: nchw, nhwc: {model}."
+                    scale = fuse["pre"].get("scale", 1)
+                    assert scale == "max" or isinstance(scale, (int, float)), f"Model `fuse` pre scale must be `max` or a number: {model}."
+                    for field in ["mean", "std"]:
+                        if field in fuse["pre"]:
+                            assert isinstance(fuse["pre"][field], list), f"Model `fuse` pre {field} must be a list: {model}."
+                if "post" in fuse:
+                    assert fuse["post"].get("normalize", "minmax") == "minmax", f"Model `fuse` post normalize must be `minmax`: {model}."
+                    assert isinstance(fuse["post"].get("scale", 1), (int, float)), f"Model `fuse` post scale must be a number: {model}."
+
+            # Offline ONNX Runtime graph optimization
+            if "optimize" in model_config:
+                assert model_config["engine"] == "onnx", f"Model `optimize` is only supported by onnx engine: {model}."
+                optimize = model_config["optimize"]
+                assert isinstance(optimize, dict) and optimize.get("level") in [
+                    "basic", "extended", "all"], f"Model `optimize` level must be one of: basic, extended, all: {model}."
+                tolerance = optimize.get("tolerance", 1e-3)
+                assert isinstance(tolerance, (int, float)) and tolerance >= 0, f"Model `optimize` tolerance must be a non-negative number: {model}."
+
+            # Quantized model is built as an extra version of the source version
+            if "quantize" in model_config:
+                assert model_config["engine"] == "onnx", f"Model `quantize` is only supported by onnx engine: {model}."
+                quantize = model_config["quantize"]
+                assert isinstance(quantize, dict) and quantize.get("mode") in [
+                    "dynamic", "static", "fp16"], f"Model `quantize` mode must be one of: dynamic, static, fp16: {model}."
+                if quantize["mode"] == "static":
+                    assert "calibration" in quantize, f"Model `quantize` static mode requires `calibration` directory: {model}."
+                versions = [version["version"]
+                            for version in model_config["versions"]]
+                assert quantize.get("source_version", max(versions)) in versions, f"Model `quantize` source_version not found in versions: {model}."
+                assert quantize.get("version", max(versions) + 1) not in versions, f"Model `quantize` version must not be one of versions: {model}."
+
+            # ONNX Runtime session options of every instance
+            if "onnxruntime" in model_config:
+                assert model_config["engine"] == "onnx", f"Model `onnxruntime` is only supported by onnx engine: {model}."
+                session = model_config["onnxruntime"]
+                assert isinstance(
+                    session, dict), f"Model `onnxruntime` must be a dictionary: {model}."
+                for field in ["intra_op_thread_count", "inter_op_thread_count"]:
+                    if field in session:
+                        threads = session[field]
+                        assert threads == "auto" or (isinstance(threads, int) and threads >= 0), f"Model `onnxruntime` {field} must be `auto` or a non-negative integer: {model}."
+                assert session.get("execution_mode", "sequential") in [
+                    "sequential", "parallel"], f"Model `onnxruntime` execution_mode must be one of: sequential, parallel: {model}."
+                assert session.get("graph_optimization_level", "all") in [
+                    "basic", "extended", "all"], f"Model `onnxruntime` graph_optimization_level must be one of: basic, extended, all: {model}."
+                for field in ["enable_mem_arena", "enable_mem_pattern", "memory_arena_shrinkage"]:
+                    if field in session:
+                        assert isinstance(
+                            session[field], bool), f"Model `onnxruntime` {field} must be a boolean: {model}."
+
+            # Triton response cache can not be used with decoupled models
+            if "response_cache" in model_config:
+                assert isinstance(model_config["response_cache"], dict) and "enable" in model_config[
+                    "response_cache"], f"Model `response_cache` must have `enable` field: {model}."
+                if model_config["response_cache"]["enable"]:
+                    assert not model_config.get(
+                        "decoupled", False), f"Model `response_cache` can not be used with `decoupled`: {model}."
+
             # If instance_group is present, check if it is valid
             if "instance_group" in model_config:
+                assert isinstance(model_config["instance_group"], list) and len(
+                    model_config["instance_group"]) > 0, f"Model `instance_group` must be a non-empty list: {model}."
                 for group in model_config["instance_group"]:
                     assert "kind" in group, f"Model `kind` not found in configuration instance_group: {model}."
+                    assert group["kind"] in [
+                        "cpu", "gpu", "model", "auto"], f"Model instance_group `kind` must be one of: cpu, gpu, model, auto: {model}."
+
+                    # Count is a positive integer, or `auto` for CPU instances
+                    if "count" in group:
+                        count = group["count"]
+                        if count == "auto":
+                            assert group["kind"] == "cpu", f"Model instance_group count `auto` is only supported by cpu kind: {model}."
+                        else:
+                            assert isinstance(count, int) and not isinstance(
+                                count, bool) and count > 0, f"Model instance_group `count` must be `auto` or a positive integer: {model}."
+
+                    # GPUs are only used by GPU instances
+                    if "gpus" in group:
+                        assert group["kind"] == "gpu", f"Model instance_group `gpus` is only supported by gpu kind: {model}."
+                        assert isinstance(group["gpus"], list) and all(isinstance(gpu, int) and gpu >= 0 for gpu in group[
+                            "gpus"]), f"Model instance_group `gpus` must be a list of non-negative integers: {model}."
+
+                # Several `auto` groups would each take every core
+                assert len([group for group in model_config["instance_group"] if group.get(
+                    "count") == "auto"]) <= 1, f"Model instance_group count `auto` can be used by one group only: {model}."
+
+                # Group names must be unique
+                names = [group["name"]
+                         for group in model_config["instance_group"] if "name" in group]
+                assert len(names) == len(
+                    set(names)), f"Model instance_group `name` must be unique: {model}."
 
-            # For python backend, check if python field is valid
-            if model_config["engine"] == "python":
+            # For python backend and bls, check if python field is valid
+            if model_config["engine"] in ["python", "bls"]:
                 assert "tensor" in model_config, f"Model `tensor` not found in configuration versions: {model}."
 
                 model_tensor = model_config["tensor"]
@@ -97,6 +343,133 @@ class FileConfig:
         # All fields are valid ---------------------------------------------------
         return configs
 
+    def __validate_queue_policy(self, model: str, policy: QueuePolicyConfig):
+        '''
+        Validate queue policy of dynamic batching.
+        '''
+        assert isinstance(
+            policy, dict), f"Model dynamic_batching queue policy must be a dictionary: {model}."
+        assert policy.get("timeout_action", "reject") in [
+            "reject", "delay"], f"Model dynamic_batching queue policy `timeout_action` must be one of: reject, delay: {model}."
+        for field in ["default_timeout_microseconds", "max_queue_size"]:
+            if field in policy:
+                assert isinstance(policy[field], int) and policy[field] >= 0, f"Model dynamic_batching queue policy `{field}` must be a non-negative integer: {model}."
+        if "allow_timeout_override" in policy:
+            assert isinstance(policy["allow_timeout_override"],
+                              bool), f"Model dynamic_batching queue policy `allow_timeout_override` must be a boolean: {model}."
+
+    def __validate_dynamic_batching(self, model: str, model_config: ModelConfig, dynamic_batching: DynamicBatchingConfig):
+        '''
+        Validate dynamic batching scheduler dictionary.
+        '''
+        assert model_config["max_batch_size"] > 0, f"Model `dynamic_batching` requires `max_batch_size` greater than 0: {model}."
+
+        # Preferred batch sizes must fit in max batch size
+        if "preferred_batch_size" in dynamic_batching:
+            preferred_batch_size = dynamic_batching["preferred_batch_size"]
+            assert isinstance(preferred_batch_size, list) and all(isinstance(size, int) and 0 < size <= model_config["max_batch_size"]
+                                                                  for size in preferred_batch_size), f"Model dynamic_batching `preferred_batch_size` must be a list of integers between 1 and `max_batch_size`: {model}."
+
+        if "max_queue_delay_microseconds" in dynamic_batching:
+            assert isinstance(dynamic_batching["max_queue_delay_microseconds"], int) and dynamic_batching[
+                "max_queue_delay_microseconds"] >= 0, f"Model dynamic_batching `max_queue_delay_microseconds` must be a non-negative integer: {model}."
+        if "preserve_ordering" in dynamic_batching:
+            assert isinstance(dynamic_batching["preserve_ordering"],
+                              bool), f"Model dynamic_batching `preserve_ordering` must be a boolean: {model}."
+
+        # Priority levels are numbered from 1 to priority_levels
+        priority_levels = dynamic_batching.get("priority_levels", 0)
+        assert isinstance(priority_levels, int) and priority_levels >= 0, f"Model dynamic_batching `priority_levels` must be a non-negative integer: {model}."
+        if priority_levels > 0:
+            assert "default_priority_level" in dynamic_batching, f"Model dynamic_batching `priority_levels` requires `default_priority_level`: {model}."
+        if "default_priority_level" in dynamic_batching:
+            assert isinstance(dynamic_batching["default_priority_level"], int) and 0 < dynamic_batching[
+                "default_priority_level"] <= priority_levels, f"Model dynamic_batching `default_priority_level` must be between 1 and `priority_levels`: {model}."
+
+        # Queue policies
+        if "default_queue_policy" in dynamic_batching:
+            self.__validate_queue_policy(
+                model, dynamic_batching["default_queue_policy"])
+        if "priority_queue_policy" in dynamic_batching:
+            assert isinstance(dynamic_batching["priority_queue_policy"],
+                              dict), f"Model dynamic_batching `priority_queue_policy` must be a dictionary: {model}."
+            for level, policy in dynamic_batching["priority_queue_policy"].items():
+                assert isinstance(level, int) and 0 < level <= priority_levels, f"Model dynamic_batching `priority_queue_policy` levels must be between 1 and `priority_levels`: {model}."
+                self.__validate_queue_policy(model, policy)
+
+    def __validate_sequence_batching(self, model: str, model_config: ModelConfig, sequence_batching: SequenceBatchingConfig):
+        '''
+        Validate sequence batching scheduler dictionary.
+        '''
+        assert model_config["engine"] in [
+            "onnx", "python"], f"Model `sequence_batching` is only supported by onnx and python engines: {model}."
+        assert not model_config.get(
+            "dynamic_batching", False), f"Model `sequence_batching` can not be used with `dynamic_batching`: {model}."
+
+        # Strategy fields
+        strategy = sequence_batching.get("strategy", "direct")
+        assert strategy in [
+            "direct", "oldest"], f"Model sequence_batching `strategy` must be one of: direct, oldest: {model}."
+        for field in ["max_sequence_idle_microseconds", "max_queue_delay_microseconds"]:
+            if field in sequence_batching:
+                assert isinstance(sequence_batching[field], int) and sequence_batching[field] >= 0, f"Model sequence_batching `{field}` must be a non-negative integer: {model}."
+        for field in ["max_candidate_sequences", "preferred_batch_size", "preserve_ordering"]:
+            if field in sequence_batching:
+                assert strategy == "oldest", f"Model sequence_batching `{field}` requires `oldest` strategy: {model}."
+        if "minimum_slot_utilization" in sequence_batching:
+            assert strategy == "direct", f"Model sequence_batching `minimum_slot_utilization` requires `direct` strategy: {model}."
+            assert isinstance(sequence_batching["minimum_slot_utilization"], (int, float)) and 0 <= sequence_batching[
+                "minimum_slot_utilization"] <= 1, f"Model sequence_batching `minimum_slot_utilization` must be a number between 0 and 1: {model}."
+        if "max_candidate_sequences" in sequence_batching:
+            assert isinstance(sequence_batching["max_candidate_sequences"], int) and sequence_batching[
+                "max_candidate_sequences"] > 0, f"Model sequence_batching `max_candidate_sequences` must be a positive integer: {model}."
+        if "preferred_batch_size" in sequence_batching:
+            preferred_batch_size = sequence_batching["preferred_batch_size"]
+            assert isinstance(preferred_batch_size, list) and all(isinstance(size, int) and 0 < size <= model_config["max_batch_size"]
+                                                                  for size in preferred_batch_size), f"Model sequence_batching `preferred_batch_size` must be a list of integers between 1 and `max_batch_size`: {model}."
+        if "preserve_ordering" in sequence_batching:
+            assert isinstance(sequence_batching["preserve_ordering"],
+                              bool), f"Model sequence_batching `preserve_ordering` must be a boolean: {model}."
+
+        # Control inputs tell the model start, end, readiness and correlation id of sequence
+        control_inputs = sequence_batching.get("control_input", [])
+        assert isinstance(
+            control_inputs, list), f"Model sequence_batching `control_input` must be a list: {model}."
+        for control_input in control_inputs:
+            assert "name" in control_input, f"Model `name` not found in configuration sequence_batching control_input: {model}."
+            assert control_input.get("kind") in SEQUENCE_CONTROL_KINDS, f"Model sequence_batching control_input `kind` must be one of: {', '.join(SEQUENCE_CONTROL_KINDS)}: {model}."
+            if control_input["kind"] == "corrid":
+                assert control_input.get("data_type", "uint64") in [
+                    "uint64", "int64", "uint32", "int32", "string"], f"Model sequence_batching control_input kind `corrid` data_type must be one of: uint64, int64, uint32, int32, string: {model}."
+            else:
+                assert control_input.get("data_type", "int32") in [
+                    "int32", "float32", "bool"], f"Model sequence_batching control_input kind `{control_input['kind']}` data_type must be one of: int32, float32, bool: {model}."
+        kinds = [control_input["kind"] for control_input in control_inputs]
+        assert len(kinds) == len(
+            set(kinds)), f"Model sequence_batching control_input kinds must be unique: {model}."
+
+        # Implicit state tensors are stored by Triton between requests of sequence
+        if "state" in sequence_batching:
+            assert model_config["engine"] == "onnx", f"Model sequence_batching `state` is only supported by onnx engine. Python models keep state in the sequence state dictionary: {model}."
+            assert isinstance(
+                sequence_batching["state"], list), f"Model sequence_batching `state` must be a list: {model}."
+            for state in sequence_batching["state"]:
+                for field in ["input_name", "output_name", "data_type", "dims"]:
+                    assert field in state, f"Model `{field}` not found in configuration sequence_batching state: {model}."
+                assert isinstance(
+                    state["dims"], list), f"Model sequence_batching state `dims` must be a list: {model}."
+                if "initial_state" in state:
+                    assert isinstance(state["initial_state"], dict) and isinstance(state["initial_state"].get("dims"), list) and all(
+                        dim > 0 for dim in state["initial_state"]["dims"]), f"Model sequence_batching state `initial_state` must have fixed `dims`: {model}."
+
+        # Python state dictionary is kept per request, outside of batches and worker processes
+        if model_config["engine"] == "python":
+            for version in model_config["versions"]:
+                module = version["module"]
+                for field in ["batched", "parallelism", "cache"]:
+                    assert module.get(field) in [
+                        None, False], f"Model `sequence_batching` can not be used with `{field}` module: {model}."
+
     def get_config(self) -> TritonConfig:
         '''
         Get configuration dictionary.
@@ -108,4 +481,4 @@ class FileConfig:
         Export configuration to file.
         '''
         with open(file_path, "w") as f:
-            yaml.dump(self.__config, f)
+            yaml.dump(self.__config, f, sort_keys=False)
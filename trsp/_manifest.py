@@ -0,0 +1,196 @@
+'''
+Triton Server Build Support.
+----
+Author: Ming-doan
+Created: 2024-02-20
+----
+This module provides support for building Triton Server model repository
+and its configuration files.
+'''
+
+import os
+import json
+import glob
+import hashlib
+from _abstract import TritonEnum, ModelConfig, FormatedInputOutputTensors
+from _utils import write_file, get_cpu_count
+from _constants import MANIFEST_FILE
+
+
+def get_builder_hash() -> str:
+    '''
+    Get hash of the build scripts. Changing the builder rebuilds every model.
+    '''
+    digest = hashlib.blake2b(digest_size=16)
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py"))):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def get_file_hash(path: str) -> str:
+    '''
+    Get content hash of file. Read in chunks, files can be large.
+    '''
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(16 * 1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def tensors_to_json(tensors: FormatedInputOutputTensors) -> dict:
+    '''
+    Convert input and output configs to JSON serializable dictionary.
+    '''
+    return {
+        key: [
+            {name: {"enum": str(value)} if isinstance(value, TritonEnum) else value
+             for name, value in tensor.items()}
+            for tensor in tensors[key]
+        ]
+        for key in ["input", "output"]
+    }
+
+
+def tensors_from_json(data: dict) -> FormatedInputOutputTensors:
+    '''
+    Convert JSON dictionary back to input and output configs.
+    '''
+    return {
+        key: [
+            {name: TritonEnum(value["enum"]) if isinstance(value, dict) and "enum" in value else value
+             for name, value in tensor.items()}
+            for tensor in data[key]
+        ]
+        for key in ["input", "output"]
+    }
+
+
+def get_model_artifacts(model_repository: str, names: list[str]) -> list[str]:
+    '''
+    Get built files and directories of models, relative to model repository.
+    Python bytecode caches written by Triton Server are ignored.
+    '''
+    artifacts = []
+    for name in names:
+        for root, directories, files in os.walk(os.path.join(model_repository, name)):
+            directories[:] = [
+                directory for directory in directories if directory != "__pycache__"]
+            for entry in directories + files:
+                artifacts.append(os.path.relpath(
+                    os.path.join(root, entry), model_repository))
+    return sorted(artifacts)
+
+
+class BuildManifest:
+    '''
+    Build Manifest Class.
+    Record content hashes of built models, so unchanged models are not rebuilt.
+    '''
+
+    def __init__(self, model_repository: str):
+        self.__model_repository = model_repository
+        self.__path = os.path.join(model_repository, MANIFEST_FILE)
+        self.__builder_hash = get_builder_hash()
+        self.__models: dict = self.__load()
+
+    def __load(self) -> dict:
+        '''
+        Load manifest file. Missing or invalid manifest is ignored.
+        '''
+        try:
+            with open(self.__path, "r") as f:
+                return json.load(f)["models"]
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def __get_cached_file_hash(self, path: str, files: dict) -> str:
+        '''
+        Get content hash of file. Reuse recorded hash if size and mtime are unchanged.
+        '''
+        stat = os.stat(path)
+        recorded = files.get(path)
+        if recorded and recorded["size"] == stat.st_size and recorded["mtime_ns"] == stat.st_mtime_ns:
+            return recorded["hash"]
+        return get_file_hash(path)
+
+    def get_config_hash(self, model_config: ModelConfig) -> str:
+        '''
+        Get hash of model configuration and build scripts.
+        Must be called before the model config is modified by the build.
+        '''
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.__builder_hash.encode())
+        # Relative paths in configuration are resolved from working directory
+        digest.update(os.getcwd().encode())
+        # Thread and instance counts `auto` are resolved from CPU count
+        digest.update(str(get_cpu_count()).encode())
+        digest.update(json.dumps(
+            model_config, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def is_up_to_date(self, name: str, config_hash: str) -> bool:
+        '''
+        Check if model was built from the same configuration and source files.
+        '''
+        entry = self.__models.get(name)
+        if entry is None or entry["config_hash"] != config_hash:
+            return False
+
+        # Check built model still exists, with every version artifact
+        if not os.path.isfile(os.path.join(self.__model_repository, name, "config.pbtxt")):
+            return False
+        for artifact in entry.get("artifacts", []):
+            if not os.path.exists(os.path.join(self.__model_repository, artifact)):
+                return False
+
+        # Check source files are unchanged
+        for path, recorded in entry["files"].items():
+            try:
+                if self.__get_cached_file_hash(path, entry["files"]) != recorded["hash"]:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def get_tensors(self, name: str) -> FormatedInputOutputTensors:
+        '''
+        Get recorded input and output configs of model.
+        '''
+        return tensors_from_json(self.__models[name]["tensors"])
+
+    def update(self, name: str, config_hash: str, tensors: FormatedInputOutputTensors, files: list[str], models: list[str] = None):
+        '''
+        Record built model with its source files and built artifacts.
+        Artifacts of extra models built with it, eg: fused steps, are also recorded.
+        '''
+        previous_files = self.__models.get(name, {}).get("files", {})
+        recorded_files = {}
+        for path in files:
+            stat = os.stat(path)
+            recorded_files[path] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "hash": self.__get_cached_file_hash(path, previous_files)
+            }
+
+        self.__models[name] = {
+            "config_hash": config_hash,
+            "tensors": tensors_to_json(tensors),
+            "files": recorded_files,
+            "artifacts": get_model_artifacts(self.__model_repository, [name] + (models or []))
+        }
+
+    def remove(self, name: str):
+        '''
+        Remove model from manifest. It will be rebuilt next time.
+        '''
+        self.__models.pop(name, None)
+
+    def save(self):
+        '''
+        Write manifest file atomically.
+        '''
+        write_file(self.__path, json.dumps(
+            {"models": self.__models}, indent=2))
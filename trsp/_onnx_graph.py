@@ -0,0 +1,473 @@
+'''
+Triton Server Build Support.
+----
+Author: Ming-doan
+Created: 2024-02-20
+----
+This module provides support for building Triton Server model repository
+and its configuration files.
+'''
+
+import numpy as np
+import onnx
+from onnx import helper, numpy_helper
+from _abstract import FusePreprocessConfig, FusePostprocessConfig
+
+
+def _read_varint(file) -> int:
+    '''
+    Read protobuf varint from file.
+    '''
+    result, shift = 0, 0
+    while True:
+        byte = file.read(1)
+        if not byte:
+            raise EOFError("Unexpected end of ONNX file.")
+        result |= (byte[0] & 0x7F) << shift
+        if not byte[0] & 0x80:
+            return result
+        shift += 7
+
+
+def _encode_varint(value: int) -> bytes:
+    '''
+    Encode protobuf varint.
+    '''
+    encoded = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            encoded.append(byte | 0x80)
+        else:
+            encoded.append(byte)
+            return bytes(encoded)
+
+
+def _scan_fields(file, start: int, end: int):
+    '''
+    Scan protobuf fields of a message between start and end offsets.
+    Yield (field number, field start, payload start, field end).
+    '''
+    position = start
+    while position < end:
+        file.seek(position)
+        tag = _read_varint(file)
+        number, wire_type = tag >> 3, tag & 0x07
+        payload_start = file.tell()
+        if wire_type == 0:
+            _read_varint(file)
+        elif wire_type == 1:
+            file.seek(8, 1)
+        elif wire_type == 2:
+            length = _read_varint(file)
+            payload_start = file.tell()
+            file.seek(length, 1)
+        elif wire_type == 5:
+            file.seek(4, 1)
+        else:
+            raise ValueError(f"Unsupported protobuf wire type: {wire_type}")
+        yield number, position, payload_start, file.tell()
+        position = file.tell()
+
+
+def _get_attribute_tensors(graph: onnx.GraphProto):
+    '''
+    Get tensors of node attributes, including subgraphs.
+    '''
+    for node in graph.node:
+        for attribute in node.attribute:
+            if attribute.HasField("t"):
+                yield attribute.t
+            yield from attribute.tensors
+            if attribute.HasField("g"):
+                yield from attribute.g.initializer
+                yield from _get_attribute_tensors(attribute.g)
+            for subgraph in attribute.graphs:
+                yield from subgraph.initializer
+                yield from _get_attribute_tensors(subgraph)
+
+
+# Protobuf field numbers. ModelProto.graph, GraphProto.initializer and
+# GraphProto.sparse_initializer.
+MODEL_GRAPH_FIELD = 7
+GRAPH_INITIALIZER_FIELDS = [5, 15]
+# TensorProto data fields. Skipped when only tensor metadata is needed.
+TENSOR_DATA_FIELDS = [4, 5, 6, 7, 9, 10, 11]
+# Initializers smaller than this are parsed with their data. They may be
+# used as shapes during shape inference.
+SMALL_TENSOR_MAX_BYTES = 4096
+
+
+class OnnxModelFile:
+    '''
+    ONNX Model File Class.
+    Used to read and patch an ONNX model without loading its weights.
+    Initializers are kept as byte ranges of the source file and copied verbatim
+    on save. External data files are left on disk.
+    '''
+
+    def __init__(self, path: str):
+        self.__path = path
+        self.__initializer_ranges: list[tuple[int, int]] = []
+        self.__external_locations: set[str] = set()
+        self.__initializers: list[onnx.TensorProto] = []
+        self.patched = False
+        self.model = self.__load()
+
+    def __load(self) -> onnx.ModelProto:
+        '''
+        Load ONNX model, except graph initializers.
+        '''
+        model_bytes, graph_bytes = bytearray(), bytearray()
+        with open(self.__path, "rb") as file:
+            file_size = file.seek(0, 2)
+            for number, start, payload_start, end in _scan_fields(file, 0, file_size):
+                if number != MODEL_GRAPH_FIELD:
+                    file.seek(start)
+                    model_bytes += file.read(end - start)
+                    continue
+
+                for graph_number, graph_start, graph_payload_start, graph_end in _scan_fields(file, payload_start, end):
+                    # Keep other graph fields (nodes, inputs, outputs, ...)
+                    if graph_number not in GRAPH_INITIALIZER_FIELDS:
+                        file.seek(graph_start)
+                        graph_bytes += file.read(graph_end - graph_start)
+                        continue
+
+                    # Keep initializers as byte ranges
+                    self.__initializer_ranges.append((graph_start, graph_end))
+
+                    # Parse small initializers with their data.
+                    # Parse only metadata (name, type, dims, ...) of others
+                    if graph_end - graph_payload_start <= SMALL_TENSOR_MAX_BYTES:
+                        file.seek(graph_payload_start)
+                        payload = file.read(graph_end - graph_payload_start)
+                        tensor = onnx.TensorProto.FromString(payload) if graph_number == 5 else \
+                            onnx.SparseTensorProto.FromString(payload).values
+                    elif graph_number == 5:
+                        metadata = bytearray()
+                        for tensor_number, tensor_start, _, tensor_end in _scan_fields(file, graph_payload_start, graph_end):
+                            if tensor_number not in TENSOR_DATA_FIELDS:
+                                file.seek(tensor_start)
+                                metadata += file.read(tensor_end - tensor_start)
+                        tensor = onnx.TensorProto.FromString(bytes(metadata))
+                    else:
+                        continue
+
+                    # Initializers may refer to external data
+                    if graph_number == 5:
+                        self.__initializers.append(tensor)
+                    self.__add_external_location(tensor)
+
+        model = onnx.ModelProto.FromString(bytes(model_bytes))
+        model.graph.ParseFromString(bytes(graph_bytes))
+
+        # Tensors in node attributes may refer to external data too
+        for tensor in _get_attribute_tensors(model.graph):
+            self.__add_external_location(tensor)
+        return model
+
+    def __add_external_location(self, tensor: onnx.TensorProto):
+        '''
+        Add external data location of tensor, if any.
+        '''
+        if onnx.external_data_helper.uses_external_data(tensor):
+            self.__external_locations.add(
+                onnx.external_data_helper.ExternalDataInfo(tensor).location)
+
+    def get_external_data_locations(self) -> list[str]:
+        '''
+        Get external data file locations, relative to the model directory.
+        '''
+        return sorted(self.__external_locations)
+
+    def get_initializer_names(self) -> set[str]:
+        '''
+        Get names of graph initializers.
+        '''
+        return {tensor.name for tensor in self.__initializers} | \
+            {tensor.name for tensor in self.model.graph.initializer}
+
+    def infer_shapes(self) -> onnx.ModelProto:
+        '''
+        Infer types and shapes of model graph, including outputs and symbolic dimensions.
+        Initializers are added without their data, except small ones.
+        '''
+        model = onnx.ModelProto()
+        model.CopyFrom(self.model)
+        model.graph.initializer.extend(self.__initializers)
+        return onnx.shape_inference.infer_shapes(model, data_prop=True)
+
+    def save(self, path: str):
+        '''
+        Save model to path. Initializers are copied verbatim from source file.
+        '''
+        header = onnx.ModelProto()
+        header.CopyFrom(self.model)
+        header.ClearField("graph")
+        graph_bytes = self.model.graph.SerializeToString()
+        graph_length = len(graph_bytes) + \
+            sum(end - start for start, end in self.__initializer_ranges)
+
+        with open(self.__path, "rb") as source, open(path, "wb") as destination:
+            destination.write(header.SerializeToString())
+            destination.write(_encode_varint((MODEL_GRAPH_FIELD << 3) | 2))
+            destination.write(_encode_varint(graph_length))
+            destination.write(graph_bytes)
+            for start, end in self.__initializer_ranges:
+                source.seek(start)
+                remaining = end - start
+                while remaining:
+                    chunk = source.read(min(remaining, 64 * 1024 * 1024))
+                    destination.write(chunk)
+                    remaining -= len(chunk)
+
+
+def set_dynamic_batch_dims(onnx_file: OnnxModelFile):
+    '''
+    Set fixed batch dimension of graph inputs and outputs to a symbolic dimension.
+    Model file is marked patched if any dimension is changed.
+    '''
+    # Graph inputs may list initializers in old IR versions. They are not model inputs
+    initializer_names = onnx_file.get_initializer_names()
+    graph = onnx_file.model.graph
+    graph_inputs = [
+        layer for layer in graph.input if layer.name not in initializer_names]
+
+    layers = list(enumerate(graph_inputs)) + list(enumerate(graph.output))
+    for i, layer in layers:
+        # Shape of undeclared outputs is inferred
+        if not layer.type.tensor_type.shape.dim:
+            continue
+        batch_dim = layer.type.tensor_type.shape.dim[0]
+        if not batch_dim.dim_param:
+            batch_dim.dim_param = f"{layer.name}_dynamic_axes_{i+1}"
+            onnx_file.patched = True
+
+
+def get_opset_version(onnx_model: onnx.ModelProto) -> int:
+    '''
+    Get default domain opset version of ONNX model.
+    '''
+    for opset in onnx_model.opset_import:
+        if opset.domain in ["", "ai.onnx"]:
+            return opset.version
+    raise ValueError("ONNX model has no default domain opset.")
+
+
+def get_tensor_dtype_string(elem_type: int) -> str:
+    '''
+    Get numpy data type string from ONNX tensor data type. Eg: 1 -> float32
+    '''
+    if elem_type == onnx.TensorProto.STRING:
+        return "string"
+    return np.dtype(helper.tensor_dtype_to_np_dtype(elem_type)).name
+
+
+def get_tensor_dtype(dtype: str) -> int:
+    '''
+    Get ONNX tensor data type from numpy data type string.
+    '''
+    return helper.np_dtype_to_tensor_dtype(np.dtype(dtype))
+
+
+def get_shape(dims: list) -> list:
+    '''
+    Get shape from ONNX tensor dims. Unknown dims are None.
+    '''
+    shape = []
+    for dim in dims:
+        if dim.dim_param:
+            shape.append(dim.dim_param)
+        elif dim.HasField("dim_value"):
+            shape.append(dim.dim_value)
+        else:
+            shape.append(None)
+    return shape
+
+
+class GraphBuilder:
+    '''
+    Graph Builder Class.
+    Used to append nodes and constants to an ONNX graph with unique names.
+    '''
+
+    def __init__(self, onnx_model: onnx.ModelProto, prefix: str):
+        self.__graph = onnx_model.graph
+        self.__opset = get_opset_version(onnx_model)
+        self.__prefix = prefix
+        self.__count = 0
+        self.nodes = []
+
+    def __name(self, name: str) -> str:
+        '''
+        Get unique tensor name.
+        '''
+        self.__count += 1
+        return f"{self.__prefix}_{name}_{self.__count}"
+
+    def constant(self, value: np.ndarray, name: str = "constant") -> str:
+        '''
+        Add constant initializer. Return its name.
+        '''
+        tensor_name = self.__name(name)
+        self.__graph.initializer.append(
+            numpy_helper.from_array(np.asarray(value), tensor_name))
+        return tensor_name
+
+    def node(self, op_type: str, inputs: list[str], output: str = None, **attributes) -> str:
+        '''
+        Add node with single output. Return its output name.
+        '''
+        output = output or self.__name(op_type.lower())
+        self.nodes.append(helper.make_node(
+            op_type, inputs, [output], name=self.__name(f"{op_type}_node"), **attributes))
+        return output
+
+    def reduce(self, op_type: str, x: str, axes: list[int], output: str = None) -> str:
+        '''
+        Add reduce node keeping dims.
+        Axes is an attribute before opset 18, an input since opset 18.
+        '''
+        if self.__opset >= 18:
+            return self.node(op_type, [x, self.constant(np.array(axes, dtype=np.int64), "axes")], output, keepdims=1)
+        return self.node(op_type, [x], output, axes=axes, keepdims=1)
+
+
+def rename_tensor(graph: onnx.GraphProto, old_name: str, new_name: str):
+    '''
+    Rename tensor in every node inputs and outputs of the graph.
+    '''
+    for node in graph.node:
+        for i, name in enumerate(node.input):
+            if name == old_name:
+                node.input[i] = new_name
+        for i, name in enumerate(node.output):
+            if name == old_name:
+                node.output[i] = new_name
+
+
+def fuse_preprocess(onnx_model: onnx.ModelProto, config: FusePreprocessConfig):
+    '''
+    Fuse preprocessing into the first input of the ONNX model.
+    The new input keeps the original name. Nodes in order:
+    Cast -> Div (scale) -> Sub (mean) -> Div (std) -> Transpose (layout).
+    '''
+    graph = onnx_model.graph
+    graph_input = graph.input[0]
+    input_name = graph_input.name
+    input_type = graph_input.type.tensor_type
+    float_dtype = helper.tensor_dtype_to_np_dtype(input_type.elem_type)
+
+    # Consume original input through the preprocessed tensor
+    preprocessed_name = f"{input_name}_preprocessed"
+    rename_tensor(graph, input_name, preprocessed_name)
+
+    builder = GraphBuilder(onnx_model, f"{input_name}_fuse_pre")
+    layout = config.get("layout", "nchw")
+    x = builder.node("Cast", [input_name], to=input_type.elem_type)
+
+    # Scale by max of each sample, or by a constant
+    scale = config.get("scale", None)
+    if scale == "max":
+        sample_max = builder.reduce(
+            "ReduceMax", x, list(range(1, len(input_type.shape.dim))))
+        # Guard against black images
+        sample_max = builder.node(
+            "Max", [sample_max, builder.constant(np.array(1, dtype=float_dtype))])
+        x = builder.node("Div", [x, sample_max])
+    elif scale is not None:
+        x = builder.node(
+            "Div", [x, builder.constant(np.array(scale, dtype=float_dtype))])
+
+    # Normalize each channel. Channel is the last axis in nhwc, axis 1 in nchw
+    channel_shape = (-1,) if layout == "nhwc" else (-1, 1, 1)
+    if "mean" in config:
+        mean = np.array(config["mean"], dtype=float_dtype).reshape(
+            channel_shape)
+        x = builder.node("Sub", [x, builder.constant(mean, "mean")])
+    if "std" in config:
+        std = np.array(config["std"], dtype=float_dtype).reshape(
+            channel_shape)
+        x = builder.node("Div", [x, builder.constant(std, "std")])
+
+    # Transpose to nchw
+    if layout == "nhwc":
+        x = builder.node("Transpose", [x], perm=[0, 3, 1, 2])
+    builder.node("Identity", [x], preprocessed_name)
+
+    # Replace graph input with the new data type and layout
+    dims = list(input_type.shape.dim)
+    if layout == "nhwc":
+        dims = [dims[0], *dims[2:], dims[1]]
+    new_input = helper.make_tensor_value_info(
+        input_name,
+        get_tensor_dtype(config.get("dtype", "uint8")),
+        get_shape(dims))
+    graph.input.remove(graph_input)
+    graph.input.insert(0, new_input)
+
+    # Prepend nodes, keep graph topologically sorted
+    nodes = builder.nodes + list(graph.node)
+    del graph.node[:]
+    graph.node.extend(nodes)
+
+
+def fuse_postprocess(onnx_model: onnx.ModelProto, config: FusePostprocessConfig):
+    '''
+    Fuse postprocessing into an output of the ONNX model.
+    Only the fused output is kept, with its original name. Nodes in order:
+    Gather (channel) -> Sub/Mul (min-max of each sample) -> Mul (scale) -> Cast.
+    '''
+    graph = onnx_model.graph
+    graph_output = graph.output[config.get("output", 0)]
+    output_name = graph_output.name
+    output_type = graph_output.type.tensor_type
+    float_dtype = helper.tensor_dtype_to_np_dtype(output_type.elem_type)
+
+    # Produce original output as the raw tensor
+    raw_name = f"{output_name}_raw"
+    rename_tensor(graph, output_name, raw_name)
+
+    builder = GraphBuilder(onnx_model, f"{output_name}_fuse_post")
+    x = raw_name
+    dims = list(output_type.shape.dim)
+
+    # Select channel on axis 1
+    if "channel" in config:
+        x = builder.node(
+            "Gather", [x, builder.constant(np.array(config["channel"], dtype=np.int64), "channel")], axis=1)
+        dims = [dims[0], *dims[2:]]
+
+    # Min-max normalize each sample: (x - min) * (scale / (max - min))
+    scale = np.array(config.get("scale", 1), dtype=float_dtype)
+    if config.get("normalize", None) == "minmax":
+        axes = list(range(1, len(dims)))
+        sample_min = builder.reduce("ReduceMin", x, axes)
+        sample_max = builder.reduce("ReduceMax", x, axes)
+        sample_range = builder.node("Sub", [sample_max, sample_min])
+        # Guard against division by zero on constant outputs
+        zero, one = builder.constant(np.array(0, dtype=float_dtype)), builder.constant(
+            np.array(1, dtype=float_dtype))
+        sample_range = builder.node(
+            "Where", [builder.node("Equal", [sample_range, zero]), one, sample_range])
+        x = builder.node("Sub", [x, sample_min])
+        x = builder.node(
+            "Mul", [x, builder.node("Div", [builder.constant(scale, "scale"), sample_range])])
+    elif "scale" in config:
+        x = builder.node("Mul", [x, builder.constant(scale, "scale")])
+
+    # Cast to output data type
+    elem_type = output_type.elem_type
+    if "dtype" in config:
+        elem_type = get_tensor_dtype(config["dtype"])
+        x = builder.node("Cast", [x], to=elem_type)
+    builder.node("Identity", [x], output_name)
+    graph.node.extend(builder.nodes)
+
+    # Keep only the fused output
+    new_output = helper.make_tensor_value_info(
+        output_name, elem_type, get_shape(dims))
+    del graph.output[:]
+    graph.output.append(new_output)
@@ -0,0 +1,296 @@
+'''
+Triton Server Build Support.
+----
+Author: Ming-doan
+Created: 2024-02-20
+----
+This module provides support for building Triton Server model repository
+and its configuration files.
+'''
+
+import os
+import glob
+import shutil
+import tempfile
+import numpy as np
+from _abstract import OptimizeConfig, QuantizeConfig
+from _utils import get_temporary_path
+
+
+# ONNX Runtime graph optimization levels
+ORT_OPTIMIZATION_LEVELS = {
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL"
+}
+# External initializers file of optimized models with external data
+OPTIMIZED_EXTERNAL_DATA_FILE = "model.optimized.data"
+QUANTIZED_EXTERNAL_DATA_FILE = "model.quantized.data"
+
+
+def import_onnxruntime():
+    '''
+    Import ONNX Runtime. Only required by optimize and quantize stages.
+    '''
+    try:
+        import onnxruntime
+    except ImportError as e:
+        raise ImportError(
+            "onnxruntime is required to optimize and quantize ONNX models. Install it with `pip install onnxruntime`.") from e
+    return onnxruntime
+
+
+def get_numpy_dtype(ort_type: str) -> str:
+    '''
+    Get numpy data type string from ONNX Runtime tensor type. Eg: tensor(float)
+    '''
+    dtype = ort_type[len("tensor("):-1]
+    if dtype == "float":
+        return "float32"
+    if dtype == "double":
+        return "float64"
+    if dtype == "string":
+        return "object"
+    return dtype
+
+
+def get_random_inputs(session, seed: int = 0, shapes: dict[str, list[int]] = None) -> dict[str, np.ndarray]:
+    '''
+    Generate random inputs for every session input. Dynamic dimensions are set to 1,
+    unless the input shape is given.
+    '''
+    rng = np.random.default_rng(seed)
+    inputs = {}
+    for node in session.get_inputs():
+        if shapes and node.name in shapes:
+            shape = shapes[node.name]
+        else:
+            shape = [dim if isinstance(dim, int) and dim > 0 else 1 for dim in node.shape]
+        dtype = np.dtype(get_numpy_dtype(node.type))
+        if dtype == np.uint8:
+            inputs[node.name] = rng.integers(0, 256, shape, dtype=dtype)
+        elif dtype == np.bool_:
+            inputs[node.name] = rng.integers(0, 2, shape).astype(dtype)
+        elif np.issubdtype(dtype, np.integer):
+            inputs[node.name] = rng.integers(0, 2, shape, dtype=dtype)
+        elif np.issubdtype(dtype, np.floating):
+            inputs[node.name] = rng.random(shape).astype(dtype)
+        else:
+            inputs[node.name] = np.full(shape, "", dtype=dtype)
+    return inputs
+
+
+def create_session(path: str):
+    '''
+    Create CPU inference session without graph optimizations.
+    '''
+    ort = import_onnxruntime()
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+    return ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+
+def check_model_outputs(reference_path: str, path: str, tolerance: float):
+    '''
+    Run both models on the same random inputs.
+    Raise error if outputs drift past tolerance.
+    '''
+    reference_session = create_session(reference_path)
+    session = create_session(path)
+
+    inputs = get_random_inputs(reference_session)
+    reference_outputs = reference_session.run(None, inputs)
+    outputs = session.run(None, inputs)
+
+    for node, reference, output in zip(reference_session.get_outputs(), reference_outputs, outputs):
+        if reference.dtype == object:
+            if not np.array_equal(reference, output):
+                raise ValueError(f"Output {node.name} does not match.")
+            continue
+        reference = reference.astype(np.float64)
+        output = output.astype(np.float64)
+        if not np.allclose(output, reference, rtol=tolerance, atol=tolerance):
+            raise ValueError(
+                f"Output {node.name} drifts past tolerance {tolerance}. Max absolute difference: {np.abs(output - reference).max()}")
+
+
+def compare_model_outputs(reference_path: str, path: str, samples: list[dict[str, np.ndarray]]) -> dict[str, tuple[float, float]]:
+    '''
+    Run both models on samples.
+    Return max and mean absolute difference of each numeric output.
+    '''
+    reference_session = create_session(reference_path)
+    session = create_session(path)
+
+    differences: dict[str, list[np.ndarray]] = {}
+    for inputs in samples:
+        reference_outputs = reference_session.run(None, inputs)
+        outputs = session.run(None, inputs)
+        for node, reference, output in zip(reference_session.get_outputs(), reference_outputs, outputs):
+            if reference.dtype == object:
+                continue
+            differences.setdefault(node.name, []).append(np.abs(
+                output.astype(np.float64) - reference.astype(np.float64)).ravel())
+
+    return {
+        name: (float(np.concatenate(values).max()), float(np.concatenate(values).mean()))
+        for name, values in differences.items()
+    }
+
+
+def get_calibration_samples(directory: str, session) -> list[dict[str, np.ndarray]]:
+    '''
+    Load calibration samples from `.npy` files. Each file is a sample of the model input.
+    Batch axis is added if missing.
+    '''
+    files = sorted(glob.glob(os.path.join(directory, "*.npy")))
+    if not files:
+        raise ValueError(f"No `.npy` calibration files found in {directory}.")
+
+    nodes = session.get_inputs()
+    if len(nodes) != 1:
+        raise ValueError(
+            "Calibration with `.npy` files requires a model with a single input.")
+    node = nodes[0]
+
+    samples = []
+    for file in files:
+        sample = np.load(file).astype(get_numpy_dtype(node.type))
+        if sample.ndim == len(node.shape) - 1:
+            sample = sample[np.newaxis]
+        samples.append({node.name: sample})
+    return samples
+
+
+def get_model_size(path: str) -> int:
+    '''
+    Get size of model directory files in bytes, including external data.
+    '''
+    directory = os.path.dirname(path)
+    return sum(os.path.getsize(os.path.join(directory, file)) for file in os.listdir(directory)
+               if os.path.isfile(os.path.join(directory, file)))
+
+
+def optimize_model(path: str, config: OptimizeConfig, external_data: bool = False):
+    '''
+    Optimize ONNX model in place with ONNX Runtime offline graph optimizer.
+    Optimized model is checked against the original before it replaces it.
+    '''
+    ort = import_onnxruntime()
+    temporary_path = get_temporary_path(path)
+
+    # Save optimized model to temporary path
+    options = ort.SessionOptions()
+    options.graph_optimization_level = getattr(
+        ort.GraphOptimizationLevel, ORT_OPTIMIZATION_LEVELS[config["level"]])
+    options.optimized_model_filepath = temporary_path
+    # Models larger than 2GB must store initializers externally
+    if external_data:
+        options.add_session_config_entry(
+            "session.optimized_model_external_initializers_file_name", OPTIMIZED_EXTERNAL_DATA_FILE)
+        options.add_session_config_entry(
+            "session.optimized_model_external_initializers_min_size_in_bytes", "1024")
+    ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+    # Check numerical drift of optimized model
+    try:
+        check_model_outputs(path, temporary_path,
+                            config.get("tolerance", 1e-3))
+    except Exception:
+        os.remove(temporary_path)
+        raise
+
+    os.replace(temporary_path, path)
+
+
+def quantize_model(source_path: str, path: str, config: QuantizeConfig, external_data: bool = False) -> str:
+    '''
+    Quantize ONNX model to path, with INT8 (dynamic or static) or FP16 weights.
+    Other files of the quantized version directory are removed.
+    Return report of size and accuracy differences against the source model.
+    '''
+    import_onnxruntime()
+    from onnxruntime import quantization
+    directory = os.path.dirname(path)
+
+    # Load samples. Calibration samples are also used for accuracy report
+    source_session = create_session(source_path)
+    if "calibration" in config:
+        samples = get_calibration_samples(
+            config["calibration"], source_session)
+    else:
+        samples = [get_random_inputs(source_session)]
+
+    # Quantize into temporary directory. ONNX Runtime names external data after the output file
+    temporary_directory = tempfile.mkdtemp(prefix=".quantize.", dir=directory)
+    temporary_path = os.path.join(temporary_directory, "model.onnx")
+    try:
+        # Dynamic INT8. Activations are quantized at runtime
+        if config["mode"] == "dynamic":
+            quantization.quantize_dynamic(
+                source_path, temporary_path, weight_type=quantization.QuantType.QUInt8,
+                use_external_data_format=external_data)
+
+        # Static INT8. Activations ranges are calibrated on samples
+        elif config["mode"] == "static":
+            class CalibrationReader(quantization.CalibrationDataReader):
+                def __init__(self):
+                    self.__samples = iter(samples)
+
+                def get_next(self):
+                    return next(self.__samples, None)
+
+            quantization.quantize_static(
+                source_path, temporary_path, CalibrationReader(),
+                quant_format=quantization.QuantFormat.QDQ,
+                activation_type=quantization.QuantType.QUInt8,
+                weight_type=quantization.QuantType.QInt8,
+                use_external_data_format=external_data)
+
+        # FP16 weights. Inputs and outputs keep their data types
+        else:
+            import onnx
+            from onnxruntime.transformers.float16 import convert_float_to_float16
+            model = convert_float_to_float16(
+                onnx.load(source_path), keep_io_types=True)
+            onnx.save(model, temporary_path, save_as_external_data=external_data,
+                      location=QUANTIZED_EXTERNAL_DATA_FILE)
+
+        # Save INT8 external data with a fixed location
+        if external_data and config["mode"] != "fp16":
+            import onnx
+            model = onnx.load(temporary_path)
+            temporary_path = os.path.join(
+                temporary_directory, "model.quantized.onnx")
+            onnx.save(model, temporary_path, save_as_external_data=True,
+                      location=QUANTIZED_EXTERNAL_DATA_FILE)
+
+        # Move external data before the model
+        data_path = os.path.join(
+            temporary_directory, QUANTIZED_EXTERNAL_DATA_FILE)
+        if external_data and os.path.exists(data_path):
+            os.replace(data_path, os.path.join(
+                directory, QUANTIZED_EXTERNAL_DATA_FILE))
+        os.replace(temporary_path, path)
+    finally:
+        shutil.rmtree(temporary_directory, ignore_errors=True)
+
+    # Remove stale files of previous builds, eg: external data of a non external data model
+    files = [os.path.basename(path)]
+    if external_data:
+        files.append(QUANTIZED_EXTERNAL_DATA_FILE)
+    for file in os.listdir(directory):
+        if file not in files:
+            file_path = os.path.join(directory, file)
+            if os.path.isdir(file_path):
+                shutil.rmtree(file_path)
+            else:
+                os.remove(file_path)
+
+    # Report size and accuracy differences
+    source_size = get_model_size(source_path)
+    size = get_model_size(path)
+    report = f"Quantized model ({config['mode']}): {source_size / 1e6:.2f} MB -> {size / 1e6:.2f} MB ({(size - source_size) / source_size * 100:+.1f}%)."
+    for name, (max_difference, mean_difference) in compare_model_outputs(source_path, path, samples).items():
+        report += f" Output {name}: max abs diff {max_difference:.6f}, mean abs diff {mean_difference:.6f}."
+    return report
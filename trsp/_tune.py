@@ -0,0 +1,228 @@
+'''
+Triton Server Build Support.
+----
+Author: Ming-doan
+Created: 2024-02-20
+----
+This module provides support for building Triton Server model repository
+and its configuration files.
+'''
+
+import os
+import time
+import numpy as np
+from _abstract import ModelConfig, TuneConfig
+from _utils import get_cpu_count, get_temporary_path
+from _onnx_graph import OnnxModelFile, set_dynamic_batch_dims
+from _onnx_runtime import import_onnxruntime, get_random_inputs
+
+
+# Default sweep of batch sizes
+DEFAULT_BATCH_SIZES = [1, 2, 4, 8, 16, 32, 64]
+# Default number of timed runs of each measurement
+DEFAULT_ITERATIONS = 20
+# Untimed runs before each measurement. First runs allocate memory
+WARMUP_ITERATIONS = 2
+
+
+def get_thread_counts(cpu_count: int) -> list[int]:
+    '''
+    Get default sweep of thread counts. Powers of 2 up to CPU count.
+    '''
+    thread_counts = [1]
+    while thread_counts[-1] * 2 <= cpu_count:
+        thread_counts.append(thread_counts[-1] * 2)
+    if thread_counts[-1] != cpu_count:
+        thread_counts.append(cpu_count)
+    return thread_counts
+
+
+def get_tune_model_path(model_repository: str, name: str, model_config: ModelConfig) -> str:
+    '''
+    Get path of built model of latest version. It includes fused, optimized and batching changes.
+    Raise error if model is not built.
+    '''
+    version = max(model_config["versions"], key=lambda v: v["version"])
+    path = os.path.join(model_repository, name,
+                        str(version["version"]), "model.onnx")
+    if not os.path.isfile(path):
+        raise ValueError(
+            f"Model {name} is not built. Build model repository before tuning: {path}.")
+    return path
+
+
+def create_tune_session(path: str, threads: int):
+    '''
+    Create CPU inference session with the same session options written by `onnxruntime` config.
+    '''
+    ort = import_onnxruntime()
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    options.inter_op_num_threads = 1
+    options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    return ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+
+def get_input_shapes(session, batch_size: int, batched: bool, dims: dict[str, list[int]]) -> dict[str, list[int]]:
+    '''
+    Get input shapes of batch. Dynamic dimensions are set to 1, unless given in `dims`.
+    '''
+    shapes = {}
+    for node in session.get_inputs():
+        shape = node.shape[1:] if batched else node.shape
+        if node.name in dims:
+            shape = dims[node.name]
+        shape = [dim if isinstance(dim, int) and dim > 0 else 1 for dim in shape]
+        shapes[node.name] = [batch_size] + shape if batched else shape
+    return shapes
+
+
+def measure_latency(session, inputs: dict[str, np.ndarray], iterations: int) -> tuple[float, float]:
+    '''
+    Run session on inputs. Return mean and p99 latency in milliseconds.
+    '''
+    for _ in range(WARMUP_ITERATIONS):
+        session.run(None, inputs)
+
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        session.run(None, inputs)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.mean(latencies)), float(np.percentile(latencies, 99))
+
+
+def sweep_model(path: str, model_config: ModelConfig) -> list[dict]:
+    '''
+    Measure latency of model for each thread count and batch size.
+    Throughput is estimated for all instances sharing CPU cores of the node.
+    Larger batches are skipped once p99 latency exceeds the budget.
+    '''
+    tune: TuneConfig = model_config["tune"]
+    cpu_count = get_cpu_count()
+    batched = model_config["max_batch_size"] > 0
+    batch_sizes = sorted(tune.get("batch_sizes", DEFAULT_BATCH_SIZES)
+                         ) if batched else [1]
+    thread_counts = sorted(tune.get("thread_counts",
+                           get_thread_counts(cpu_count)))
+
+    # Batch dimension of built model is fixed if dynamic batching is not enabled yet.
+    # Tune a copy with dynamic batch dimension, as written by the build
+    temporary_path = None
+    if batched:
+        onnx_file = OnnxModelFile(path)
+        set_dynamic_batch_dims(onnx_file)
+        if onnx_file.patched:
+            temporary_path = get_temporary_path(path)
+            onnx_file.save(temporary_path)
+
+    measurements = []
+    try:
+        for threads in thread_counts:
+            session = create_tune_session(temporary_path or path, threads)
+            instances = max(cpu_count // threads, 1)
+            for batch_size in batch_sizes:
+                inputs = get_random_inputs(session, shapes=get_input_shapes(
+                    session, batch_size, batched, tune.get("dims", {})))
+                mean, p99 = measure_latency(
+                    session, inputs, tune.get("iterations", DEFAULT_ITERATIONS))
+                measurements.append({
+                    "threads": threads,
+                    "instances": instances,
+                    "batch_size": batch_size,
+                    "mean": mean,
+                    "p99": p99,
+                    "throughput": instances * batch_size / mean * 1000
+                })
+                if p99 > tune["latency_budget_ms"]:
+                    break
+    finally:
+        if temporary_path is not None:
+            os.remove(temporary_path)
+    return measurements
+
+
+def get_recommendation(model_config: ModelConfig, measurements: list[dict]) -> dict:
+    '''
+    Get model configuration with the best estimated throughput within latency budget.
+    '''
+    budget = model_config["tune"]["latency_budget_ms"]
+    feasible = [m for m in measurements if m["p99"] <= budget]
+    if not feasible:
+        fastest = min(measurements, key=lambda m: m["p99"])
+        raise ValueError(
+            f"No configuration meets latency budget {budget} ms. Lowest p99 latency: {fastest['p99']:.2f} ms (threads: {fastest['threads']}, batch size: {fastest['batch_size']}).")
+
+    # Prefer smaller batches and fewer threads on equal throughput
+    best = max(feasible, key=lambda m: (
+        m["throughput"], -m["batch_size"], -m["threads"]))
+    recommendation = {
+        "instance_group": [{"kind": "cpu", "count": best["instances"]}],
+        "onnxruntime": {
+            "intra_op_thread_count": best["threads"],
+            "inter_op_thread_count": 1
+        }
+    }
+    if model_config["max_batch_size"] == 0:
+        return recommendation
+
+    # Largest batch within budget. Requests wait in queue while the rest
+    # of the budget is left after running it
+    largest = max((m for m in feasible if m["threads"] == best["threads"]),
+                  key=lambda m: m["batch_size"])
+    recommendation["max_batch_size"] = largest["batch_size"]
+    recommendation["dynamic_batching"] = {
+        "max_queue_delay_microseconds": int((budget - largest["p99"]) * 1000)
+    }
+    if best["batch_size"] > 1:
+        recommendation["dynamic_batching"]["preferred_batch_size"] = [
+            best["batch_size"]]
+    return recommendation
+
+
+def apply_recommendation(model_config: ModelConfig, recommendation: dict) -> list[str]:
+    '''
+    Write recommended settings into model configuration.
+    Return fields which are not written.
+    '''
+    skipped = []
+    if "max_batch_size" in recommendation:
+        model_config["max_batch_size"] = recommendation["max_batch_size"]
+        # Queue delay is moved into the dynamic batching dictionary
+        dynamic_batching = model_config.get("dynamic_batching")
+        if not isinstance(dynamic_batching, dict):
+            dynamic_batching = {}
+        dynamic_batching.pop("preferred_batch_size", None)
+        dynamic_batching.update(recommendation["dynamic_batching"])
+        model_config["dynamic_batching"] = dynamic_batching
+        model_config.pop("max_queue_delay_microseconds", None)
+
+    # Instances are tuned on CPU. Groups of other kinds are kept
+    if all(group["kind"] == "cpu" for group in model_config.get("instance_group", [])):
+        model_config["instance_group"] = recommendation["instance_group"]
+    else:
+        skipped.append("instance_group")
+
+    model_config["onnxruntime"] = {
+        **model_config.get("onnxruntime", {}), **recommendation["onnxruntime"]}
+    return skipped
+
+
+def format_report(name: str, path: str, measurements: list[dict], recommendation: dict) -> str:
+    '''
+    Format measurements and recommendation of model as text report.
+    '''
+    report = f"Model {name} ({path}):\n"
+    report += f"  {'threads':>8} {'instances':>10} {'batch':>6} {'mean ms':>10} {'p99 ms':>10} {'infer/s':>10}\n"
+    for m in measurements:
+        report += f"  {m['threads']:>8} {m['instances']:>10} {m['batch_size']:>6} {m['mean']:>10.2f} {m['p99']:>10.2f} {m['throughput']:>10.1f}\n"
+
+    report += "  Recommendation:\n"
+    if "max_batch_size" in recommendation:
+        report += f"    max_batch_size: {recommendation['max_batch_size']}\n"
+        for key, value in recommendation["dynamic_batching"].items():
+            report += f"    dynamic_batching.{key}: {value}\n"
+    report += f"    instance_group: cpu x {recommendation['instance_group'][0]['count']}\n"
+    for key, value in recommendation["onnxruntime"].items():
+        report += f"    onnxruntime.{key}: {value}\n"
+    return report
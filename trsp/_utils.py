@@ -9,7 +9,11 @@ and its configuration files.
 '''
 
 import os
-from _abstract import TritonEnum, PythonModuleConfig, FormatedTritonConfig, FormatedInputOutputTensors
+import re
+import ast
+import builtins
+import shutil
+from _abstract import TritonEnum, ModelConfig, InstanceGroupConfig, VersionConfig, EnsembleStepConfig, QueuePolicyConfig, SequenceBatchingConfig, PythonModuleConfig, FormatedTritonConfig, FormatedInputOutputTensors, FormatedTensors
 from _constants import TRITON_PRESEVED_KEYWORDS
 
 
@@ -38,19 +42,404 @@ def get_absolute_path(path: str) -> str:
     return os.path.join(os.getcwd(), path)
 
 
+def get_temporary_path(path: str) -> str:
+    '''
+    Get temporary path next to path, used to write files atomically.
+    '''
+    directory, filename = os.path.split(path)
+    return os.path.join(directory, f".{filename}.{os.getpid()}.tmp")
+
+
+def write_file(path: str, content: str):
+    '''
+    Write text file atomically. Readers never see a half-written file.
+    '''
+    temporary_path = get_temporary_path(path)
+    with open(temporary_path, "w") as f:
+        f.write(content)
+    os.replace(temporary_path, path)
+
+
+def link_or_copy_file(source: str, destination: str, hardlink: bool = True):
+    '''
+    Hardlink file to destination, avoid duplicating large weight files.
+    Fall back to reflink (copy-on-write), then to a regular copy.
+    Destination is replaced atomically.
+    '''
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    temporary_path = get_temporary_path(destination)
+    if os.path.lexists(temporary_path):
+        os.remove(temporary_path)
+
+    def __link_or_copy():
+        # Hardlink. Source and destination must be on the same filesystem
+        if hardlink:
+            try:
+                os.link(source, temporary_path)
+                return
+            except OSError:
+                pass
+
+        # Reflink. Linux only, on filesystems supporting FICLONE (btrfs, xfs)
+        try:
+            import fcntl
+            with open(source, "rb") as src, open(temporary_path, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), 0x40049409, src.fileno())
+            return
+        except (ImportError, OSError):
+            pass
+
+        shutil.copyfile(source, temporary_path)
+
+    __link_or_copy()
+    os.replace(temporary_path, destination)
+
+
+def get_quantize_versions(model_config: ModelConfig) -> tuple[int, int]:
+    '''
+    Get source version and version of the quantized model.
+    Default source is the latest version, quantized version is the next one.
+    '''
+    versions = [version["version"] for version in model_config["versions"]]
+    quantize = model_config["quantize"]
+    return quantize.get("source_version", max(versions)), quantize.get("version", max(versions) + 1)
+
+
+def get_cpu_count() -> int:
+    '''
+    Get number of CPU cores of the serving node.
+    Use TRSP_CPU_COUNT environment variable if the build machine is not the serving node.
+    '''
+    if os.environ.get("TRSP_CPU_COUNT"):
+        return int(os.environ["TRSP_CPU_COUNT"])
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def get_instance_count(model_config: ModelConfig, group: InstanceGroupConfig) -> int:
+    '''
+    Get number of instances of group. Triton creates 1 instance by default.
+    Count `auto` is one instance per intra-op thread count of CPU cores.
+    '''
+    count = group.get("count", 1)
+    if count != "auto":
+        return count
+
+    threads = model_config.get("onnxruntime", {}).get(
+        "intra_op_thread_count", 1)
+    if not isinstance(threads, int) or threads <= 0:
+        threads = 1
+    return max(get_cpu_count() // threads, 1)
+
+
+def get_cpu_instance_count(model_config: ModelConfig) -> int:
+    '''
+    Get total number of CPU instances of model.
+    '''
+    count = 0
+    for group in model_config.get("instance_group", []):
+        if group["kind"] == "cpu":
+            count += get_instance_count(model_config, group)
+    return max(count, 1)
+
+
+def is_dynamic_batching(model_config: ModelConfig) -> bool:
+    '''
+    Check if dynamic batching is enabled. It is a boolean or a scheduler dictionary.
+    '''
+    dynamic_batching = model_config.get("dynamic_batching", False)
+    if isinstance(dynamic_batching, dict):
+        return True
+    return bool(dynamic_batching)
+
+
+def get_queue_policy(policy: QueuePolicyConfig) -> dict:
+    '''
+    Get queue policy config for Triton Server config.pbtxt file.
+    '''
+    config = {}
+    if "timeout_action" in policy:
+        config["timeout_action"] = TritonEnum(policy["timeout_action"].upper())
+    if "default_timeout_microseconds" in policy:
+        config["default_timeout_microseconds"] = policy["default_timeout_microseconds"]
+    if "allow_timeout_override" in policy:
+        config["allow_timeout_override"] = TritonEnum(
+            str(policy["allow_timeout_override"]).lower())
+    if "max_queue_size" in policy:
+        config["max_queue_size"] = policy["max_queue_size"]
+    return config
+
+
+def get_dynamic_batching(model_config: ModelConfig) -> dict:
+    '''
+    Get dynamic batching scheduler config for Triton Server config.pbtxt file.
+    '''
+    dynamic_batching = model_config["dynamic_batching"]
+    if not isinstance(dynamic_batching, dict):
+        dynamic_batching = {}
+
+    config = {}
+    if "preferred_batch_size" in dynamic_batching:
+        config["preferred_batch_size"] = dynamic_batching["preferred_batch_size"]
+
+    # Queue delay can also be set on the model, for backward compatibility
+    if "max_queue_delay_microseconds" in dynamic_batching:
+        config["max_queue_delay_microseconds"] = dynamic_batching["max_queue_delay_microseconds"]
+    elif "max_queue_delay_microseconds" in model_config:
+        config["max_queue_delay_microseconds"] = model_config["max_queue_delay_microseconds"]
+
+    if "preserve_ordering" in dynamic_batching:
+        config["preserve_ordering"] = TritonEnum(
+            str(dynamic_batching["preserve_ordering"]).lower())
+    if "priority_levels" in dynamic_batching:
+        config["priority_levels"] = dynamic_batching["priority_levels"]
+    if "default_priority_level" in dynamic_batching:
+        config["default_priority_level"] = dynamic_batching["default_priority_level"]
+    if "default_queue_policy" in dynamic_batching:
+        config["default_queue_policy"] = get_queue_policy(
+            dynamic_batching["default_queue_policy"])
+    if "priority_queue_policy" in dynamic_batching:
+        config["priority_queue_policy"] = [
+            {"key": int(level), "value": get_queue_policy(policy)}
+            for level, policy in dynamic_batching["priority_queue_policy"].items()
+        ]
+    return config
+
+
+def is_sequence_batching(model_config: ModelConfig) -> bool:
+    '''
+    Check if sequence batching is enabled. It is a boolean or a scheduler dictionary.
+    '''
+    sequence_batching = model_config.get("sequence_batching", False)
+    if isinstance(sequence_batching, dict):
+        return True
+    return bool(sequence_batching)
+
+
+def get_sequence_batching_config(model_config: ModelConfig) -> SequenceBatchingConfig:
+    '''
+    Get sequence batching scheduler dictionary. Boolean is an empty dictionary.
+    '''
+    sequence_batching = model_config["sequence_batching"]
+    if not isinstance(sequence_batching, dict):
+        return {}
+    return sequence_batching
+
+
+def get_sequence_control_name(model_config: ModelConfig, kind: str) -> str:
+    '''
+    Get name of sequence control input of kind. Return None if not provided.
+    '''
+    for control_input in get_sequence_batching_config(model_config).get("control_input", []):
+        if control_input["kind"] == kind:
+            return control_input["name"]
+    return None
+
+
+def get_sequence_state_names(model_config: ModelConfig) -> set[str]:
+    '''
+    Get names of implicit state tensors. They are not model inputs and outputs.
+    '''
+    if not is_sequence_batching(model_config):
+        return set()
+    names = set()
+    for state in get_sequence_batching_config(model_config).get("state", []):
+        names.update([state["input_name"], state["output_name"]])
+    return names
+
+
+def get_sequence_batching(model_config: ModelConfig) -> dict:
+    '''
+    Get sequence batching scheduler config for Triton Server config.pbtxt file.
+    '''
+    sequence_batching = get_sequence_batching_config(model_config)
+
+    config = {}
+    if "max_sequence_idle_microseconds" in sequence_batching:
+        config["max_sequence_idle_microseconds"] = sequence_batching["max_sequence_idle_microseconds"]
+
+    # Control inputs. Start, end and ready are false/true flags
+    if "control_input" in sequence_batching:
+        config["control_input"] = []
+        for control_input in sequence_batching["control_input"]:
+            control = {
+                "kind": TritonEnum(f"CONTROL_SEQUENCE_{control_input['kind'].upper()}")
+            }
+            if control_input["kind"] == "corrid":
+                control["data_type"] = get_dtype_string(
+                    control_input.get("data_type", "uint64"))
+            elif control_input.get("data_type", "int32") == "float32":
+                control["fp32_false_true"] = [0, 1]
+            elif control_input.get("data_type", "int32") == "bool":
+                control["bool_false_true"] = TritonEnum("[false, true]")
+            else:
+                control["int32_false_true"] = [0, 1]
+            config["control_input"].append({
+                "name": control_input["name"],
+                "control": [control]
+            })
+
+    # Implicit state tensors. Initial state is zero data
+    if "state" in sequence_batching:
+        config["state"] = []
+        for state in sequence_batching["state"]:
+            state_config = {
+                "input_name": state["input_name"],
+                "output_name": state["output_name"],
+                "data_type": get_dtype_string(state["data_type"]),
+                "dims": TritonEnum(state["dims"])
+            }
+            if "initial_state" in state:
+                state_config["initial_state"] = {
+                    "name": f"{state['input_name']}_initial_state",
+                    "data_type": get_dtype_string(state["data_type"]),
+                    "dims": TritonEnum(state["initial_state"]["dims"]),
+                    "zero_data": TritonEnum("true")
+                }
+            config["state"].append(state_config)
+
+    # Strategy of scheduling sequences into batch slots
+    strategy = {}
+    if "max_queue_delay_microseconds" in sequence_batching:
+        strategy["max_queue_delay_microseconds"] = sequence_batching["max_queue_delay_microseconds"]
+    if "minimum_slot_utilization" in sequence_batching:
+        strategy["minimum_slot_utilization"] = TritonEnum(
+            str(sequence_batching["minimum_slot_utilization"]))
+    if "max_candidate_sequences" in sequence_batching:
+        strategy["max_candidate_sequences"] = sequence_batching["max_candidate_sequences"]
+    if "preferred_batch_size" in sequence_batching:
+        strategy["preferred_batch_size"] = sequence_batching["preferred_batch_size"]
+    if "preserve_ordering" in sequence_batching:
+        strategy["preserve_ordering"] = TritonEnum(
+            str(sequence_batching["preserve_ordering"]).lower())
+    config[sequence_batching.get("strategy", "direct")] = strategy
+    return config
+
+
+def get_batch_inputs(model_config: ModelConfig) -> list[dict]:
+    '''
+    Get batch_input config for Triton Server config.pbtxt file.
+    '''
+    batch_inputs = []
+    for batch_input in model_config["batch_input"]:
+        target_name = batch_input["target_name"]
+        config = {
+            "kind": TritonEnum(batch_input["kind"].upper()),
+            "target_name": target_name if isinstance(target_name, list) else [target_name],
+            "data_type": get_dtype_string(batch_input["data_type"])
+        }
+        # Element count kind has no source input
+        if "source_input" in batch_input:
+            source_input = batch_input["source_input"]
+            config["source_input"] = source_input if isinstance(
+                source_input, list) else [source_input]
+        batch_inputs.append(config)
+    return batch_inputs
+
+
+def get_batch_outputs(model_config: ModelConfig) -> list[dict]:
+    '''
+    Get batch_output config for Triton Server config.pbtxt file.
+    '''
+    batch_outputs = []
+    for batch_output in model_config["batch_output"]:
+        target_name = batch_output["target_name"]
+        source_input = batch_output["source_input"]
+        batch_outputs.append({
+            "target_name": target_name if isinstance(target_name, list) else [target_name],
+            "kind": TritonEnum(batch_output.get("kind", "batch_scatter_with_input_shape").upper()),
+            "source_input": source_input if isinstance(source_input, list) else [source_input]
+        })
+    return batch_outputs
+
+
+def get_onnxruntime_parameters(model_config: ModelConfig) -> tuple[list[dict], dict]:
+    '''
+    Get ONNX Runtime backend parameters and optimization config.
+    Thread count `auto` divides CPU cores across CPU instances.
+    '''
+    session = model_config["onnxruntime"]
+    parallel = session.get("execution_mode", "sequential") == "parallel"
+    auto_thread_count = max(
+        get_cpu_count() // get_cpu_instance_count(model_config), 1)
+
+    # Resolve values of backend parameters
+    values = {}
+    if "intra_op_thread_count" in session:
+        threads = session["intra_op_thread_count"]
+        values["intra_op_thread_count"] = auto_thread_count if threads == "auto" else threads
+    if "inter_op_thread_count" in session:
+        threads = session["inter_op_thread_count"]
+        if threads == "auto":
+            threads = auto_thread_count if parallel else 1
+        values["inter_op_thread_count"] = threads
+    if "execution_mode" in session:
+        values["execution_mode"] = 1 if parallel else 0
+    if "enable_mem_arena" in session:
+        values["enable_mem_arena"] = int(session["enable_mem_arena"])
+    if "enable_mem_pattern" in session:
+        values["enable_mem_pattern"] = int(session["enable_mem_pattern"])
+    if session.get("memory_arena_shrinkage", False):
+        values["memory.enable_memory_arena_shrinkage"] = "cpu:0"
+
+    parameters = [
+        {"key": key, "value": {"string_value": str(value)}}
+        for key, value in values.items()
+    ]
+
+    # Graph optimization level. Triton uses -1 for basic, 1 for extended, 0 for all
+    optimization = {}
+    if "graph_optimization_level" in session:
+        optimization = {
+            "graph": {
+                "level": {"basic": -1, "extended": 1, "all": 0}[session["graph_optimization_level"]]
+            }
+        }
+
+    return parameters, optimization
+
+
+def get_step_version(step: EnsembleStepConfig) -> int:
+    '''
+    Get model version of ensemble step. Version `latest` is -1.
+    '''
+    if step["version"] == "latest":
+        return -1
+    if isinstance(step["version"], int):
+        return step["version"]
+    raise ValueError(
+        f"Model version {step['version']} is not valid. Must be an integer or 'latest'.")
+
+
+def get_topological_order(dependencies: list[set[int]]) -> list[int]:
+    '''
+    Get order of nodes so each node is placed after its dependencies.
+    Nodes in a cycle are not included.
+    '''
+    remaining = [set(nodes) for nodes in dependencies]
+    ready = [node for node, nodes in enumerate(remaining) if not nodes]
+    order = []
+    while ready:
+        node = ready.pop(0)
+        order.append(node)
+        for next_node, nodes in enumerate(remaining):
+            if node in nodes:
+                nodes.discard(node)
+                if not nodes:
+                    ready.append(next_node)
+    return order
+
+
 def dictionary_to_string(dictionary: FormatedTritonConfig, indent: int = 0, tab: int = 2) -> str:
     '''
     Convert dictionary to pretty string.
     '''
     def __get_special_key(key: str) -> str:
-        if "input_map" in key:
-            return "input_map"
-        if "output_map" in key:
-            return "output_map"
-        if "input" in key:
-            return "input"
-        if "output" in key:
-            return "output"
+        # Repeated fields are stored with an index suffix. Eg: input_1, input_map_2
+        match = re.fullmatch(r"(input_map|output_map|input|output)_\d+", key)
+        if match:
+            return match.group(1)
         return key
 
     string = ""
@@ -61,6 +450,12 @@ def dictionary_to_string(dictionary: FormatedTritonConfig, indent: int = 0, tab:
             string += f"{' '*indent}{__get_special_key(key)}: {value}\n"
         if isinstance(value, TritonEnum):
             string += f"{' '*indent}{__get_special_key(key)}: {value}\n"
+        # Repeated scalar fields are written inline. Eg: gpus: [0, 1]
+        if isinstance(value, list) and not any(isinstance(item, dict) for item in value):
+            items = [f"\"{item}\"" if isinstance(item, str) else str(item)
+                     for item in value]
+            string += f"{' '*indent}{__get_special_key(key)}: [{', '.join(items)}]\n"
+            continue
         if isinstance(value, list):
             string += f"{' '*indent}{__get_special_key(key)} [\n"
             for i, item in enumerate(value):
@@ -82,13 +477,73 @@ def dictionary_to_string(dictionary: FormatedTritonConfig, indent: int = 0, tab:
     return string
 
 
+def get_dims_list(dims: TritonEnum) -> list[int]:
+    '''
+    Get dims list from tensor config dims. Eg: [-1, 3]
+    '''
+    if isinstance(dims, list):
+        return dims
+    return [int(dim) for dim in str(dims).strip("[]").split(",") if dim.strip()]
+
+
+def get_warmup_dims(model_config: ModelConfig, tensor: FormatedTensors) -> list[int]:
+    '''
+    Get dims of warmup input, without batch dimension.
+    Variable dimensions are 1, unless given in warmup `dims`.
+    '''
+    dims = model_config["warmup"].get("dims", {})
+    if tensor["name"] in dims:
+        return dims[tensor["name"]]
+    return [dim if dim > 0 else 1 for dim in get_dims_list(tensor["dims"])]
+
+
+def get_warmup_batch_sizes(model_config: ModelConfig) -> list[int]:
+    '''
+    Get warmup batch sizes. Models without batching are warmed up with batch size 1.
+    '''
+    if model_config["max_batch_size"] == 0:
+        return [1]
+    return model_config["warmup"].get("batch_sizes", [1])
+
+
+def get_model_warmup(model_config: ModelConfig, tensors: list[FormatedTensors]) -> list[dict]:
+    '''
+    Get model_warmup config for Triton Server config.pbtxt file.
+    One sample of synthetic data for each batch size. String inputs use zero data.
+    '''
+    warmup = model_config["warmup"]
+    data = warmup.get("data", "random")
+    samples = []
+    for batch_size in get_warmup_batch_sizes(model_config):
+        inputs = []
+        for tensor in tensors:
+            input_data = "zero" if str(
+                tensor["data_type"]) == "TYPE_STRING" else data
+            inputs.append({
+                "key": tensor["name"],
+                "value": {
+                    "data_type": tensor["data_type"],
+                    "dims": TritonEnum(get_warmup_dims(model_config, tensor)),
+                    f"{input_data}_data": TritonEnum("true")
+                }
+            })
+        samples.append({
+            "name": f"{data}_batch_{batch_size}",
+            "batch_size": batch_size,
+            "inputs": inputs,
+            "count": warmup.get("count", 1)
+        })
+    return samples
+
+
 def get_backend_string(engine: str) -> str:
     '''
     Get backend string for Triton Server config.pbtxt file.
     '''
     if engine == "onnx":
         return "onnxruntime"
-    if engine == "python":
+    # BLS models are generated python models
+    if engine in ["python", "bls"]:
         return "python"
     return ""
 
@@ -99,6 +554,10 @@ def get_kind_instance(kind: str) -> str:
     '''
     if kind == "gpu":
         return TritonEnum("KIND_GPU")
+    if kind == "model":
+        return TritonEnum("KIND_MODEL")
+    if kind == "auto":
+        return TritonEnum("KIND_AUTO")
     return TritonEnum("KIND_CPU")
 
 
@@ -108,6 +567,8 @@ def get_dtype_string(dtype: str) -> str:
     '''
     if dtype == "float32":
         return TritonEnum("TYPE_FP32")
+    if dtype == "float16":
+        return TritonEnum("TYPE_FP16")
     if dtype == "float64":
         return TritonEnum("TYPE_FP64")
     if dtype == "int32":
@@ -164,24 +625,245 @@ def get_imports_from_modules_data(data: PythonModuleConfig) -> str:
     return f"from .{get_python_filename(data['path'])} import {', '.join(imports)}"
 
 
-def get_python_initialize_function(func_name: str) -> str:
+def get_python_parallelism(data: PythonModuleConfig) -> tuple[str, int]:
+    '''
+    Get python parallelism kind and workers count.
+    If parallelism is not set, return (None, 0).
+    '''
+    parallelism = data.get("parallelism", None)
+    if not parallelism:
+        return None, 0
+    if "threads" in parallelism:
+        return "threads", parallelism["threads"]
+    if "processes" in parallelism:
+        return "processes", parallelism["processes"]
+    raise ValueError(
+        f"Parallelism {parallelism} is not valid. Must be one of: threads, processes.")
+
+
+def get_python_cache(data: PythonModuleConfig) -> dict:
+    '''
+    Get python in-process cache config with default values.
+    If cache is not set, return None.
+    '''
+    cache = data.get("cache", None)
+    if cache is None:
+        return None
+    return {
+        "max_entries": cache.get("max_entries", 1024),
+        "max_bytes": cache.get("max_bytes", 256 * 1024 * 1024),
+        "ttl": cache.get("ttl", 0)
+    }
+
+
+def get_python_warmup_function(data: PythonModuleConfig, tensor_config: FormatedInputOutputTensors, model_config: ModelConfig) -> list[str]:
+    '''
+    Get lines of initialize function, which call execute function on synthetic inputs.
+    The model is ready only after initialize returns, so it is warm before the first request.
+    If warmup execute is not enabled, return empty list.
+    '''
+    if not model_config.get("warmup", {}).get("execute", False):
+        return []
+
+    kind = get_python_execute_kind(data)
+    parallelism, _ = get_python_parallelism(data)
+    if kind in ["coroutine", "async_generator"] or parallelism == "processes":
+        raise ValueError(
+            f"Function {data['execute']} can not be warmed up in process. Warmup `execute` requires a synchronous execute function without processes parallelism.")
+
+    # Input shapes of each batch size. Batch dimension is added if batching is enabled
+    batched = model_config["max_batch_size"] > 0
+    samples = []
+    for batch_size in get_warmup_batch_sizes(model_config):
+        shapes = [([batch_size] if batched else []) + get_warmup_dims(model_config, tensor)
+                  for tensor in tensor_config["input"]]
+        samples.append(shapes)
+    dtypes = [get_numpy_dtype_string(tensor["data_type"])
+              for tensor in tensor_config["input"]]
+
+    # Stateful models are warmed up with an empty state dictionary
+    args = "self.params, input_tensors, {}" if is_sequence_batching(
+        model_config) else "self.params, input_tensors"
+    call = f"{data['execute']}({args})"
+    if kind == "generator":
+        call = f"for _ in {call}:\n                    pass"
+    return [
+        "# Warm up execute function on synthetic inputs",
+        f"for shapes in {samples}:",
+        f"    input_tensors = _warmup_input_tensors(shapes, {dtypes}, {model_config['warmup'].get('data', 'random')!r})",
+        f"    for _ in range({model_config['warmup'].get('count', 1)}):",
+        f"        {call}"
+    ]
+
+
+def get_python_initialize_function(data: PythonModuleConfig, tensor_config: FormatedInputOutputTensors = None, model_config: ModelConfig = None) -> str:
     '''
     Get python initialize function.
-    If func_name is None, return ...
+    If initialize is not provided, params is None.
     '''
-    if func_name:
-        return f"self.params = {func_name}(args)"
-    return "self.params = None"
+    lines = []
+    parallelism, workers = get_python_parallelism(data)
+
+    # Worker processes initialize their own params
+    if "initialize" in data and data["initialize"] and parallelism != "processes":
+        lines.append(f"self.params = {data['initialize']}(args)")
+    else:
+        lines.append("self.params = None")
 
+    # Create persistent workers pool
+    if parallelism == "threads":
+        lines.append(f"self.executor = ThreadPoolExecutor(max_workers={workers})")
+    if parallelism == "processes":
+        # Arguments are kept to respawn dead workers
+        lines.append("self.args = args")
+        lines.append(
+            f"self.workers = _start_processes_workers({workers}, args)")
 
-def get_python_finalize_function(func_name: str) -> str:
+    # Create in-process cache of execute outputs
+    cache = get_python_cache(data)
+    if cache:
+        lines.append(
+            f"self.cache = _OutputsCache({cache['max_entries']}, {cache['max_bytes']}, {cache['ttl']})")
+
+    # State dictionary of every sequence. Triton default idle time is 1 second
+    if model_config is not None and is_sequence_batching(model_config):
+        sequence_batching = get_sequence_batching_config(model_config)
+        idle_seconds = sequence_batching.get(
+            "max_sequence_idle_microseconds", 1000000) / 1000000
+        lines.append(
+            f"self.sequences = _SequenceStates({get_sequence_control_name(model_config, 'start')!r}, {get_sequence_control_name(model_config, 'end')!r}, {idle_seconds})")
+
+    # Warm up after params and workers are ready
+    if model_config is not None:
+        lines.extend(get_python_warmup_function(
+            data, tensor_config, model_config))
+
+    return "\n        ".join(lines)
+
+
+def get_python_finalize_function(data: PythonModuleConfig) -> str:
     '''
     Get python finalize function.
-    If func_name is None, return ...
+    If finalize is not provided and there is nothing to clean up, return ...
+    '''
+    lines = []
+
+    # Report cache counters in server log
+    if get_python_cache(data):
+        lines.append(
+            'pb_utils.Logger.log_info(f"Cache hits: {self.cache.hits}, misses: {self.cache.misses}")')
+
+    # Shutdown workers pool
+    parallelism, _ = get_python_parallelism(data)
+    if parallelism == "threads":
+        lines.append("self.executor.shutdown(wait=True)")
+    if parallelism == "processes":
+        lines.append("_stop_processes_workers(self.workers)")
+
+    # Worker processes finalize their own params
+    if "finalize" in data and data["finalize"] and parallelism != "processes":
+        lines.append(f"{data['finalize']}(self.params)")
+
+    return "\n        ".join(lines) if lines else "..."
+
+
+def get_python_imports(data: PythonModuleConfig, model_config: ModelConfig = None) -> str:
+    '''
+    Get standard library imports required by the generated model.
+    '''
+    imports = []
+    if get_python_execute_kind(data) in ["coroutine", "async_generator"]:
+        imports.append("import asyncio")
+    parallelism, _ = get_python_parallelism(data)
+    if parallelism == "threads":
+        imports.append("from concurrent.futures import ThreadPoolExecutor")
+    if parallelism == "processes":
+        imports.append(
+            "from multiprocessing import get_context, resource_tracker")
+        imports.append(
+            "from multiprocessing.shared_memory import SharedMemory")
+    if get_python_cache(data):
+        imports.append("import time")
+        imports.append("import hashlib")
+        imports.append("import threading")
+        imports.append("from collections import OrderedDict")
+    if model_config is not None and is_sequence_batching(model_config):
+        for line in ["import time", "from collections import OrderedDict"]:
+            if line not in imports:
+                imports.append(line)
+    return "".join(f"{line}\n" for line in imports)
+
+
+def get_python_helpers(data: PythonModuleConfig, model_config: ModelConfig = None) -> str:
+    '''
+    Get module level helpers required by the generated model.
+    '''
+    helpers = ""
+    if model_config is not None and model_config.get("warmup", {}).get("execute", False):
+        helpers += PYTHON_WARMUP_HELPERS_STRING
+    if model_config is not None and is_sequence_batching(model_config):
+        helpers += PYTHON_SEQUENCE_HELPERS_STRING
+    parallelism, _ = get_python_parallelism(data)
+    if parallelism == "processes":
+        helpers += get_python_processes_helpers_string(data)
+    if get_python_cache(data):
+        helpers += PYTHON_CACHE_HELPERS_STRING
+    return helpers
+
+
+def get_python_execute_args(sequence: bool) -> str:
+    '''
+    Get arguments of the execute function for a single request.
+    Stateful models also get the state dictionary of sequence.
+    '''
+    if sequence:
+        return "self.params, input_tensors, state"
+    return "self.params, input_tensors"
+
+
+def get_python_sequence_state_string(sequence: bool, indent: int) -> str:
+    '''
+    Get lines of execute function, which get state dictionary of the request sequence.
+    If model is not stateful, return empty string.
+    '''
+    if not sequence:
+        return ""
+    return f"\n\n{' '*indent}# Get state dictionary of sequence\n{' '*indent}state = self.sequences.get(request)"
+
+
+def get_python_run_call(data: PythonModuleConfig, kind: str, sequence: bool = False) -> str:
+    '''
+    Get call of the execute function for a single request.
+    If cache is enabled, call through the cached run method.
+    '''
+    prefix = "await " if kind == "coroutine" else ""
+    if get_python_cache(data):
+        return f"{prefix}self.run(input_tensors)"
+    return f"{prefix}{data['execute']}({get_python_execute_args(sequence)})"
+
+
+def get_python_run_function(data: PythonModuleConfig) -> str:
     '''
-    if func_name:
-        return f"{func_name}(self.params)"
-    return "..."
+    Get cached run method for a single request.
+    Only per-request modes need it. If cache is not enabled, return empty string.
+    '''
+    parallelism, _ = get_python_parallelism(data)
+    if not get_python_cache(data) or data.get("batched", False) or parallelism == "processes":
+        return ""
+
+    kind = get_python_execute_kind(data)
+    prefix = "async " if kind == "coroutine" else ""
+    await_prefix = "await " if kind == "coroutine" else ""
+    return f'''
+    {prefix}def run(self, input_tensors):
+        # Look up cached outputs by hash of input tensors
+        key = self.cache.key(input_tensors)
+        outputs = self.cache.get(key)
+        if outputs is None:
+            outputs = {await_prefix}{data['execute']}(self.params, input_tensors)
+            outputs = self.cache.put(key, outputs)
+        return outputs
+'''
 
 
 def get_tensor_inputs_name(tensor_config: FormatedInputOutputTensors) -> list[str]:
@@ -204,6 +886,42 @@ def get_tensor_outputs_name(tensor_config: FormatedInputOutputTensors) -> list[s
     return tensor_outputs_name
 
 
+def get_numpy_dtype_string(data_type: TritonEnum) -> str:
+    '''
+    Get numpy data type string from Triton Server data type.
+    Triton Server string tensors are numpy object arrays.
+    '''
+    numpy_dtypes = {
+        "TYPE_FP16": "float16",
+        "TYPE_FP32": "float32",
+        "TYPE_FP64": "float64",
+        "TYPE_INT32": "int32",
+        "TYPE_INT64": "int64",
+        "TYPE_UINT8": "uint8",
+        "TYPE_UINT16": "uint16",
+        "TYPE_UINT32": "uint32",
+        "TYPE_UINT64": "uint64",
+        "TYPE_INT8": "int8",
+        "TYPE_INT16": "int16",
+        "TYPE_BOOL": "bool",
+        "TYPE_STRING": "object"
+    }
+    if str(data_type) not in numpy_dtypes:
+        raise ValueError(f"Unsupported data type: {data_type}")
+    return numpy_dtypes[str(data_type)]
+
+
+def get_tensor_outputs_dtype(tensor_config: FormatedInputOutputTensors) -> list[str]:
+    '''
+    Get tensor outputs numpy data type.
+    '''
+    tensor_outputs_dtype = []
+    for tensor in tensor_config["output"]:
+        tensor_outputs_dtype.append(
+            get_numpy_dtype_string(tensor["data_type"]))
+    return tensor_outputs_dtype
+
+
 # Data is a dictionary. Contain entire model config of Triton pbtxt.
 def get_file_instruction_string(data: FormatedTritonConfig): return f'''# Welcome to the Triton Server Protobuf Text Format (PBtxt) file.
 # This is auto generated file by `trsp` module. Developed by Ming-doan.
@@ -214,47 +932,1027 @@ def get_file_instruction_string(data: FormatedTritonConfig): return f'''# Welcom
 '''
 
 
-def get_triton_python_model_config_string(name: str, data: PythonModuleConfig, tensor_config: FormatedInputOutputTensors): return f'''# Model Configuration for Triton Server Python Model.
+# Snippet of generated execute function. Collect input tensors of every request.
+PYTHON_REQUESTS_INPUTS_STRING = '''# Get input tensors of every request
+        requests_input_tensors = []
+        for request in requests:
+            input_tensors = []
+            for name in tensor_inputs_name:
+                input_tensors.append(
+                    pb_utils.get_input_tensor_by_name(request, name).as_numpy()
+                )
+            requests_input_tensors.append(input_tensors)'''
+
+# Snippet of generated execute function. Create responses from outputs of every request.
+PYTHON_REQUESTS_RESPONSES_STRING = '''responses = []
+        for outputs in requests_outputs:
+            # Create output tensors
+            output_tensors = []
+            for name, dtype, output in zip(tensor_outputs_name, tensor_outputs_dtype, outputs):
+                output_tensors.append(pb_utils.Tensor(
+                    name, np.asarray(output, dtype=dtype)))
+
+            # Create response
+            response = pb_utils.InferenceResponse(output_tensors)
+
+            # Append response
+            responses.append(response)'''
+
+
+def get_python_execute_kind(data: PythonModuleConfig) -> str:
+    '''
+    Get kind of the execute function by parsing the python module.
+    Return one of: function, generator, coroutine, async_generator.
+    '''
+    with open(get_absolute_path(data["path"]), "r") as f:
+        tree = ast.parse(f.read())
+
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == data["execute"]:
+            # Check for yield in function body, ignore nested functions
+            is_generator = False
+            nodes = list(node.body)
+            while nodes:
+                child = nodes.pop()
+                if isinstance(child, (ast.Yield, ast.YieldFrom)):
+                    is_generator = True
+                    break
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)):
+                    continue
+                nodes.extend(ast.iter_child_nodes(child))
+
+            if isinstance(node, ast.AsyncFunctionDef):
+                return "async_generator" if is_generator else "coroutine"
+            return "generator" if is_generator else "function"
+
+    raise ValueError(
+        f"Function {data['execute']} not found in module {data['path']}.")
+
+
+def get_python_return_responses_string(decoupled: bool) -> str:
+    '''
+    Get end of python execute function.
+    If model is decoupled, send responses through response senders.
+    '''
+    if decoupled:
+        return '''# Send responses through response senders
+        for request, response in zip(requests, responses):
+            request.get_response_sender().send(
+                response, flags=pb_utils.TRITONSERVER_RESPONSE_COMPLETE_FINAL)
+        return None'''
+    return "return responses"
+
+
+def get_python_async_execute_function(data: PythonModuleConfig, kind: str, decoupled: bool, sequence: bool = False) -> str:
+    '''
+    Get python async execute function body.
+    Each request is processed as a concurrent task.
+    If model is decoupled, each request sends its responses as soon as they are ready.
+    '''
+    # Call execute function of a single request
+    if data.get("batched", False):
+        raise ValueError(
+            f"Function {data['execute']} is async. Async execute can not be used with `batched` module.")
+
+    if not decoupled:
+        if kind == "async_generator":
+            raise ValueError(
+                f"Function {data['execute']} is an async generator. Streaming requires `decoupled: true`.")
+        return f'''async def process(request):
+            # Get input tensors
+            input_tensors = []
+            for name in tensor_inputs_name:
+                input_tensors.append(
+                    pb_utils.get_input_tensor_by_name(request, name).as_numpy()
+                ){get_python_sequence_state_string(sequence, 12)}
+
+            # Transfer tensors to execute function
+            outputs = {get_python_run_call(data, kind, sequence)}
+
+            # Create output tensors
+            output_tensors = []
+            for name, dtype, output in zip(tensor_outputs_name, tensor_outputs_dtype, outputs):
+                output_tensors.append(pb_utils.Tensor(
+                    name, np.asarray(output, dtype=dtype)))
+
+            # Create response
+            return pb_utils.InferenceResponse(output_tensors)
+
+        # Process requests concurrently. Gather keeps the order of requests.
+        responses = await asyncio.gather(
+            *[process(request) for request in requests])
+        return list(responses)'''
+
+    # Stream each yielded outputs, or send single outputs
+    if kind == "async_generator":
+        send_string = f'''async for outputs in {data['execute']}({get_python_execute_args(sequence)}):
+                    sender.send(create_response(outputs))
+                sender.send(
+                    flags=pb_utils.TRITONSERVER_RESPONSE_COMPLETE_FINAL)'''
+    else:
+        send_string = f'''outputs = {get_python_run_call(data, kind, sequence)}
+                sender.send(
+                    create_response(outputs),
+                    flags=pb_utils.TRITONSERVER_RESPONSE_COMPLETE_FINAL)'''
+
+    return f'''def create_response(outputs):
+            # Create output tensors
+            output_tensors = []
+            for name, dtype, output in zip(tensor_outputs_name, tensor_outputs_dtype, outputs):
+                output_tensors.append(pb_utils.Tensor(
+                    name, np.asarray(output, dtype=dtype)))
+            return pb_utils.InferenceResponse(output_tensors)
+
+        async def process(request):
+            sender = request.get_response_sender()
+            try:
+                # Get input tensors
+                input_tensors = []
+                for name in tensor_inputs_name:
+                    input_tensors.append(
+                        pb_utils.get_input_tensor_by_name(
+                            request, name).as_numpy()
+                    ){get_python_sequence_state_string(sequence, 16)}
+
+                # Transfer tensors to execute function and send responses
+                {send_string}
+            except Exception as e:
+                sender.send(
+                    pb_utils.InferenceResponse(
+                        error=pb_utils.TritonError(f"{{type(e).__name__}}: {{e}}")),
+                    flags=pb_utils.TRITONSERVER_RESPONSE_COMPLETE_FINAL)
+
+        # Process requests concurrently. Each request sends its own responses.
+        await asyncio.gather(*[process(request) for request in requests])
+        return None'''
+
+
+def get_python_execute_function(data: PythonModuleConfig, decoupled: bool = False, sequence: bool = False) -> str:
+    '''
+    Get python execute function body.
+    If module is batched, stack every requests inputs along the batch axis
+    and call the execute function once.
+    If parallelism is threads, dispatch each request to the threads pool.
+    If parallelism is processes, dispatch each request to worker processes.
+    If execute function is async, process each request as a concurrent task.
+    If model is stateful, pass state dictionary of the request sequence.
+    '''
+    parallelism, _ = get_python_parallelism(data)
+    kind = get_python_execute_kind(data)
+
+    if sequence and (parallelism or data.get("batched", False) or get_python_cache(data)):
+        raise ValueError(
+            f"Function {data['execute']} is stateful. Sequence state can not be used with `batched`, `parallelism` or `cache`.")
+
+    if kind in ["generator", "async_generator"] and get_python_cache(data):
+        raise ValueError(
+            f"Function {data['execute']} is a generator. Streaming outputs can not be cached.")
+
+    if kind in ["coroutine", "async_generator"]:
+        if parallelism:
+            raise ValueError(
+                f"Function {data['execute']} is async. Async execute can not be used with `parallelism`.")
+        return get_python_async_execute_function(data, kind, decoupled, sequence)
+
+    if kind == "generator":
+        if not decoupled:
+            raise ValueError(
+                f"Function {data['execute']} is a generator. Streaming requires `decoupled: true`.")
+        if parallelism or data.get("batched", False):
+            raise ValueError(
+                f"Function {data['execute']} is a generator. Streaming can not be used with `batched` or `parallelism`.")
+
+    if data.get("batched", False):
+        if get_python_cache(data):
+            run_string = '''# Look up cached outputs by hash of input tensors.
+        # Only missed requests are batched.
+        requests_keys = [self.cache.key(input_tensors)
+                         for input_tensors in requests_input_tensors]
+        requests_outputs = [self.cache.get(key) for key in requests_keys]
+        missed_indices = [i for i, outputs in enumerate(requests_outputs)
+                          if outputs is None]
+        if missed_indices:
+            missed_outputs = run_batch(
+                [requests_input_tensors[i] for i in missed_indices])
+            for i, outputs in zip(missed_indices, missed_outputs):
+                requests_outputs[i] = self.cache.put(requests_keys[i], outputs)'''
+        else:
+            run_string = "requests_outputs = run_batch(requests_input_tensors)"
+
+        return f'''def run_batch(requests_input_tensors):
+            # Record batch size of each request
+            batch_sizes = [input_tensors[0].shape[0]
+                           for input_tensors in requests_input_tensors]
+
+            # Stack input tensors along the batch axis
+            batched_input_tensors = []
+            for tensors in zip(*requests_input_tensors):
+                if len(tensors) == 1:
+                    batched_input_tensors.append(tensors[0])
+                else:
+                    batched_input_tensors.append(
+                        np.concatenate(tensors, axis=0))
+
+            # Transfer batched tensors to execute function
+            batched_outputs = {data['execute']}(
+                self.params, batched_input_tensors)
+
+            # Split outputs back to each request by recorded batch sizes
+            split_indices = np.cumsum(batch_sizes)[:-1]
+            return list(zip(
+                *[np.split(output, split_indices, axis=0) for output in batched_outputs]))
+
+        {PYTHON_REQUESTS_INPUTS_STRING}
+
+        {run_string}
+
+        {PYTHON_REQUESTS_RESPONSES_STRING}
+        {get_python_return_responses_string(decoupled)}'''
+
+    if parallelism == "processes":
+        if get_python_cache(data):
+            lookup_string = '''
+            # Look up cached outputs by hash of input tensors
+            requests_keys[i] = self.cache.key(input_tensors)
+            requests_outputs[i] = self.cache.get(requests_keys[i])
+            if requests_outputs[i] is not None:
+                continue'''
+            store_string = '''
+                outputs = self.cache.put(requests_keys[i], outputs)'''
+        else:
+            lookup_string = ""
+            store_string = ""
+
+        return f'''{PYTHON_REQUESTS_INPUTS_STRING}
+
+        requests_outputs = [None] * len(requests_input_tensors)
+        requests_errors = [None] * len(requests_input_tensors)
+        requests_keys = [None] * len(requests_input_tensors)
+        pending_indices = []
+        for i, input_tensors in enumerate(requests_input_tensors):{lookup_string}
+            pending_indices.append(i)
+
+        # Dispatch requests to worker processes in rounds. Each worker has at most
+        # one job in flight, so inline tensors can not fill both ends of a pipe.
+        # Input tensors are moved through shared memory.
+        for start in range(0, len(pending_indices), len(self.workers)):
+            jobs = []
+            for worker_index, i in enumerate(pending_indices[start:start + len(self.workers)]):
+                input_blocks, input_metadata = [], []
+                for tensor in requests_input_tensors[i]:
+                    shm, metadata = _to_shared_memory(tensor)
+                    input_blocks.append(shm)
+                    input_metadata.append(metadata)
+                try:
+                    self.workers[worker_index][1].send(input_metadata)
+                    send_error = None
+                except (OSError, EOFError) as e:
+                    send_error = e
+                jobs.append((i, worker_index, input_blocks, send_error))
+
+            # Collect outputs of the round
+            for i, worker_index, input_blocks, send_error in jobs:
+                try:
+                    if send_error is not None:
+                        raise send_error
+                    status, result = self.workers[worker_index][1].recv()
+                except (OSError, EOFError) as e:
+                    # Worker process died. Respawn it for later jobs
+                    self.workers[worker_index] = _restart_processes_worker(
+                        self.workers[worker_index], self.args)
+                    status, result = "error", f"Worker process died. {{type(e).__name__}}: {{e}}"
+                finally:
+                    for shm in input_blocks:
+                        _close_shared_memory(shm, unlink=True)
+
+                # Create error response if execute function raised
+                if status == "error":
+                    requests_errors[i] = result
+                    continue
+
+                # Copy outputs out before unlink shared memory
+                try:
+                    outputs = _collect_shared_memory_outputs(result)
+                except Exception as e:
+                    requests_errors[i] = f"{{type(e).__name__}}: {{e}}"
+                    continue{store_string}
+                requests_outputs[i] = outputs
+
+        # Create responses in the order of requests
+        responses = []
+        for outputs, error in zip(requests_outputs, requests_errors):
+            if error is not None:
+                responses.append(pb_utils.InferenceResponse(
+                    error=pb_utils.TritonError(error)))
+                continue
+
+            # Create output tensors
+            output_tensors = []
+            for name, dtype, output in zip(tensor_outputs_name, tensor_outputs_dtype, outputs):
+                output_tensors.append(pb_utils.Tensor(
+                    name, np.asarray(output, dtype=dtype)))
+
+            # Create response
+            response = pb_utils.InferenceResponse(output_tensors)
+
+            # Append response
+            responses.append(response)
+        {get_python_return_responses_string(decoupled)}'''
+
+    if parallelism == "threads":
+        return f'''{PYTHON_REQUESTS_INPUTS_STRING}
+
+        # Transfer tensors to execute function in threads pool.
+        # Executor map keeps the order of requests.
+        requests_outputs = self.executor.map(
+            lambda input_tensors: {get_python_run_call(data, kind)},
+            requests_input_tensors
+        )
+
+        {PYTHON_REQUESTS_RESPONSES_STRING}
+        {get_python_return_responses_string(decoupled)}'''
+
+    if decoupled:
+        # Stream each yielded outputs, or send single outputs
+        if kind == "generator":
+            send_string = f'''for outputs in {data['execute']}({get_python_execute_args(sequence)}):
+                    sender.send(create_response(outputs))
+                sender.send(
+                    flags=pb_utils.TRITONSERVER_RESPONSE_COMPLETE_FINAL)'''
+        else:
+            send_string = f'''outputs = {get_python_run_call(data, kind, sequence)}
+                sender.send(
+                    create_response(outputs),
+                    flags=pb_utils.TRITONSERVER_RESPONSE_COMPLETE_FINAL)'''
+
+        return f'''def create_response(outputs):
+            # Create output tensors
+            output_tensors = []
+            for name, dtype, output in zip(tensor_outputs_name, tensor_outputs_dtype, outputs):
+                output_tensors.append(pb_utils.Tensor(
+                    name, np.asarray(output, dtype=dtype)))
+            return pb_utils.InferenceResponse(output_tensors)
+
+        for request in requests:
+            sender = request.get_response_sender()
+            try:
+                # Get input tensors
+                input_tensors = []
+                for name in tensor_inputs_name:
+                    input_tensors.append(
+                        pb_utils.get_input_tensor_by_name(
+                            request, name).as_numpy()
+                    ){get_python_sequence_state_string(sequence, 16)}
+
+                # Transfer tensors to execute function and send responses
+                {send_string}
+            except Exception as e:
+                sender.send(
+                    pb_utils.InferenceResponse(
+                        error=pb_utils.TritonError(f"{{type(e).__name__}}: {{e}}")),
+                    flags=pb_utils.TRITONSERVER_RESPONSE_COMPLETE_FINAL)
+        return None'''
+
+    return f'''responses = []
+        for request in requests:
+            # Get input tensors
+            input_tensors = []
+            for name in tensor_inputs_name:
+                input_tensors.append(
+                    pb_utils.get_input_tensor_by_name(request, name).as_numpy()
+                ){get_python_sequence_state_string(sequence, 12)}
+
+            # Transfer tensors to execute function
+            outputs = {get_python_run_call(data, kind, sequence)}
+
+            # Create output tensors
+            output_tensors = []
+            for name, dtype, output in zip(tensor_outputs_name, tensor_outputs_dtype, outputs):
+                output_tensors.append(pb_utils.Tensor(
+                    name, np.asarray(output, dtype=dtype)))
+
+            # Create response
+            response = pb_utils.InferenceResponse(output_tensors)
+
+            # Append response
+            responses.append(response)
+        return responses'''
+
+
+# Module level helper of generated model. Synthetic inputs of warmup.
+PYTHON_WARMUP_HELPERS_STRING = '''
+
+def _warmup_input_tensors(shapes, dtypes, data):
+    """
+    Create synthetic input tensors of warmup, with zero or random data.
+    String inputs are empty bytes.
+    """
+    rng = np.random.default_rng(0)
+    input_tensors = []
+    for shape, dtype in zip(shapes, dtypes):
+        if dtype == "object":
+            input_tensors.append(np.full(shape, b"", dtype=object))
+        elif data == "zero":
+            input_tensors.append(np.zeros(shape, dtype=dtype))
+        elif dtype == "bool":
+            input_tensors.append(rng.integers(0, 2, shape).astype(dtype))
+        elif np.issubdtype(np.dtype(dtype), np.integer):
+            input_tensors.append(rng.integers(0, 128, shape).astype(dtype))
+        else:
+            input_tensors.append(rng.random(shape).astype(dtype))
+    return input_tensors
+'''
+
+# Module level helper of generated model. State dictionary of every sequence.
+PYTHON_SEQUENCE_HELPERS_STRING = '''
+
+class _SequenceStates:
+    """
+    State dictionary of every sequence, by correlation id.
+    State is reset on sequence start, removed on sequence end,
+    and evicted after sequence is idle longer than max idle time.
+    """
+
+    def __init__(self, start_name, end_name, max_idle_seconds):
+        self.start_name = start_name
+        self.end_name = end_name
+        self.max_idle_seconds = max_idle_seconds
+        # Correlation id -> (last access time, state). Least recently used first
+        self.states = OrderedDict()
+
+    def flag(self, request, name):
+        if name is None:
+            return False
+        tensor = pb_utils.get_input_tensor_by_name(request, name)
+        return tensor is not None and bool(tensor.as_numpy().any())
+
+    def get(self, request):
+        # Evict idle sequences. Triton has released their batch slots
+        now = time.monotonic()
+        while self.states:
+            accessed, _ = next(iter(self.states.values()))
+            if now - accessed <= self.max_idle_seconds:
+                break
+            self.states.popitem(last=False)
+
+        key = request.correlation_id()
+        if self.flag(request, self.start_name):
+            self.states.pop(key, None)
+        _, state = self.states.pop(key, (now, {}))
+
+        # State of ended sequence is only used by the last request
+        if not self.flag(request, self.end_name):
+            self.states[key] = (now, state)
+        return state
+'''
+
+# Module level helper of generated model. In-process LRU cache of execute outputs.
+PYTHON_CACHE_HELPERS_STRING = '''
+
+class _OutputsCache:
+    """
+    In-process LRU cache of execute outputs.
+    Keyed by a hash of input tensors bytes, shapes and dtypes.
+    Bounded by entries count and outputs bytes. Entries expire after ttl
+    seconds (0 means never).
+    """
+
+    def __init__(self, max_entries, max_bytes, ttl):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def key(input_tensors):
+        digest = hashlib.blake2b(digest_size=16)
+        for tensor in input_tensors:
+            tensor = np.asarray(tensor)
+            digest.update(f"{tensor.dtype.str}{tensor.shape}".encode())
+            if tensor.dtype.hasobject:
+                for item in tensor.ravel():
+                    value = item if isinstance(item, bytes) else str(item).encode()
+                    digest.update(len(value).to_bytes(8, "little"))
+                    digest.update(value)
+            else:
+                digest.update(np.ascontiguousarray(tensor).data)
+        return digest.digest()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key, None)
+            if entry is not None and self.ttl and entry[0] < time.monotonic():
+                self.__remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, outputs):
+        # Copy outputs, they may be views of request input tensors
+        outputs = tuple(np.array(output) for output in outputs)
+        nbytes = sum(output.nbytes for output in outputs)
+        if nbytes > self.max_bytes:
+            return outputs
+
+        with self.lock:
+            if key in self.entries:
+                self.__remove(key)
+            expire_at = time.monotonic() + self.ttl if self.ttl else 0
+            self.entries[key] = (expire_at, nbytes, outputs)
+            self.bytes += nbytes
+
+            # Evict least recently used entries
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                self.__remove(next(iter(self.entries)))
+        return outputs
+
+    def __remove(self, key):
+        _, nbytes, _ = self.entries.pop(key)
+        self.bytes -= nbytes
+'''
+
+
+def get_python_processes_helpers_string(data: PythonModuleConfig) -> str: return f'''
+
+def _to_shared_memory(array):
+    """
+    Copy array to a new shared memory block.
+    Object arrays (strings) can not be shared, they are sent inline.
+    Return the block (None if inline) and its metadata.
+    """
+    array = np.asarray(array)
+    if array.dtype.hasobject:
+        return None, ("inline", array)
+    shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, array.dtype, buffer=shm.buf)[...] = array
+    return shm, ("shared_memory", shm.name, array.shape, array.dtype.str)
+
+
+def _from_shared_memory(metadata):
+    """
+    Attach to shared memory block from its metadata.
+    Return the block (None if inline) and an array view on it.
+    """
+    if metadata[0] == "inline":
+        return None, metadata[1]
+    _, shm_name, shape, dtype = metadata
+    shm = SharedMemory(name=shm_name)
+    return shm, np.ndarray(shape, dtype, buffer=shm.buf)
+
+
+def _close_shared_memory(shm, unlink=False):
+    """
+    Close shared memory block, and unlink it if requested.
+    """
+    if shm is None:
+        return
+    try:
+        shm.close()
+    except BufferError:
+        # Array views are still referenced, the mapping is released on gc
+        pass
+    if unlink:
+        shm.unlink()
+
+
+def _collect_shared_memory_outputs(output_metadata):
+    """
+    Copy outputs out of shared memory blocks and unlink them.
+    Every block is unlinked, even if reading one of the outputs fails.
+    """
+    outputs, error = [], None
+    for metadata in output_metadata:
+        try:
+            shm, output = _from_shared_memory(metadata)
+        except Exception as e:
+            error = error or e
+            continue
+        if error is None:
+            outputs.append(np.array(output))
+        output = None
+        _close_shared_memory(shm, unlink=True)
+    if error is not None:
+        raise error
+    return outputs
+
+
+def _processes_worker(connection, args):
+    """
+    Long-lived worker process.
+    Initialize params once, then execute jobs until receive None.
+    """
+    params = {f"{data['initialize']}(args)" if data.get('initialize') else "None"}
+    while True:
+        job = connection.recv()
+        if job is None:
+            break
+
+        # Attach input tensors from shared memory
+        input_blocks, input_tensors = [], []
+        for metadata in job:
+            shm, tensor = _from_shared_memory(metadata)
+            input_blocks.append(shm)
+            input_tensors.append(tensor)
+
+        # Transfer tensors to execute function and share outputs back
+        try:
+            outputs = {data['execute']}(params, input_tensors)
+            output_metadata = []
+            for output in outputs:
+                shm, metadata = _to_shared_memory(output)
+                _close_shared_memory(shm)
+                output_metadata.append(metadata)
+            result = ("ok", output_metadata)
+        except Exception as e:
+            result = ("error", f"{{type(e).__name__}}: {{e}}")
+
+        # Release input views before closing blocks
+        outputs = input_tensors = tensor = None
+        for shm in input_blocks:
+            _close_shared_memory(shm)
+
+        connection.send(result)
+
+    {f"{data['finalize']}(params)" if data.get('finalize') else "params = None"}
+    connection.close()
+
+
+def _start_processes_worker(args):
+    """
+    Fork a worker process. Return (process, connection).
+    """
+    # Share one resource tracker between model and workers
+    resource_tracker.ensure_running()
+    context = get_context("fork")
+
+    parent_connection, child_connection = context.Pipe()
+    process = context.Process(
+        target=_processes_worker, args=(child_connection, args), daemon=True)
+    process.start()
+    child_connection.close()
+    return process, parent_connection
+
+
+def _start_processes_workers(count, args):
+    """
+    Fork worker processes. Return list of (process, connection).
+    """
+    return [_start_processes_worker(args) for _ in range(count)]
+
+
+def _restart_processes_worker(worker, args):
+    """
+    Replace a dead worker process with a new one.
+    """
+    process, connection = worker
+    connection.close()
+    if process.is_alive():
+        process.kill()
+    process.join()
+    return _start_processes_worker(args)
+
+
+def _stop_processes_workers(workers):
+    """
+    Stop worker processes and wait for them to finalize.
+    """
+    for _, connection in workers:
+        connection.send(None)
+    for process, connection in workers:
+        process.join()
+        connection.close()
+'''
+
+
+def get_triton_python_model_config_string(name: str, data: PythonModuleConfig, tensor_config: FormatedInputOutputTensors, model_config: ModelConfig): return f'''# Model Configuration for Triton Server Python Model.
 # Auto generated by `trsp` module. Developed by Ming-doan.
 # Model: {name}.
 # Engine: python.
 # ------------------------------
 
+{get_python_imports(data, model_config)}import numpy as np
 import triton_python_backend_utils as pb_utils
 {get_imports_from_modules_data(data)}
+{get_python_helpers(data, model_config)}
+class TritonPythonModel:
+    def initialize(self, args):
+        {get_python_initialize_function(data, tensor_config, model_config)}
+{get_python_run_function(data)}
+    {"async " if get_python_execute_kind(data) in ["coroutine", "async_generator"] else ""}def execute(self, requests):
+        tensor_inputs_name = {str(get_tensor_inputs_name(tensor_config))}
+        tensor_outputs_name = {str(get_tensor_outputs_name(tensor_config))}
+        tensor_outputs_dtype = {str(get_tensor_outputs_dtype(tensor_config))}
+
+        {get_python_execute_function(data, model_config.get("decoupled", False), is_sequence_batching(model_config))}
+
+    def finalize(self):
+        {get_python_finalize_function(data)}
+'''
+
+
+def get_python_fuse_error(model_config: ModelConfig, version: VersionConfig) -> str:
+    '''
+    Get reason why a python step can not be fused with other steps.
+    Return None if step can be fused.
+    '''
+    if model_config["engine"] != "python":
+        return "not a python model"
+    if model_config.get("decoupled", False):
+        return "decoupled"
+    if is_sequence_batching(model_config):
+        return "sequence batching"
+    module = version["module"]
+    if get_python_execute_kind(module) != "function":
+        return f"execute is a {get_python_execute_kind(module)}"
+    if get_python_parallelism(module)[0]:
+        return "module has parallelism"
+    if get_python_cache(module):
+        return "module has cache"
+    return None
+
+
+def get_python_fused_imports(steps: list[dict]) -> str:
+    '''
+    Get imports of every fused step functions. Functions are aliased by step index,
+    so steps can use functions with the same name.
+    '''
+    imports = []
+    for i, step in enumerate(steps):
+        module = step["module"]
+        functions = [f"{module['execute']} as _step_{i+1}_execute"]
+        if module.get("initialize"):
+            functions.append(
+                f"{module['initialize']} as _step_{i+1}_initialize")
+        if module.get("finalize"):
+            functions.append(f"{module['finalize']} as _step_{i+1}_finalize")
+        imports.append(
+            f"from .{get_python_filename(module['path'])} import {', '.join(functions)}")
+    return "\n".join(imports)
+
+
+def get_python_fused_steps(steps: list[dict]) -> str:
+    '''
+    Get module level list of fused steps.
+    '''
+    lines = []
+    for i, step in enumerate(steps):
+        run = "_run_batch" if step["module"].get("batched", False) else "_run_requests"
+        lines.append(
+            f"    # {step['model']}\n    ({run}, _step_{i+1}_execute, {step['inputs']}, {step['outputs']}, {step['outputs_dtype']}),")
+    return "\n".join(lines)
+
+
+def get_python_fused_finalize_function(steps: list[dict]) -> str:
+    '''
+    Get finalize function of fused steps.
+    If no step has finalize, return ...
+    '''
+    lines = [f"_step_{i+1}_finalize(self.params[{i}])"
+             for i, step in enumerate(steps) if step["module"].get("finalize")]
+    return "\n        ".join(lines) if lines else "..."
+
+
+# Module level helpers of generated fused model. Run a step on the inputs of every request.
+PYTHON_FUSED_HELPERS_STRING = '''
+
+def _run_requests(execute, params, requests_input_tensors):
+    """
+    Call execute function once per request.
+    """
+    return [execute(params, input_tensors) for input_tensors in requests_input_tensors]
+
+
+def _run_batch(execute, params, requests_input_tensors):
+    """
+    Stack input tensors of every request along the batch axis,
+    call execute function once and split outputs back to each request.
+    """
+    batch_sizes = [input_tensors[0].shape[0]
+                   for input_tensors in requests_input_tensors]
+    batched_input_tensors = []
+    for tensors in zip(*requests_input_tensors):
+        if len(tensors) == 1:
+            batched_input_tensors.append(tensors[0])
+        else:
+            batched_input_tensors.append(np.concatenate(tensors, axis=0))
+    batched_outputs = execute(params, batched_input_tensors)
+    split_indices = np.cumsum(batch_sizes)[:-1]
+    return list(zip(
+        *[np.split(output, split_indices, axis=0) for output in batched_outputs]))
+'''
+
+
+def get_triton_python_fused_model_config_string(name: str, steps: list[dict], tensor_config: FormatedInputOutputTensors, inputs_tensor_name: list[str], outputs_tensor_name: list[str]): return f'''# Model Configuration for Triton Server Python Model.
+# Auto generated by `trsp` module. Developed by Ming-doan.
+# Model: {name}.
+# Engine: python. Fused steps: {', '.join(step['model'] for step in steps)}.
+# ------------------------------
+
+import numpy as np
+import triton_python_backend_utils as pb_utils
+{get_python_fused_imports(steps)}
+{PYTHON_FUSED_HELPERS_STRING}
+
+# Fused steps in order: (run, execute, input tensors, output tensors, output dtypes).
+# Unused outputs are None.
+_STEPS = [
+{get_python_fused_steps(steps)}
+]
+
 
 class TritonPythonModel:
     def initialize(self, args):
-        {get_python_initialize_function(data['initialize'] if 'initialize' in data else None)}
+        self.params = [{", ".join(f"_step_{i+1}_initialize(args)" if step["module"].get("initialize") else "None" for i, step in enumerate(steps))}]
 
     def execute(self, requests):
         tensor_inputs_name = {str(get_tensor_inputs_name(tensor_config))}
         tensor_outputs_name = {str(get_tensor_outputs_name(tensor_config))}
+        inputs_tensor_name = {str(inputs_tensor_name)}
+        outputs_tensor_name = {str(outputs_tensor_name)}
 
-        responses = []
+        # Get input tensors of every request, by ensemble tensor name
+        requests_tensors = []
         for request in requests:
+            tensors = {{}}
+            for name, tensor_name in zip(tensor_inputs_name, inputs_tensor_name):
+                tensors[tensor_name] = pb_utils.get_input_tensor_by_name(
+                    request, name).as_numpy()
+            requests_tensors.append(tensors)
+
+        # Run steps in order. Outputs stay in process for the next steps
+        for (run, execute, inputs_name, outputs_name, outputs_dtype), params in zip(_STEPS, self.params):
+            requests_outputs = run(execute, params, [
+                [tensors[name] for name in inputs_name] for tensors in requests_tensors])
+            for tensors, outputs in zip(requests_tensors, requests_outputs):
+                for name, dtype, output in zip(outputs_name, outputs_dtype, outputs):
+                    if name is not None:
+                        tensors[name] = np.asarray(output, dtype=dtype)
+
+        # Create responses
+        responses = []
+        for tensors in requests_tensors:
+            output_tensors = []
+            for name, tensor_name in zip(tensor_outputs_name, outputs_tensor_name):
+                output_tensors.append(pb_utils.Tensor(name, tensors[tensor_name]))
+            responses.append(pb_utils.InferenceResponse(output_tensors))
+        return responses
+
+    def finalize(self):
+        {get_python_fused_finalize_function(steps)}
+'''
+
+
+def get_bls_expression(expression: str, tensor_names: list[str]) -> tuple[str, set[str]]:
+    '''
+    Get python expression of BLS step condition or default value,
+    with tensor names replaced by pipeline tensors.
+    Return the expression and the tensor names it uses.
+    '''
+    try:
+        tree = ast.parse(str(expression).strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Expression `{expression}` is not valid. {e}")
+
+    used_names = set()
+
+    # Other names must be numpy, builtins or bound in the expression. Eg: lambda arguments
+    known_names = {"np", *dir(builtins)}
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Store):
+            known_names.add(node.id)
+        if isinstance(node, ast.arg):
+            known_names.add(node.arg)
+
+    class TensorNameTransformer(ast.NodeTransformer):
+        def visit_Name(self, node: ast.Name) -> ast.AST:
+            if node.id not in tensor_names:
+                if node.id not in known_names:
+                    raise ValueError(
+                        f"Name {node.id} of expression `{expression}` is not a model input or step output.")
+                return node
+            used_names.add(node.id)
+            return ast.copy_location(ast.Subscript(
+                value=ast.Name(id="tensors", ctx=ast.Load()),
+                slice=ast.Constant(value=node.id),
+                ctx=ast.Load()), node)
+
+    tree = ast.fix_missing_locations(TensorNameTransformer().visit(tree))
+    return ast.unparse(tree), used_names
+
+
+def get_bls_levels_string(levels: list[list[dict]]) -> str:
+    '''
+    Get steps of BLS process function. Steps of a level run concurrently.
+    Skipped steps set their default outputs.
+    '''
+    blocks = []
+    for level in levels:
+        lines = [
+            f"# Run steps concurrently: {', '.join(step['model'] for step in level)}",
+            "calls = []"
+        ]
+        for step in level:
+            inputs = "{" + ", ".join(f"{key!r}: tensors[{value!r}]"
+                                     for key, value in step["input_map"].items()) + "}"
+            call = f"calls.append(_infer({step['model']!r}, {step['version']}, {inputs}, {step['output_map']!r}))"
+            if step["condition"] is None:
+                lines.append(call)
+                continue
+            lines.append(f"if {step['condition']}:")
+            lines.append(f"    {call}")
+            if step["default"]:
+                lines.append("else:")
+                for name, value in step["default"].items():
+                    lines.append(f"    tensors[{name!r}] = np.asarray({value})")
+        lines.append("for outputs in await asyncio.gather(*calls):")
+        lines.append("    tensors.update(outputs)")
+        blocks.append("\n            ".join(lines))
+    return "\n\n            ".join(blocks)
+
+
+# Module level helpers of generated BLS model. Call a model with Triton BLS.
+PYTHON_BLS_HELPERS_STRING = '''
+
+async def _infer(model_name, model_version, inputs, outputs):
+    """
+    Call model with a BLS request. Inputs are keyed by model input name.
+    Return requested outputs keyed by pipeline tensor name.
+    """
+    request = pb_utils.InferenceRequest(
+        model_name=model_name,
+        model_version=model_version,
+        inputs=[pb_utils.Tensor(name, value) for name, value in inputs.items()],
+        requested_output_names=list(outputs))
+    response = await request.async_exec()
+    if response.has_error():
+        raise pb_utils.TritonModelException(
+            f"Model {model_name}: {response.error().message()}")
+    return {
+        tensor_name: pb_utils.get_output_tensor_by_name(response, name).as_numpy()
+        for name, tensor_name in outputs.items()
+    }
+'''
+
+
+def get_triton_python_bls_model_config_string(name: str, levels: list[list[dict]], tensor_config: FormatedInputOutputTensors): return f'''# Model Configuration for Triton Server Python Model.
+# Auto generated by `trsp` module. Developed by Ming-doan.
+# Model: {name}.
+# Engine: bls.
+# ------------------------------
+
+import asyncio
+import numpy as np
+import triton_python_backend_utils as pb_utils
+{PYTHON_BLS_HELPERS_STRING}
+
+class TritonPythonModel:
+    def initialize(self, args):
+        ...
+
+    async def execute(self, requests):
+        tensor_inputs_name = {str(get_tensor_inputs_name(tensor_config))}
+        tensor_outputs_name = {str(get_tensor_outputs_name(tensor_config))}
+        tensor_outputs_dtype = {str(get_tensor_outputs_dtype(tensor_config))}
+
+        async def process(request):
             # Get input tensors
-            input_tensors = []
+            tensors = {{}}
             for name in tensor_inputs_name:
-                input_tensors.append(
-                    pb_utils.get_input_tensor_by_name(request, name).as_numpy()
-                )
+                tensors[name] = pb_utils.get_input_tensor_by_name(
+                    request, name).as_numpy()
 
-            # Transfer tensors to execute function
-            outputs = {data['execute']}(self.params, input_tensors)
+            {get_bls_levels_string(levels)}
 
             # Create output tensors
             output_tensors = []
-            for name, output in zip(tensor_outputs_name, outputs):
-                output_tensors.append(pb_utils.Tensor(name, output))
+            for name, dtype in zip(tensor_outputs_name, tensor_outputs_dtype):
+                output_tensors.append(pb_utils.Tensor(
+                    name, np.asarray(tensors[name], dtype=dtype)))
+            return pb_utils.InferenceResponse(output_tensors)
 
-            # Create response
-            response = pb_utils.InferenceResponse(output_tensors)
+        async def process_or_error(request):
+            try:
+                return await process(request)
+            except KeyError as e:
+                return pb_utils.InferenceResponse(error=pb_utils.TritonError(
+                    f"Tensor {{e}} is not computed. Its step was skipped by condition and has no default."))
+            except Exception as e:
+                return pb_utils.InferenceResponse(error=pb_utils.TritonError(
+                    f"{{type(e).__name__}}: {{e}}"))
 
-            # Append response
-            responses.append(response)
-        return responses
+        # Process requests concurrently. Gather keeps the order of requests.
+        responses = await asyncio.gather(
+            *[process_or_error(request) for request in requests])
+        return list(responses)
 
     def finalize(self):
-        {get_python_finalize_function(data['finalize'] if 'finalize' in data else None)}
+        ...
 '''
@@ -8,12 +8,11 @@ This module provides support for building Triton Server model repository
 and its configuration files.
 '''
 
+import sys
 import argparse
-import shutil
 from _abstract import TritonConfig
 from _file_config import FileConfig
 from _build_pbtxt import BuildProtoBufTxt
-from _utils import get_absolute_path
 from _constants import ERROR_PREFIX, WARNING_PREFIX
 
 
@@ -57,11 +56,20 @@ def main():
 
     # Rebuild model repository. Eg: False (default: False)
     parser.add_argument('--rebuild', type=bool, default=False,
-                        help='Rebuild model repository. If provided, model repository will be rebuilt.')
+                        help='Rebuild model repository. If provided, every model is rebuilt, even if it is up to date.')
+
+    # Number of parallel build jobs. Eg: 4 (default: 1)
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Number of worker processes building model versions in parallel.')
 
     # Parse arguments --------------------------------------------------------
     args = parser.parse_args()
 
+    # Check number of jobs
+    if args.jobs < 1:
+        print(ERROR_PREFIX + "Number of jobs must be a positive integer.")
+        return
+
     # Load configuration file if provided ------------------------------------
     if args.f:
         # Show warning if other arguments are provided.
@@ -111,15 +119,9 @@ def main():
             ]
         }
 
-    # Rebuild model repository if provided ------------------------------------
-    if args.rebuild:
-        shutil.rmtree(get_absolute_path(config["model_repository"]))
-
-    # Write to model repository
-    BuildProtoBufTxt(config).build()
-    # try:
-    # except Exception as e:
-    #     print(ERROR_PREFIX + str(e))
+    # Write to model repository. Build manifest is ignored if rebuild is provided
+    if not BuildProtoBufTxt(config, jobs=args.jobs, rebuild=args.rebuild).build():
+        sys.exit(1)
 
 
 # Run main function if module is run directly
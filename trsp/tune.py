@@ -0,0 +1,97 @@
+'''
+Triton Server Build Support.
+----
+Author: Ming-doan
+Created: 2024-02-20
+----
+This module provides support for building Triton Server model repository
+and its configuration files.
+'''
+
+import os
+import sys
+import argparse
+from _file_config import FileConfig
+from _tune import get_tune_model_path, sweep_model, get_recommendation, apply_recommendation, format_report
+from _utils import get_absolute_path
+from _constants import BUILD_DIR, ERROR_PREFIX, WARNING_PREFIX, INFO_PREFIX, SUCCESS_PREFIX
+
+
+# Define argument parser
+parser = argparse.ArgumentParser(
+    description='Triton Server Tune Model Module.')
+
+
+def main():
+    '''
+    Main function for Triton Server Tune Model Module.
+    '''
+    # Add arguments -----------------------------------------------------------
+    # Model configuration file path. Eg: /path/to/model/config.yaml
+    parser.add_argument('-f', type=str, required=True,
+                        help='Path to the model configuration file.')
+
+    # Models to tune. Eg: rembg_model (default: every model with `tune`)
+    parser.add_argument('-m', '--model', type=str, action='append',
+                        help='Name of the model to be tuned. Can be repeated.')
+
+    # Write tuned configuration. Eg: triton_config.yaml
+    parser.add_argument('-o', '--output', type=str,
+                        help='Path to write the configuration file with recommended settings. Comments and formatting are not kept. If not provided, only the report is printed.')
+
+    # Parse arguments --------------------------------------------------------
+    args = parser.parse_args()
+
+    file_config = FileConfig(args.f)
+    config = file_config.get_config()
+    model_repository = get_absolute_path(
+        f"{BUILD_DIR}/{config['model_repository']}")
+
+    # Select models to tune
+    names = args.model or [
+        name for name, model_config in config["models"].items() if "tune" in model_config]
+    for name in names:
+        if name not in config["models"] or "tune" not in config["models"][name]:
+            print(ERROR_PREFIX +
+                  f"Model {name} has no `tune` configuration.")
+            sys.exit(1)
+    if not names:
+        print(WARNING_PREFIX + "No model has `tune` configuration.")
+        return
+
+    # Tune models ------------------------------------------------------------
+    failed = False
+    for name in names:
+        model_config = config["models"][name]
+        print(INFO_PREFIX + f"Tuning model {name}...")
+        try:
+            path = get_tune_model_path(model_repository, name, model_config)
+            measurements = sweep_model(path, model_config)
+            recommendation = get_recommendation(model_config, measurements)
+        except Exception as e:
+            print(ERROR_PREFIX + f"Failed to tune model {name}. {e}")
+            failed = True
+            continue
+
+        print(format_report(name, path, measurements, recommendation))
+        if args.output:
+            for field in apply_recommendation(model_config, recommendation):
+                print(WARNING_PREFIX +
+                      f"Model {name} `{field}` has non-CPU groups and is not written.")
+
+    # Write tuned configuration ----------------------------------------------
+    if args.output:
+        # Configuration is written as plain YAML
+        if os.path.abspath(args.output) == os.path.abspath(args.f):
+            print(WARNING_PREFIX +
+                  f"Comments and formatting of {args.f} are not kept.")
+        file_config.export_config(args.output)
+        print(SUCCESS_PREFIX + f"Tuned configuration written to {args.output}.")
+
+    if failed:
+        sys.exit(1)
+
+
+# Run main function if module is run directly
+if __name__ == '__main__':
+    main()